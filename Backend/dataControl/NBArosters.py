@@ -1,64 +1,76 @@
+import os
 import requests
-from bs4 import BeautifulSoup
-import sqlite3
-import time
+import scraperMetrics
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from httpCache import HttpCache
+from dbManagement import ROSTER_DB_PATH, load_rosters, replace_rosters
 import re
 
 BASE_TEAMS_URL = "https://pdfroster.nba.com/nba/"
+# Team pages fetched at once; the request rate itself is set per host in httpClient.HOST_LIMITS
+ROSTER_WORKERS = int(os.getenv('NBA_ROSTER_WORKERS', '8'))
+HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/112.0.0.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.google.com/',
+}
+# Only these elements are built into a tree; the rest of each page is skipped by the parser.
+# Regexes because newer bs4 matches parse_only against the unsplit class attribute.
+TEAM_LINKS_STRAINER = SoupStrainer('div', class_=re.compile(r'(?:^|\s)large-4(?:\s|$)'))
+PLAYER_CARDS_STRAINER = SoupStrainer('div', class_=re.compile(r'(?:^|\s)player(?:\s|$)'))
+NAME_MAP = {'OKC Thunder': "Oklahoma City Thunder"}
 
-def create_database(db_path='nba_rosters.db'):
-    conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS players (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            team TEXT NOT NULL,
-            player TEXT NOT NULL
-        )
-    ''')
-    conn.commit()
-    return conn
+_http_cache = None
 
-def insert_player(conn, team, player):
-    nameMap = {'OKC Thunder': "Oklahoma City Thunder"}
-    c = conn.cursor()
-    if team not in nameMap:
-        c.execute('INSERT INTO players (team, player) VALUES (?, ?)', (team, player))
-    else:
-        c.execute('INSERT INTO players (team, player) VALUES (?, ?)', (nameMap[team], player))
-    conn.commit()
+def get_http_cache():
+    # ETag/Last-Modified per page, so unchanged team pages come back as 304s
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = HttpCache('nba-rosters')
+    return _http_cache
+
+def close_http_cache():
+    global _http_cache
+    if _http_cache is not None:
+        _http_cache.close()
+        _http_cache = None
+
+def forget_team_pages(teams):
+    # Validators are saved when a page is fetched; without them the next run downloads every page again
+    cache = get_http_cache()
+    for _, team_url in teams:
+        cache.forget(cache.key_for(team_url))
+
+def db_team_name(team):
+    return NAME_MAP.get(team, team)
+
+def fetch_page(url):
+    response = get_http_cache().get(url, headers=HEADERS, timeout=15)
+    if response.status_code != 200:
+        raise requests.HTTPError(f"{response.status_code} Error for url: {url}")
+    return response
 
 def get_team_links():
-    url = BASE_TEAMS_URL
-    headers = {
-        'User-Agent': (
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/112.0.0.0 Safari/537.36'
-        ),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.google.com/',
-    }
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
+    response = fetch_page(BASE_TEAMS_URL)
+    soup = BeautifulSoup(response.content, 'html.parser', parse_only=TEAM_LINKS_STRAINER)
     team_links = []
     for div in soup.select('div.small-12.large-4.columns'):
-        a_tag = div.find('h3').find('a')
+        h3 = div.find('h3')
+        a_tag = h3.find('a') if h3 else None
         if a_tag and a_tag.get('href'):
             team_url = a_tag['href']
             team_name = a_tag.get_text(strip=True)
             team_links.append((team_name, team_url))
     return team_links
 
-def get_players_for_team(team_url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0'
-    }
-    response = requests.get(team_url, headers=headers)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
+def parse_players(html):
+    soup = BeautifulSoup(html, 'html.parser', parse_only=PLAYER_CARDS_STRAINER)
     players = []
     for player_div in soup.select('div.small-12.medium-3.large-3.columns.player'):
         h3 = player_div.find('h3')
@@ -69,22 +81,68 @@ def get_players_for_team(team_url):
                 players.append(name)
     return players
 
+def get_players_for_team(team_url, skip_unchanged=False):
+    """Player names on a team page, or None when skip_unchanged and the page answered 304"""
+    with scraperMetrics.stage('fetch.roster'):
+        response = fetch_page(team_url)
+    if skip_unchanged and response.not_modified:
+        return None
+    with scraperMetrics.stage('parse.roster'):
+        return parse_players(response.content)
+
 def main():
-    conn = create_database()
+    with scraperMetrics.cycle('NBArosters'):
+        try:
+            crawl_rosters()
+        finally:
+            close_http_cache()
+
+def crawl_rosters(workers=ROSTER_WORKERS, db_path=ROSTER_DB_PATH):
     print("Fetching team links...")
-    teams = get_team_links()
+    with scraperMetrics.stage('fetch.teams'):
+        teams = get_team_links()
     if not teams:
         return
-    for team_name, team_url in teams:
-        print(f"Processing team: {team_name} ({team_url})")
-        player_names = get_players_for_team(team_url)
-        if player_names:
-            for player in player_names:
-                insert_player(conn, team_name, player)
-            print(f"Inserted {len(player_names)} players for {team_name}.")
-        time.sleep(1)
-    conn.close()
-    print("Database connection closed.")
+    stored = load_rosters(db_path)
+    # Teams whose page is unchanged, or could not be fetched, keep their stored roster
+    rosters = {db_team_name(team_name): stored[db_team_name(team_name)] for team_name, _ in teams if db_team_name(team_name) in stored}
+    changed = len(rosters) != len(stored)
+    unchanged = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # A 304 only means the page is unchanged since we last saw it; refetch teams the database lacks
+        futures = {
+            pool.submit(get_players_for_team, team_url, db_team_name(team_name) in stored): team_name
+            for team_name, team_url in teams
+        }
+        for future in as_completed(futures):
+            team_name = futures[future]
+            try:
+                player_names = future.result()
+            except Exception as e:
+                print(f"Failed to fetch roster for {team_name}: {e}")
+                continue
+            if player_names is None:
+                unchanged += 1
+                continue
+            if player_names:
+                rosters[db_team_name(team_name)] = player_names
+                changed = True
+                print(f"Fetched {len(player_names)} players for {team_name}.")
+    scraperMetrics.count('teams', len(teams))
+    scraperMetrics.count('unchangedTeams', unchanged)
+    print(f"{unchanged} of {len(teams)} team pages unchanged since the last refresh.")
+    if not changed:
+        print("Rosters unchanged, database left as is.")
+        return
+    try:
+        with scraperMetrics.stage('write.players'):
+            stored_count = replace_rosters(rosters, db_path)
+    except Exception:
+        # Otherwise the pages fetched this run answer 304 next time and the stale rosters stay
+        forget_team_pages(teams)
+        raise
+    print(f"Stored {stored_count} players for {len(rosters)} teams.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import profiling
+    profiling.run('NBArosters', main)
\ No newline at end of file
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import functools
+import threading
+import statistics
+from datetime import datetime, timedelta
+from collections import defaultdict
+
+DATA_CONTROL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DATA_CONTROL)
+from fixtures import load_bundle
+from replay import ReplayServer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('Bench')
+
+WRITE_COMMANDS = {'insert': 'documents', 'update': 'updates', 'delete': 'deletes', 'findAndModify': None}
+READ_COMMANDS = ('find', 'aggregate', 'count', 'distinct', 'getMore')
+
+class StageTimer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = defaultdict(list)
+
+    def wrap(self, owner, name, stage=None):
+        # Replaces owner.name with a timed version; works for instance methods and module functions
+        func = getattr(owner, name)
+        stage = stage or name
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.durations[stage].append(elapsed)
+
+        setattr(owner, name, timed)
+
+    def summary(self):
+        return {
+            stage: {"calls": len(values), "totalSeconds": sum(values), "meanSeconds": statistics.mean(values)}
+            for stage, values in self.durations.items()
+        }
+
+def mongo_counter():
+    from pymongo import monitoring
+
+    class MongoCommandCounter(monitoring.CommandListener):
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.reset()
+
+        def reset(self):
+            self.commands = defaultdict(int)
+            self.write_ops = defaultdict(int)
+
+        def started(self, event):
+            name = event.command_name
+            if name not in WRITE_COMMANDS and name not in READ_COMMANDS:
+                return
+            collection = event.command.get(name)
+            with self.lock:
+                self.commands[f"{name}:{collection}"] += 1
+                if name in WRITE_COMMANDS:
+                    field = WRITE_COMMANDS[name]
+                    self.write_ops[collection] += len(event.command.get(field, [])) if field else 1
+
+        def succeeded(self, event):
+            pass
+
+        def failed(self, event):
+            pass
+
+        def summary(self):
+            return {
+                "commands": dict(self.commands),
+                "writeOps": dict(self.write_ops),
+                "totalWriteOps": sum(self.write_ops.values()),
+            }
+
+    counter = MongoCommandCounter()
+    # Registered listeners only apply to clients created afterwards, so this runs before any scraper import
+    monitoring.register(counter)
+    return counter
+
+# Each scenario imports its scraper, times its stages and returns (one cycle, teardown)
+
+def mlb_live_scenario(timer, args):
+    import mlbLiveGames
+    api = mlbLiveGames.MLBLiveGamesAPI(incremental=args.incremental)
+    for name in ('fetch_todays_games', 'fetch_game_update', 'prepare_game_writes', 'write_games'):
+        timer.wrap(api, name)
+    return api.process_live_games, api.cleanup
+
+def mlb_boxscores_scenario(timer, args):
+    from mlbResults import mlbBoxScores
+    for name in ('fetch_mlb_schedule', 'fetch_boxscore', 'extract_boxscores'):
+        timer.wrap(mlbBoxScores, name)
+    return mlbBoxScores.main, lambda: None
+
+def nba_live_scenario(timer, args):
+    import liveGames
+    api = liveGames.NBALiveGamesAPI()
+    for name in ('fetch_scoreboard', 'fetch_game_plays', 'fetch_game_stats'):
+        timer.wrap(api, name)
+    return api.process_live_games, api.cleanup
+
+def nba_boxscores_scenario(timer, args):
+    import playersBoxScores
+    api = playersBoxScores.NBABoxScoresAPI()
+    for name in ('get_box_scores', 'calculate_fantasy_points', 'store_box_scores'):
+        timer.wrap(api, name)
+    date = datetime.strptime(args.nba_date, "%m/%d/%Y").date()
+    return lambda: api.store_box_scores(api.get_box_scores(date)), lambda: None
+
+SCENARIOS = {
+    'mlb-live': mlb_live_scenario,
+    'mlb-boxscores': mlb_boxscores_scenario,
+    'nba-live': nba_live_scenario,
+    'nba-boxscores': nba_boxscores_scenario,
+}
+
+def configure_environment(base_url, mongo_uri):
+    # Must run before the scrapers are imported: they read these at import time
+    os.environ['MLB_STATSAPI_BASE'] = f"{base_url}/statsapi.mlb.com"
+    os.environ['NBA_CDN_BASE'] = f"{base_url}/cdn.nba.com"
+    os.environ['NBA_STATS_BASE'] = f"{base_url}/stats.nba.com"
+    os.environ['SCRAPER_HTTP_CACHE_DIR'] = tempfile.mkdtemp(prefix='bench-http-cache-')
+    os.environ['MLB_FEED_STORE_DIR'] = tempfile.mkdtemp(prefix='bench-feed-store-')
+    os.environ['MONGO_URI'] = mongo_uri
+    os.environ['MONGODB_URI'] = mongo_uri
+    os.environ['MONGODB_DATABASE'] = mongo_uri.rsplit('/', 1)[-1].split('?')[0]
+
+def run_scenario(name, server, counter, args):
+    server.cursors.clear()
+    counter.reset()
+    timer = StageTimer()
+    cycle, teardown = SCENARIOS[name](timer, args)
+    cycle_seconds = []
+    try:
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            cycle()
+            cycle_seconds.append(time.perf_counter() - start)
+    finally:
+        teardown()
+    result = {
+        "cycles": len(cycle_seconds),
+        "cycleSeconds": cycle_seconds,
+        "meanCycleSeconds": statistics.mean(cycle_seconds),
+        "medianCycleSeconds": statistics.median(cycle_seconds),
+        "maxCycleSeconds": max(cycle_seconds),
+        "stages": timer.summary(),
+        "mongo": counter.summary(),
+    }
+    logger.info(
+        f"{name}: {result['cycles']} cycles, mean {result['meanCycleSeconds']:.3f}s, "
+        f"max {result['maxCycleSeconds']:.3f}s, {result['mongo']['totalWriteOps']} Mongo write ops"
+    )
+    for stage, stats in result["stages"].items():
+        logger.info(f"  {stage}: {stats['calls']} calls, {stats['totalSeconds']:.3f}s total, {stats['meanSeconds'] * 1000:.1f}ms mean")
+    return result
+
+def compare_to_baseline(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("meanCycleSeconds",):
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {previous[metric]:.3f} -> {result[metric]:.3f}")
+        before = previous["mongo"]["totalWriteOps"]
+        after = result["mongo"]["totalWriteOps"]
+        if after > before * (1 + tolerance):
+            regressions.append(f"{name} Mongo write ops: {before} -> {after}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against a replayed fixture bundle')
+    parser.add_argument('bundle', help='Bundle written by bench/record.py')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma separated subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--cycles', type=int, default=5, help='Cycles per scenario; live feeds advance through their recorded responses')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the latency jitter')
+    parser.add_argument('--incremental', action='store_true', help='Run mlb-live with diffPatch updates')
+    parser.add_argument('--nba-date', default=(datetime.now() - timedelta(days=1)).strftime("%m/%d/%Y"), help='Date passed to the nba-boxscores scenario (MM/DD/YYYY)')
+    parser.add_argument('--mongo-uri', default=os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017/adrenyline_bench'))
+    parser.add_argument('--fresh', action='store_true', help='Drop the benchmark database first (its name must contain "bench")')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--baseline', help='Earlier --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown or write growth before failing')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    server = ReplayServer(load_bundle(args.bundle), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    server.start()
+    configure_environment(server.base_url, args.mongo_uri)
+    counter = mongo_counter()
+
+    if args.fresh:
+        from pymongo import MongoClient
+        db_name = os.environ['MONGODB_DATABASE']
+        if 'bench' not in db_name:
+            parser.error(f"Refusing to drop {db_name!r}; use a database whose name contains 'bench'")
+        with MongoClient(args.mongo_uri) as client:
+            client.drop_database(db_name)
+
+    results = {}
+    try:
+        for name in names:
+            results[name] = run_scenario(name, server, counter, args)
+    finally:
+        server.shutdown()
+        server.server_close()
+    logger.info(f"Replay served {server.served} responses, {server.misses} unrecorded requests")
+
+    report = {
+        "bundle": args.bundle,
+        "ranAt": datetime.now().isoformat(),
+        "latencyMs": args.latency_ms,
+        "jitterMs": args.jitter_ms,
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import json
+import gzip
+import hashlib
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# A fixture bundle is a JSON document of recorded upstream responses:
+#   {"recordedAt": ..., "responses": {key: [{"status", "headers", "body"}, ...]}}
+# Keys are "host/path?sorted-query". Each key holds every response seen in recording order,
+# so a live feed polled several times replays as the same progression of documents.
+
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+def response_key(url):
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return f"{parts.netloc}{parts.path}" + (f"?{query}" if query else "")
+
+def body_etag(body):
+    return '"' + hashlib.sha1(body.encode('utf-8')).hexdigest()[:16] + '"'
+
+def open_bundle(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def load_bundle(path):
+    with open_bundle(path, 'r') as f:
+        return json.load(f)
+
+def save_bundle(path, responses):
+    bundle = {"recordedAt": datetime.now().isoformat(), "responses": responses}
+    with open_bundle(path, 'w') as f:
+        json.dump(bundle, f)
+    return bundle
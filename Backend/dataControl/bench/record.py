@@ -0,0 +1,63 @@
+import os
+import sys
+import runpy
+import logging
+import argparse
+import threading
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fixtures import KEPT_HEADERS, response_key, save_bundle
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('Bench-Record')
+
+def install_recorder(responses):
+    # Every requests call in the process goes through HTTPAdapter.send, including nba_api's
+    original_send = HTTPAdapter.send
+    lock = threading.Lock()
+
+    def recording_send(adapter, request, **kwargs):
+        # Always record full bodies; a 304 would leave nothing to replay
+        request.headers.pop('If-None-Match', None)
+        request.headers.pop('If-Modified-Since', None)
+        response = original_send(adapter, request, **kwargs)
+        entry = {
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "body": response.content.decode("utf-8", errors="replace"),
+        }
+        with lock:
+            responses.setdefault(response_key(request.url), []).append(entry)
+        return response
+
+    HTTPAdapter.send = recording_send
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Run a scraper and record every upstream response into a fixture bundle',
+        epilog='Example: python bench/record.py bench/fixtures/mlb_live.json.gz mlbLiveGames.py -- --daemon'
+    )
+    parser.add_argument('bundle', help='Output bundle path (.json or .json.gz)')
+    parser.add_argument('script', help='Scraper script to run, relative to dataControl')
+    parser.add_argument('script_args', nargs=argparse.REMAINDER, help='Arguments passed to the script')
+    args = parser.parse_args()
+
+    data_control = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = os.path.join(data_control, args.script)
+    script_args = [arg for arg in args.script_args if arg != '--']
+    responses = {}
+    install_recorder(responses)
+    sys.argv = [script, *script_args]
+    sys.path.insert(0, os.path.dirname(script))
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        save_bundle(args.bundle, responses)
+        count = sum(len(entries) for entries in responses.values())
+        logger.info(f"Recorded {count} responses for {len(responses)} URLs into {args.bundle}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fixtures import body_etag, load_bundle, response_key
+
+logger = logging.getLogger('Bench-Replay')
+
+class ReplayServer(ThreadingHTTPServer):
+    """Serves a fixture bundle at http://host:port/<recorded host>/<path>.
+
+    Each request for a URL advances to its next recorded response and then stays on the
+    last one. URLs are matched with the same normalised key record.py stores them under
+    (query parameters sorted); anything that was never recorded gets a 404.
+    """
+    daemon_threads = True
+
+    def __init__(self, bundle, host='127.0.0.1', port=0, latency_ms=0.0, jitter_ms=0.0, seed=None):
+        super().__init__((host, port), ReplayHandler)
+        self.responses = bundle["responses"]
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random(seed)
+        self.cursors = defaultdict(int)
+        self.lock = threading.Lock()
+        self.served = 0
+        self.misses = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_response(self, key):
+        entries = self.responses.get(key)
+        if not entries:
+            return None
+        with self.lock:
+            index = min(self.cursors[key], len(entries) - 1)
+            self.cursors[key] += 1
+        return entries[index]
+
+    def delay(self):
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        seconds = max(0.0, self.latency_ms + jitter) / 1000
+        if seconds:
+            time.sleep(seconds)
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.delay()
+        # The path is /<recorded host>/<path>?<query>, so it reads as a URL without its scheme
+        entry = server.next_response(response_key('//' + self.path.lstrip('/')))
+        if entry is None:
+            with server.lock:
+                server.misses += 1
+            logger.warning(f"No recorded response for {self.path}")
+            self.send_body(404, {}, '')
+            return
+        with server.lock:
+            server.served += 1
+        headers = dict(entry["headers"])
+        if entry["status"] == 200 and 'ETag' not in headers:
+            headers['ETag'] = body_etag(entry["body"])
+        if entry["status"] == 200 and self.headers.get('If-None-Match') == headers['ETag']:
+            self.send_body(304, {'ETag': headers['ETag']}, '')
+            return
+        self.send_body(entry["status"], headers, entry["body"])
+
+    def send_body(self, status, headers, body):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Serve a recorded fixture bundle over HTTP')
+    parser.add_argument('bundle', help='Bundle written by bench/record.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Uniform +/- variation on the delay')
+    args = parser.parse_args()
+
+    server = ReplayServer(load_bundle(args.bundle), args.host, args.port, args.latency_ms, args.jitter_ms)
+    base = server.base_url
+    logger.info(f"Replaying {args.bundle} on {base}")
+    logger.info(f"MLB_STATSAPI_BASE={base}/statsapi.mlb.com NBA_CDN_BASE={base}/cdn.nba.com NBA_STATS_BASE={base}/stats.nba.com")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+# Import-time budget and first-call latency for the scripts Node spawns per request or on a schedule.
+# Every measurement runs in a fresh interpreter, the way routes/games.js and scheduler.js start them.
+#   python bench/startup.py                        import times only, no network
+#   python bench/startup.py --bundle fixtures/x.json.gz   also time the first call against a replay
+
+DATA_CONTROL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Entry point -> (module, import budget in milliseconds)
+ENTRY_POINTS = {
+    'playersBoxScores': ('playersBoxScores', 150),
+    'liveGames': ('liveGames', 500),
+    'mlbLiveGames': ('mlbLiveGames', 500),
+    'MLBGames': ('MLBGames', 600),
+}
+
+def players_live_call(module):
+    # What `playersBoxScores.py --live` does
+    api = module.NBABoxScoresAPI()
+    api.store_live_games(api.get_live_game_data(datetime.now().date()))
+
+def live_games_call(module):
+    api = module.NBALiveGamesAPI()
+    api.process_live_games()
+    api.cleanup()
+
+def mlb_live_call(module):
+    api = module.MLBLiveGamesAPI()
+    api.process_live_games()
+    api.cleanup()
+
+# MLBGames scrapes www.mlb.com directly, which the replay server does not front, so it has no first call
+FIRST_CALLS = {
+    'playersBoxScores': players_live_call,
+    'liveGames': live_games_call,
+    'mlbLiveGames': mlb_live_call,
+}
+
+def run_child(name, first_call):
+    # Runs inside the spawned interpreter; prints one JSON line for the parent
+    sys.path.insert(0, DATA_CONTROL)
+    import importlib
+    start = time.perf_counter()
+    module = importlib.import_module(ENTRY_POINTS[name][0])
+    result = {"importSeconds": time.perf_counter() - start}
+    if first_call:
+        start = time.perf_counter()
+        FIRST_CALLS[name](module)
+        result["firstCallSeconds"] = time.perf_counter() - start
+    print(json.dumps(result))
+
+def measure(name, first_call, repeat):
+    samples = []
+    for _ in range(repeat):
+        command = [sys.executable, os.path.abspath(__file__), '--child', name]
+        if first_call:
+            command.append('--first-call')
+        start = time.perf_counter()
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=DATA_CONTROL)
+        wall = time.perf_counter() - start
+        if completed.returncode != 0:
+            raise RuntimeError(f"{name} failed to start:\n{completed.stderr[-2000:]}")
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        sample["processSeconds"] = wall
+        samples.append(sample)
+    return {
+        metric: statistics.median(sample[metric] for sample in samples)
+        for metric in samples[0]
+    }
+
+def measure_interpreter(repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import and first-call latency of the scraper entry points')
+    parser.add_argument('--entry-points', default=','.join(ENTRY_POINTS), help='Comma separated subset of: ' + ', '.join(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per entry point; medians are reported')
+    parser.add_argument('--bundle', help='Replay bundle from bench/record.py; enables the first-call measurement')
+    parser.add_argument('--mongo-uri', default=os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017/adrenyline_bench'))
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--first-call', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.first_call)
+        return
+
+    names = [name.strip() for name in args.entry_points.split(',') if name.strip()]
+    unknown = [name for name in names if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"Unknown entry points: {', '.join(unknown)}")
+
+    server = None
+    if args.bundle:
+        sys.path.insert(0, BENCH_DIR)
+        from fixtures import load_bundle
+        from replay import ReplayServer
+        from benchmark import configure_environment
+        server = ReplayServer(load_bundle(args.bundle))
+        server.start()
+        # Children inherit the replay upstreams and the benchmark database
+        configure_environment(server.base_url, args.mongo_uri)
+
+    baseline = measure_interpreter(args.repeat)
+    print(f"Bare interpreter start: {baseline * 1000:.0f}ms")
+    results = {}
+    over_budget = []
+    try:
+        for name in names:
+            result = measure(name, server is not None and name in FIRST_CALLS, args.repeat)
+            budget_ms = ENTRY_POINTS[name][1]
+            result["importBudgetSeconds"] = budget_ms / 1000
+            results[name] = result
+            line = f"{name}: import {result['importSeconds'] * 1000:.0f}ms (budget {budget_ms}ms), process {result['processSeconds'] * 1000:.0f}ms"
+            if "firstCallSeconds" in result:
+                line += f", first call {result['firstCallSeconds'] * 1000:.0f}ms"
+            print(line)
+            if result["importSeconds"] * 1000 > budget_ms:
+                over_budget.append(name)
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"ranAt": datetime.now().isoformat(), "interpreterSeconds": baseline, "entryPoints": results}, f, indent=2)
+    if over_budget:
+        print(f"Over import budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,84 @@
+import os
 import sqlite3
 
-def delete_all_from_nba_roster():
-    db = sqlite3.connect('nba_rosters.db')
-    cursor = db.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tables = cursor.fetchall()
-    for table in tables:
-        table_name = table[0]
-        if table_name == "sqlite_sequence":
-            continue
-        cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-        db.commit()
-    db.close()
-
-delete_all_from_nba_roster()
+# nba_rosters.db is read by routes/players.js while NBArosters refreshes it. The live database stays in
+# WAL mode and is only ever changed by single transactions, so readers see the old rosters or the new
+# ones and never an empty or missing table.
 
+ROSTER_DB_PATH = 'nba_rosters.db'
+
+def connect_roster_db(db_path=ROSTER_DB_PATH):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            team TEXT NOT NULL,
+            player TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS players_team ON players (team)')
+    conn.commit()
+    return conn
+
+def load_rosters(db_path=ROSTER_DB_PATH):
+    """{team: [player, ...]} as currently stored"""
+    conn = connect_roster_db(db_path)
+    rosters = {}
+    for team, player in conn.execute('SELECT team, player FROM players ORDER BY id'):
+        rosters.setdefault(team, []).append(player)
+    conn.close()
+    return rosters
+
+def build_staging_db(rosters, staging_path):
+    # The whole dataset in one executemany and one commit, away from the live file
+    if os.path.exists(staging_path):
+        os.remove(staging_path)
+    conn = sqlite3.connect(staging_path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('CREATE TABLE players (team TEXT NOT NULL, player TEXT NOT NULL)')
+    with conn:
+        conn.executemany(
+            'INSERT INTO players (team, player) VALUES (?, ?)',
+            [(team, player) for team, players in rosters.items() for player in players]
+        )
+    conn.close()
+
+def swap_rosters(staging_path, db_path=ROSTER_DB_PATH):
+    """Replace the live players table with the staging one in a single transaction.
+
+    The staging file is attached rather than renamed over the live one: readers holding the old file
+    open (and its -wal/-shm files) would otherwise keep reading a deleted database.
+    """
+    conn = connect_roster_db(db_path)
+    conn.isolation_level = None
+    try:
+        conn.execute('ATTACH DATABASE ? AS staging', (staging_path,))
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM main.players')
+            conn.execute('INSERT INTO main.players (team, player) SELECT team, player FROM staging.players ORDER BY rowid')
+            count = conn.execute('SELECT COUNT(*) FROM main.players').fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('DETACH DATABASE staging')
+    finally:
+        conn.close()
+    os.remove(staging_path)
+    return count
+
+def replace_rosters(rosters, db_path=ROSTER_DB_PATH):
+    """Stage rosters ({team: [player, ...]}) and swap them in; returns the number of players stored"""
+    staging_path = db_path + '.staging'
+    build_staging_db(rosters, staging_path)
+    return swap_rosters(staging_path, db_path)
+
+def delete_all_from_nba_roster(db_path=ROSTER_DB_PATH):
+    # Empties the rosters in one transaction; the schema stays so readers never hit a missing table
+    return replace_rosters({}, db_path)
+
+if __name__ == "__main__":
+    delete_all_from_nba_roster()
@@ -0,0 +1,19 @@
+import json
+import hashlib
+
+# Fields that change on every write and say nothing about the game itself
+VOLATILE_FIELDS = ('lastUpdated', 'fieldHashes')
+
+def content_hash(value):
+    encoded = json.dumps(value, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+def field_hashes(doc, exclude=VOLATILE_FIELDS):
+    return {key: content_hash(value) for key, value in doc.items() if key not in exclude}
+
+def changed_fields(doc, previous_hashes, exclude=VOLATILE_FIELDS):
+    # Returns the top-level fields whose hash differs from the stored one, plus the new hashes
+    hashes = field_hashes(doc, exclude)
+    previous_hashes = previous_hashes or {}
+    changed = {key: doc[key] for key, value in hashes.items() if previous_hashes.get(key) != value}
+    return changed, hashes
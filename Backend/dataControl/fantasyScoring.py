@@ -0,0 +1,129 @@
+import os
+import sys
+import logging
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+
+logger = logging.getLogger('Fantasy-Scoring')
+
+# Box score field -> points per unit. Fields are the player_box_scores names used by playersBoxScores.
+# bonusTiers are (categories at 10+, bonus), checked in order; only the first match applies.
+PROFILES = {
+    'draftkings': {
+        'weights': {'pts': 1.0, 'tpm': 0.5, 'reb': 1.25, 'ast': 1.5, 'stl': 2.0, 'blk': 2.0, 'tov': -0.5},
+        'bonusCategories': ('pts', 'reb', 'ast', 'stl', 'blk'),
+        'bonusTiers': ((3, 3.0), (2, 1.5)),
+    },
+    'fanduel': {
+        'weights': {'pts': 1.0, 'reb': 1.2, 'ast': 1.5, 'stl': 3.0, 'blk': 3.0, 'tov': -1.0},
+    },
+}
+# NBA auctions settle on one of these metrics, summed from the box score as in processCompletedAuctions
+# (scheduler.js); each is stored as an 'auction:<metric>' profile
+AUCTION_METRICS = {
+    'points': ('pts',),
+    'rebounds': ('reb',),
+    'assists': ('ast',),
+    'steals': ('stl',),
+    'blocks': ('blk',),
+    'points + rebounds': ('pts', 'reb'),
+    'points + assists': ('pts', 'ast'),
+    'points + rebounds + assists': ('pts', 'reb', 'ast'),
+    'rebounds + assists': ('reb', 'ast'),
+    'blocks + steals': ('blk', 'stl'),
+}
+PROFILES.update({
+    f'auction:{metric}': {'weights': {field: 1.0 for field in fields}}
+    for metric, fields in AUCTION_METRICS.items()
+})
+DEFAULT_PROFILE = 'draftkings'
+
+def as_frame(rows):
+    if isinstance(rows, pd.DataFrame):
+        return rows
+    return pd.DataFrame(rows)
+
+def score_box_scores(rows, profiles=None):
+    """Fantasy points for every row under each profile; returns a DataFrame with one column per profile.
+
+    rows may be a DataFrame, a list of box score dicts or a dict of arrays.
+    """
+    frame = as_frame(rows)
+    names = list(profiles or PROFILES)
+    fields = sorted({field for name in names for field in PROFILES[name]['weights']})
+    stats = np.column_stack([
+        pd.to_numeric(frame[field], errors='coerce').fillna(0).to_numpy(dtype=float) if field in frame
+        else np.zeros(len(frame))
+        for field in fields
+    ]) if len(frame) else np.zeros((0, len(fields)))
+    weights = np.array([[PROFILES[name]['weights'].get(field, 0.0) for name in names] for field in fields])
+    points = stats @ weights
+
+    for column, name in enumerate(names):
+        profile = PROFILES[name]
+        if not profile.get('bonusTiers'):
+            continue
+        categories = sum(
+            (pd.to_numeric(frame[field], errors='coerce').fillna(0).to_numpy() >= 10).astype(int)
+            for field in profile['bonusCategories'] if field in frame
+        )
+        tiers = profile['bonusTiers']
+        points[:, column] += np.select([categories >= count for count, _ in tiers], [bonus for _, bonus in tiers], 0.0)
+
+    return pd.DataFrame(np.round(points, 2), columns=names, index=frame.index)
+
+def fantasy_fields(rows, profiles=None):
+    """The fantasyScores/fantasyPoints fields stored with each box score, in row order"""
+    scores = score_box_scores(rows, profiles)
+    return scores.to_dict('records'), scores[DEFAULT_PROFILE].tolist() if DEFAULT_PROFILE in scores else None
+
+def recompute_stored_scores(collection, query=None, batch_size=5000):
+    """Rescore stored player_box_scores in batches, e.g. after a scoring-rule change"""
+    fields = sorted({field for profile in PROFILES.values() for field in profile['weights']})
+    cursor = collection.find(query or {}, {field: 1 for field in fields}).batch_size(batch_size)
+    updated = 0
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            updated += write_scores(collection, batch)
+            batch = []
+    if batch:
+        updated += write_scores(collection, batch)
+    return updated
+
+def write_scores(collection, docs):
+    scores, points = fantasy_fields(docs)
+    operations = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"fantasyScores": score, "fantasyPoints": point}})
+        for doc, score, point in zip(docs, scores, points)
+    ]
+    result = collection.bulk_write(operations, ordered=False)
+    logger.info(f"Rescored {len(operations)} box scores ({result.modified_count} changed)")
+    return result.modified_count
+
+def main():
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Recompute fantasy scores for stored NBA box scores')
+    parser.add_argument('--date', type=str, help='Only rescore this game date (MM/DD/YYYY)')
+    args = parser.parse_args()
+
+    mongo_uri = os.environ.get('MONGODB_URI') or os.environ.get('MONGO_URI', 'mongodb://localhost:27017/sportsAH')
+    client = MongoClient(mongo_uri)
+    collection = client[os.environ.get('MONGODB_DATABASE', 'sportsAH')]['player_box_scores']
+    try:
+        updated = recompute_stored_scores(collection, {"gameDate": args.date} if args.date else None)
+        logger.info(f"Recomputed fantasy scores, {updated} documents changed")
+    except Exception as e:
+        logger.error(f"Error recomputing fantasy scores: {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from httpClient import http_client
+from datetime import datetime, timedelta
+from pytz import timezone
+from httpCache import NOT_MODIFIED
+from streamJson import WILDCARD, extract_json_paths
+
+logger = logging.getLogger('MLB-FeedStore')
+
+# Local copy of each game's GUMBO /feed/live shared by mlbLiveGames and mlbBoxScores.
+# One body per gamePk on disk, indexed in SQLite with the feed timeStamp and when it was fetched,
+# so a reader whose max_age is satisfied never touches the network.
+
+FEED_STORE_DIR = os.getenv(
+    'MLB_FEED_STORE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'feeds')
+)
+FEED_STORE_RETENTION_DAYS = int(os.getenv('MLB_FEED_STORE_RETENTION_DAYS', '1'))
+# Final feeds still get the odd scoring correction, so they are re-checked, just rarely
+FINAL_MAX_AGE_SECONDS = float(os.getenv('MLB_FEED_STORE_FINAL_MAX_AGE', '3600'))
+EVICT_INTERVAL_SECONDS = 3600
+READ_CHUNK_BYTES = 64 * 1024
+
+# Read alongside whatever the caller asked for, to keep the index metadata current
+META_PATHS = [
+    ("metaData", "timeStamp"),
+    ("gameData", "status", "abstractGameState"),
+    ("gameData", "datetime", "officialDate"),
+]
+
+def path_covered(path, stored_paths):
+    # True when some stored path is a prefix of path (WILDCARD matching any key)
+    for stored in stored_paths:
+        if len(stored) <= len(path) and all(s == WILDCARD or s == p for s, p in zip(stored, path)):
+            return True
+    return False
+
+def paths_covered(paths, stored_paths):
+    if stored_paths is None:
+        return True
+    if paths is None:
+        return False
+    return all(path_covered(tuple(path), stored_paths) for path in paths)
+
+class FeedStore:
+    def __init__(self, session=None, store_dir=FEED_STORE_DIR, retention_days=FEED_STORE_RETENTION_DAYS):
+        self.session = session or http_client()
+        self.store_dir = store_dir
+        self.retention_days = retention_days
+        self.lock = threading.Lock()
+        self.last_evict = 0.0
+        os.makedirs(store_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(store_dir, 'feeds.db'), timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS feeds (
+                game_pk INTEGER PRIMARY KEY,
+                time_stamp TEXT,
+                game_date TEXT,
+                final INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                paths TEXT
+            )
+        ''')
+        # Feed timeStamp each consumer last processed, so "unchanged" is judged per consumer
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen (
+                consumer TEXT NOT NULL,
+                game_pk INTEGER NOT NULL,
+                time_stamp TEXT,
+                PRIMARY KEY (consumer, game_pk)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS feeds_game_date ON feeds (game_date)')
+        self.conn.commit()
+        self.evict()
+
+    def body_path(self, game_pk):
+        return os.path.join(self.store_dir, f"{game_pk}.json")
+
+    def lookup(self, game_pk):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT time_stamp, final, fetched_at, etag, last_modified, paths FROM feeds WHERE game_pk = ?',
+                (game_pk,)
+            ).fetchone()
+        if not row or not os.path.exists(self.body_path(game_pk)):
+            return None
+        time_stamp, final, fetched_at, etag, last_modified, paths = row
+        return {
+            "timeStamp": time_stamp,
+            "final": bool(final),
+            "fetchedAt": fetched_at,
+            "etag": etag,
+            "lastModified": last_modified,
+            "paths": None if paths is None else [tuple(path) for path in json.loads(paths)],
+        }
+
+    def is_fresh(self, entry, max_age, paths):
+        if not entry or not paths_covered(paths, entry["paths"]):
+            return False
+        age = time.time() - entry["fetchedAt"]
+        return age <= (max(max_age, FINAL_MAX_AGE_SECONDS) if entry["final"] else max_age)
+
+    def write_body(self, game_pk, chunks):
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, self.body_path(game_pk))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def read_feed(self, game_pk, paths):
+        with open(self.body_path(game_pk), 'rb') as f:
+            if paths is None:
+                return json.load(f)
+            return extract_json_paths(iter(lambda: f.read(READ_CHUNK_BYTES), b''), list(paths) + META_PATHS)
+
+    def record(self, game_pk, feed, etag=None, last_modified=None, paths=None):
+        game_data = feed.get("gameData", {})
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO feeds (game_pk, time_stamp, game_date, final, fetched_at, etag, last_modified, paths) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (
+                    game_pk,
+                    feed.get("metaData", {}).get("timeStamp"),
+                    game_data.get("datetime", {}).get("officialDate"),
+                    int(game_data.get("status", {}).get("abstractGameState") == "Final"),
+                    time.time(),
+                    etag,
+                    last_modified,
+                    None if paths is None else json.dumps([list(path) for path in paths]),
+                )
+            )
+            self.conn.commit()
+
+    def touch(self, game_pk):
+        with self.lock:
+            self.conn.execute('UPDATE feeds SET fetched_at = ? WHERE game_pk = ?', (time.time(), game_pk))
+            self.conn.commit()
+
+    def refresh(self, game_pk, url, entry, timeout):
+        # Revalidates against statsapi; returns True when the stored body was replaced
+        headers = {}
+        if entry and entry["paths"] is None:
+            if entry["etag"]:
+                headers['If-None-Match'] = entry["etag"]
+            if entry["lastModified"]:
+                headers['If-Modified-Since'] = entry["lastModified"]
+        with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and headers:
+                self.touch(game_pk)
+                return False
+            response.raise_for_status()
+            self.write_body(game_pk, response.iter_content(READ_CHUNK_BYTES))
+            return response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+    def mark_seen(self, consumer, game_pk, time_stamp):
+        with self.lock:
+            previous = self.conn.execute(
+                'SELECT time_stamp FROM seen WHERE consumer = ? AND game_pk = ?', (consumer, game_pk)
+            ).fetchone()
+            if not previous or previous[0] != time_stamp:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO seen (consumer, game_pk, time_stamp) VALUES (?, ?, ?)',
+                    (consumer, game_pk, time_stamp)
+                )
+                self.conn.commit()
+        return bool(previous) and previous[0] == time_stamp
+
+    def forget_seen(self, consumer, game_pk):
+        # For a consumer that failed to process the feed it was handed: the next conditional get returns it again
+        with self.lock:
+            self.conn.execute('DELETE FROM seen WHERE consumer = ? AND game_pk = ?', (consumer, game_pk))
+            self.conn.commit()
+
+    def get(self, game_pk, url, consumer, max_age=0, paths=None, conditional=False, timeout=15):
+        """Return the feed for game_pk, fetching it from url only if the stored copy is older than max_age.
+
+        paths restricts parsing as in streamJson.extract_json_paths. With conditional=True,
+        NOT_MODIFIED is returned when the feed timeStamp is the one this consumer last got.
+        """
+        entry = self.lookup(game_pk)
+        if not self.is_fresh(entry, max_age, paths):
+            validators = self.refresh(game_pk, url, entry, timeout)
+            if validators:
+                feed = self.read_feed(game_pk, paths)
+                self.record(game_pk, feed, *validators)
+                if self.mark_seen(consumer, game_pk, feed.get("metaData", {}).get("timeStamp")) and conditional:
+                    return NOT_MODIFIED
+                self.evict()
+                return feed
+        if conditional and entry["timeStamp"] and self.mark_seen(consumer, game_pk, entry["timeStamp"]):
+            return NOT_MODIFIED
+        feed = self.read_feed(game_pk, paths)
+        self.mark_seen(consumer, game_pk, feed.get("metaData", {}).get("timeStamp"))
+        return feed
+
+    def put(self, game_pk, feed, paths=None):
+        # Stores a feed assembled locally (e.g. from diffPatch updates); paths lists what it contains
+        self.write_body(game_pk, [json.dumps(feed, separators=(',', ':')).encode('utf-8')])
+        self.record(game_pk, feed, paths=paths)
+
+    def evict(self):
+        # Drops every game from days older than the retention window
+        if time.time() - self.last_evict < EVICT_INTERVAL_SECONDS:
+            return
+        self.last_evict = time.time()
+        cutoff = (datetime.now(timezone('US/Pacific')) - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        with self.lock:
+            victims = [row[0] for row in self.conn.execute(
+                'SELECT game_pk FROM feeds WHERE game_date < ? OR game_date IS NULL', (cutoff,)
+            )]
+            self.conn.executemany('DELETE FROM feeds WHERE game_pk = ?', [(game_pk,) for game_pk in victims])
+            self.conn.executemany('DELETE FROM seen WHERE game_pk = ?', [(game_pk,) for game_pk in victims])
+            self.conn.commit()
+        for game_pk in victims:
+            try:
+                os.remove(self.body_path(game_pk))
+            except OSError:
+                pass
+        if victims:
+            logger.info(f"Evicted {len(victims)} stored MLB feeds from before {cutoff}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+from streamJson import extract_json_paths
+from httpClient import http_client
+
+logger = logging.getLogger('HTTP-Cache')
+
+CACHE_DIR = os.getenv(
+    'SCRAPER_HTTP_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'http')
+)
+CACHE_MAX_BYTES = int(os.getenv('SCRAPER_HTTP_CACHE_MAX_MB', '512')) * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+class NotModified:
+    def __repr__(self):
+        return 'NOT_MODIFIED'
+
+    def __bool__(self):
+        return True
+
+# Returned by get_json(conditional=True) when the server answered 304
+NOT_MODIFIED = NotModified()
+
+class CachedResponse:
+    def __init__(self, status_code, content, not_modified=False, chunks=None):
+        self.status_code = status_code
+        self._content = content
+        self.not_modified = not_modified
+        # Streamed responses carry a one-shot chunk iterator instead of the body
+        self.chunks = chunks
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b''.join(self.iter_content())
+        return self._content
+
+    def iter_content(self):
+        if self._content is not None:
+            return iter((self._content,))
+        chunks, self.chunks = self.chunks, None
+        if chunks is None:
+            raise RuntimeError("Streamed response body was already consumed")
+        return chunks
+
+    def json(self):
+        return json.loads(self.content)
+
+    def json_paths(self, paths):
+        chunks = self.iter_content()
+        result = extract_json_paths(chunks, paths)
+        # Drain trailing bytes so a streamed body finishes writing to the cache
+        for _ in chunks:
+            pass
+        return result
+
+class HttpCache:
+    def __init__(self, namespace, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, session=None):
+        # Each consumer gets its own namespace so a 304 only means "unchanged since *this* consumer last saw it"
+        self.namespace = namespace
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.session = session or http_client()
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.db'), timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self.conn.commit()
+
+    def body_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.body")
+
+    def lookup(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT etag, last_modified FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+        if row and not os.path.exists(self.body_path(key)):
+            self.forget(key)
+            return None
+        return row
+
+    def read_body(self, key):
+        try:
+            with open(self.body_path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def iter_body(self, key):
+        with open(self.body_path(key), 'rb') as f:
+            while True:
+                chunk = f.read(STREAM_CHUNK_BYTES)
+                if not chunk:
+                    return
+                yield chunk
+
+    def store(self, key, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        path = self.body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(response.content)
+        os.replace(tmp_path, path)
+        self.record(key, url, etag, last_modified, len(response.content))
+
+    def record(self, key, url, etag, last_modified, size):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (key, url, etag, last_modified, size, last_access) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, url, etag, last_modified, size, time.time())
+            )
+            self.conn.commit()
+        self.evict()
+
+    def stream_and_store(self, key, url, response):
+        # Yields the body while writing it to the cache; the entry is only recorded once fully read
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with response:
+            if not etag and not last_modified:
+                yield from response.iter_content(STREAM_CHUNK_BYTES)
+                return
+            path = self.body_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+                        f.write(chunk)
+                        size += len(chunk)
+                        yield chunk
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        self.record(key, url, etag, last_modified, size)
+
+    def touch(self, key, response):
+        with self.lock:
+            self.conn.execute(
+                'UPDATE entries SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), last_access = ? WHERE key = ?',
+                (response.headers.get('ETag'), response.headers.get('Last-Modified'), time.time(), key)
+            )
+            self.conn.commit()
+
+    def forget(self, key):
+        with self.lock:
+            self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self.conn.commit()
+        try:
+            os.remove(self.body_path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        with self.lock:
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = int(self.max_bytes * 0.9)
+            victims = []
+            for key, size in self.conn.execute('SELECT key, size FROM entries ORDER BY last_access'):
+                if total <= target:
+                    break
+                victims.append(key)
+                total -= size
+            self.conn.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in victims])
+            self.conn.commit()
+        for key in victims:
+            try:
+                os.remove(self.body_path(key))
+            except OSError:
+                pass
+        logger.info(f"Evicted {len(victims)} cached responses")
+
+    def key_for(self, url):
+        return hashlib.sha1(f"{self.namespace}:{url}".encode('utf-8')).hexdigest()
+
+    def get(self, url, headers=None, timeout=15, stream=False):
+        # With stream=True a 200 body is read lazily through iter_content and never held whole in memory
+        key = self.key_for(url)
+        request_headers = dict(headers or {})
+        cached = self.lookup(key)
+        if cached:
+            etag, last_modified = cached
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+        response = self.session.get(url, headers=request_headers, timeout=timeout, stream=stream)
+        if response.status_code == 304 and cached:
+            response.close()
+            if stream:
+                if os.path.exists(self.body_path(key)):
+                    self.touch(key, response)
+                    return CachedResponse(200, None, not_modified=True, chunks=self.iter_body(key))
+            else:
+                body = self.read_body(key)
+                if body is not None:
+                    self.touch(key, response)
+                    return CachedResponse(200, body, not_modified=True)
+            self.forget(key)
+            response = self.session.get(url, headers=headers, timeout=timeout, stream=stream)
+        if response.status_code != 200:
+            return CachedResponse(response.status_code, response.content)
+        if stream:
+            return CachedResponse(200, None, chunks=self.stream_and_store(key, url, response))
+        self.store(key, url, response)
+        return CachedResponse(response.status_code, response.content)
+
+    def get_json(self, url, headers=None, timeout=15, conditional=False, paths=None):
+        # paths limits parsing to the listed key paths (see streamJson.extract_json_paths)
+        response = self.get(url, headers=headers, timeout=timeout, stream=paths is not None)
+        if conditional and response.not_modified:
+            if response.chunks is not None:
+                response.chunks.close()
+            return NOT_MODIFIED
+        if response.status_code != 200:
+            return None
+        if paths is not None:
+            return response.json_paths(paths)
+        return response.json()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
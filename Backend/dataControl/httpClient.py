@@ -0,0 +1,182 @@
+import os
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from rateLimiter import host_bucket, NBA_STATS_RATE_PER_SECOND, NBA_STATS_BURST
+from scraperMetrics import record_http
+
+logger = logging.getLogger('HTTP-Client')
+
+# Shared HTTP layer for the scrapers: one pooled keep-alive session per host, a per-host token bucket
+# coordinated across processes, jittered exponential backoff on throttling and transient errors, and a
+# per-host circuit breaker so a host that keeps failing is skipped immediately instead of timing out.
+
+# host -> (requests per second, burst). Hosts not listed (e.g. the bench replay server) are not limited.
+HOST_LIMITS = {
+    'stats.nba.com': (NBA_STATS_RATE_PER_SECOND, NBA_STATS_BURST),
+    'cdn.nba.com': (float(os.getenv('NBA_CDN_RATE_PER_SECOND', '10')), 20),
+    'pdfroster.nba.com': (float(os.getenv('NBA_ROSTER_RATE_PER_SECOND', '8')), 8),
+    'statsapi.mlb.com': (float(os.getenv('MLB_STATSAPI_RATE_PER_SECOND', '10')), 20),
+    'www.mlb.com': (float(os.getenv('MLB_WEB_RATE_PER_SECOND', '2')), 4),
+}
+POOL_MAXSIZE = int(os.getenv('SCRAPER_HTTP_POOL_SIZE', '10'))
+CONNECT_TIMEOUT = float(os.getenv('SCRAPER_HTTP_CONNECT_TIMEOUT', '5'))
+DEFAULT_TIMEOUT = float(os.getenv('SCRAPER_HTTP_TIMEOUT', '20'))
+RETRIES = int(os.getenv('SCRAPER_HTTP_RETRIES', '3'))
+BACKOFF_BASE = float(os.getenv('SCRAPER_HTTP_BACKOFF_BASE', '0.5'))
+BACKOFF_CAP = float(os.getenv('SCRAPER_HTTP_BACKOFF_CAP', '8'))
+# Consecutive failures that open a host's breaker, and how long it stays open before one trial request
+BREAKER_FAILURES = int(os.getenv('SCRAPER_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.getenv('SCRAPER_BREAKER_RESET', '30'))
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's breaker is open."""
+
+class CircuitBreaker:
+    def __init__(self, host, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.host = host
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_request(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            # Half-open: after the reset period a single request is let through to probe the host
+            if remaining > 0 or self.trial_in_flight:
+                raise CircuitOpenError(f"Circuit open for {self.host}, retry in {max(remaining, 0):.0f}s")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit closed for {self.host}")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or (self.opened_at is None and self.failures >= self.max_failures):
+                logger.warning(f"Circuit open for {self.host} after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+def backoff_delay(attempt, response=None):
+    # Full jitter; a Retry-After header from the server wins when it is given in seconds
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+class HttpClient:
+    """Drop-in for the parts of requests.Session the scrapers use (get/request/close)."""
+
+    def __init__(self, pool_maxsize=POOL_MAXSIZE, pool_block=False, retries=RETRIES, headers=None):
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.retries = retries
+        self.headers = dict(headers or {})
+        self.sessions = {}
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def session_for(self, host):
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, pool_block=self.pool_block)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+            return session
+
+    def breaker_for(self, host):
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(host)
+            return self.breakers[host]
+
+    def request(self, method, url, timeout=None, **kwargs):
+        host = urlsplit(url).hostname or ''
+        session = self.session_for(host)
+        breaker = self.breaker_for(host)
+        limit = HOST_LIMITS.get(host)
+        bucket = host_bucket(host, *limit) if limit else None
+        read_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+        if not isinstance(read_timeout, tuple):
+            read_timeout = (min(CONNECT_TIMEOUT, read_timeout), read_timeout)
+        for attempt in range(self.retries + 1):
+            breaker.before_request()
+            try:
+                if bucket:
+                    bucket.acquire()
+                start = time.perf_counter()
+                response = session.request(method, url, timeout=read_timeout, **kwargs)
+                # Streamed bodies are not read yet, so only their declared length is known
+                if kwargs.get('stream'):
+                    size = int(response.headers.get('Content-Length') or 0)
+                else:
+                    size = len(response.content)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{method} {host} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Anything else (a broken chunked body, an invalid URL, Ctrl-C) still ends the attempt; a
+                # half-open breaker left with its trial in flight would refuse the host for good
+                breaker.record_failure()
+                raise
+            record_http(host, time.perf_counter() - start, size)
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if attempt == self.retries:
+                # Callers already handle non-200 responses; hand the last one back
+                return response
+            delay = backoff_delay(attempt, response)
+            logger.warning(f"{method} {host} answered {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+
+_client = None
+_client_lock = threading.Lock()
+
+def http_client():
+    """The process-wide client, so every scraper shares pools, breakers and buckets"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+def get(url, **kwargs):
+    return http_client().get(url, **kwargs)
@@ -1,12 +1,19 @@
 import sys
 import os
 import time
+import re
 import json
 import logging
 import requests
 from datetime import datetime, timedelta
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient, UpdateOne
 from dotenv import load_dotenv
+from httpCache import HttpCache, NOT_MODIFIED
+from docFingerprint import changed_fields, content_hash
+from upstreams import NBA_CDN_BASE
+from nbaPlays import load_watermarks, append_plays, recent_plays_update
+import scraperMetrics
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,6 +21,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger('NBA-LiveGames')
 load_dotenv()
+# Watermark source for cdn.nba.com actionNumbers in nbaPlays
+PLAY_SOURCE = 'cdn'
+# Concurrent boxscore downloads per poll
+BOXSCORE_WORKERS = int(os.getenv('NBA_LIVE_BOXSCORE_WORKERS', '8'))
+# Seconds one poll may take before it is flagged in the metrics log
+LIVE_BUDGET_SECONDS = float(os.getenv('NBA_LIVE_BUDGET_SECONDS', '20'))
+CLOCK_RE = re.compile(r'PT(?:(\d+)M)?(?:([\d.]+)S)?')
 def get_mongodb_connection():
     mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/sports_trading')
     client = MongoClient(mongo_uri)
@@ -26,11 +40,17 @@ def safe_get(data, *keys, default=None):
         else:
             return default
     return current
+def parse_clock_minutes(value):
+    # ISO 8601 durations from the CDN, e.g. "PT25M01.00S"
+    match = CLOCK_RE.fullmatch(value or '')
+    if not match:
+        return 0.0
+    return int(match.group(1) or 0) + float(match.group(2) or 0) / 60
 class NBALiveGamesAPI:
     def __init__(self):
-        self.NBA_SCOREBOARD_URL = "https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
-        self.PLAYS_URL = "https://cdn.nba.com/static/json/liveData/playbyplay/playbyplay_"
-        self.BOXSCORE_URL = "https://cdn.nba.com/static/json/liveData/boxscore/boxscore_"
+        self.NBA_SCOREBOARD_URL = f"{NBA_CDN_BASE}/static/json/liveData/scoreboard/todaysScoreboard_00.json"
+        self.PLAYS_URL = f"{NBA_CDN_BASE}/static/json/liveData/playbyplay/playbyplay_"
+        self.BOXSCORE_URL = f"{NBA_CDN_BASE}/static/json/liveData/boxscore/boxscore_"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'application/json',
@@ -38,39 +58,52 @@ class NBALiveGamesAPI:
             'Origin': 'https://www.nba.com',
             'Referer': 'https://www.nba.com/',
         }
+        self.http_cache = HttpCache('nba-live')
         self.client = get_mongodb_connection()
         self.db = self.client.get_database()
         self.live_games_collection = self.db.live_games
         logger.info(f"Using MongoDB collection: {self.live_games_collection.name}")
     def fetch_scoreboard(self):
-        response = requests.get(self.NBA_SCOREBOARD_URL, headers=self.headers, timeout=15)
+        # A 304 still hands back the cached body: the per-game passes below need the slate every poll
+        response = self.http_cache.get(self.NBA_SCOREBOARD_URL, headers=self.headers, timeout=15)
         if response.status_code != 200:
             return None
         data = response.json()
         if 'scoreboard' not in data:
             return None
         return data
-    def fetch_game_plays(self, game_id):
+    def fetch_game_plays(self, game_id, conditional=False):
         url = f"{self.PLAYS_URL}{game_id}.json"
-        response = requests.get(url, headers=self.headers, timeout=10)
-        if response.status_code != 200:
-            return None
-        return response.json()
-    def fetch_game_stats(self, game_id):
+        return self.http_cache.get_json(url, headers=self.headers, timeout=10, conditional=conditional)
+    def fetch_game_stats(self, game_id, conditional=False):
         url = f"{self.BOXSCORE_URL}{game_id}.json"
-        response = requests.get(url, headers=self.headers, timeout=10)
-        if response.status_code != 200:
-            return None
-        return response.json()
+        return self.http_cache.get_json(url, headers=self.headers, timeout=10, conditional=conditional)
+    def forget_cached(self, url_prefix, game_ids):
+        # Validators are saved when a feed is fetched; after a failed write drop them so the next poll
+        # downloads the feed again instead of getting a 304 and skipping the game for good
+        for game_id in game_ids:
+            self.http_cache.forget(self.http_cache.key_for(f"{url_prefix}{game_id}.json"))
     def process_live_games(self):
-        scoreboard_data = self.fetch_scoreboard()
+        with scraperMetrics.cycle('liveGames', budget_seconds=LIVE_BUDGET_SECONDS):
+            return self.poll_live_games()
+    def poll_live_games(self):
+        with scraperMetrics.stage('fetch.scoreboard'):
+            scoreboard_data = self.fetch_scoreboard()
         if not scoreboard_data or 'scoreboard' not in scoreboard_data:
             return False
         games = scoreboard_data['scoreboard'].get('games', [])
         if not games:
             return True
         active_game_ids = []
-        player_box_scores = self.load_all_player_box_scores()
+        stored_hashes = {
+            doc['gameId']: doc.get('fieldHashes', {})
+            for doc in self.live_games_collection.find(
+                {'gameId': {'$in': [game['gameId'] for game in games]}},
+                {'gameId': 1, 'fieldHashes': 1}
+            )
+        }
+        operations = []
+        skipped = 0
         for game in games:
             game_id = game['gameId']
             active_game_ids.append(game_id)
@@ -119,16 +152,166 @@ class NBALiveGamesAPI:
                     'timeoutsRemaining': safe_get(game, 'awayTeam', 'timeoutsRemaining', default=None),
                 },
             }
-            self.live_games_collection.update_one(
-                {'gameId': game_id},
-                {'$set': game_data},
-                upsert=True
-            )
+            changed, hashes = changed_fields(game_data, stored_hashes.get(game_id))
+            if not changed:
+                skipped += 1
+                continue
+            changed.update({'lastUpdated': game_data['lastUpdated'], 'fieldHashes': hashes})
+            operations.append(UpdateOne({'gameId': game_id}, {'$set': changed}, upsert=True))
+        scraperMetrics.count('games', len(games))
+        if operations:
+            # One unordered round-trip for the whole slate
+            with scraperMetrics.stage('write.live_games'):
+                self.live_games_collection.bulk_write(operations, ordered=False)
+        logger.info(f"NBA live games written: {len(operations)}, unchanged and skipped: {skipped}")
+        # Finished games too, so the last plays and the final stat line land; their feeds answer 304 once seen
+        started = [game['gameId'] for game in games if safe_get(game, 'gameStatus', default=1) >= 2]
+        if started:
+            try:
+                self.ingest_plays(started)
+            except Exception as e:
+                logger.error(f"Error ingesting NBA plays: {e}")
+                self.forget_cached(self.PLAYS_URL, started)
+            try:
+                self.store_player_box_scores(self.load_all_player_box_scores(started))
+            except Exception as e:
+                logger.error(f"Error updating NBA player box scores: {e}")
+                self.forget_cached(self.BOXSCORE_URL, started)
         return True
-    def load_all_player_box_scores(self):
-        return []
+    def ingest_plays(self, game_ids):
+        # Only actions past each game's watermark are formatted and written
+        watermarks = load_watermarks(self.db, PLAY_SOURCE, game_ids)
+        new_plays = {}
+        for game_id in game_ids:
+            with scraperMetrics.stage('fetch.plays', game=game_id):
+                plays_data = self.fetch_game_plays(game_id, conditional=True)
+            if plays_data is NOT_MODIFIED or not plays_data:
+                continue
+            with scraperMetrics.stage('parse.plays', game=game_id):
+                last = watermarks.get(game_id, -1)
+                actions = safe_get(plays_data, 'game', 'actions', default=[])
+                plays = [self.format_play(action) for action in actions if action.get('actionNumber', -1) > last]
+            if plays:
+                new_plays[game_id] = sorted(plays, key=lambda play: play['playId'])
+        if not new_plays:
+            return 0
+        with scraperMetrics.stage('write.plays'):
+            appended = append_plays(self.db, PLAY_SOURCE, new_plays)
+            self.live_games_collection.bulk_write([
+                UpdateOne({'gameId': game_id}, {'$push': recent_plays_update(plays)})
+                for game_id, plays in new_plays.items()
+            ], ordered=False)
+        scraperMetrics.count('plays', appended)
+        logger.info(f"NBA plays appended: {appended} across {len(new_plays)} games")
+        return appended
+    def format_play(self, action):
+        # Same shape as playersBoxScores.get_new_plays
+        return {
+            'playId': action['actionNumber'],
+            'clock': action.get('clock', ''),
+            'period': action.get('period', 0),
+            'description': action.get('description', ''),
+            'homeScore': int(action['scoreHome']) if action.get('scoreHome') not in (None, '') else None,
+            'awayScore': int(action['scoreAway']) if action.get('scoreAway') not in (None, '') else None,
+            'isScoreChange': action.get('shotResult') == 'Made',
+            'playType': action.get('actionType'),
+        }
+    def load_all_player_box_scores(self, game_ids):
+        # Boxscores fetched concurrently; games whose feed is unchanged since the last poll are skipped
+        with ThreadPoolExecutor(max_workers=BOXSCORE_WORKERS) as pool:
+            feeds = list(pool.map(self.fetch_boxscore_timed, game_ids))
+        rows = []
+        for game_id, feed in zip(game_ids, feeds):
+            if feed is NOT_MODIFIED or not feed or 'game' not in feed:
+                continue
+            with scraperMetrics.stage('parse.boxscore', game=game_id):
+                rows.extend(self.player_box_score_rows(feed['game']))
+        return rows
+    def fetch_boxscore_timed(self, game_id):
+        with scraperMetrics.stage('fetch.boxscore', game=game_id):
+            return self.fetch_game_stats(game_id, conditional=True)
+    def player_box_score_rows(self, game):
+        # Same shape as playersBoxScores.get_game_box_scores, so both sources upsert the same documents
+        home = game.get('homeTeam') or {}
+        away = game.get('awayTeam') or {}
+        home_abbr, away_abbr = home.get('teamTricode', ''), away.get('teamTricode', '')
+        home_score, away_score = home.get('score', 0), away.get('score', 0)
+        game_et = game.get('gameEt') or game.get('gameTimeUTC') or ''
+        try:
+            game_date = datetime.strptime(game_et[:10], "%Y-%m-%d").strftime("%m/%d/%Y")
+        except ValueError:
+            game_date = datetime.now().strftime("%m/%d/%Y")
+        scraped_at = datetime.utcnow().isoformat()
+        rows = []
+        for is_home, team in ((True, home), (False, away)):
+            team_abbr, opponent_abbr = (home_abbr, away_abbr) if is_home else (away_abbr, home_abbr)
+            team_score, opponent_score = (home_score, away_score) if is_home else (away_score, home_score)
+            for player in team.get('players', []):
+                stats = player.get('statistics') or {}
+                if str(player.get('played', '0')) != '1' or not player.get('name'):
+                    continue
+                rows.append({
+                    'playerName': player['name'],
+                    'teamAbbr': team_abbr,
+                    'matchup': f"{home_abbr} vs. {away_abbr}" if is_home else f"{away_abbr} @ {home_abbr}",
+                    'gameDate': game_date,
+                    'gameId': game.get('gameId'),
+                    'scrapedAt': scraped_at,
+                    'winLoss': 'W' if team_score > opponent_score else 'L',
+                    'min': round(parse_clock_minutes(stats.get('minutes', '')), 2),
+                    'pts': stats.get('points', 0),
+                    'fgm': stats.get('fieldGoalsMade', 0),
+                    'fga': stats.get('fieldGoalsAttempted', 0),
+                    'fgp': (stats.get('fieldGoalsPercentage') or 0) * 100,
+                    'tpm': stats.get('threePointersMade', 0),
+                    'tpa': stats.get('threePointersAttempted', 0),
+                    'tpp': (stats.get('threePointersPercentage') or 0) * 100,
+                    'ftm': stats.get('freeThrowsMade', 0),
+                    'fta': stats.get('freeThrowsAttempted', 0),
+                    'ftp': (stats.get('freeThrowsPercentage') or 0) * 100,
+                    'oreb': stats.get('reboundsOffensive', 0),
+                    'dreb': stats.get('reboundsDefensive', 0),
+                    'reb': stats.get('reboundsTotal', 0),
+                    'ast': stats.get('assists', 0),
+                    'stl': stats.get('steals', 0),
+                    'blk': stats.get('blocks', 0),
+                    'tov': stats.get('turnovers', 0),
+                    'pf': stats.get('foulsPersonal', 0),
+                    'plusMinus': stats.get('plusMinusPoints', 0),
+                })
+        return rows
+    def store_player_box_scores(self, rows):
+        if not rows:
+            return 0
+        from fantasyScoring import fantasy_fields
+        fantasy_scores, fantasy_points = fantasy_fields(rows)
+        for row, scores, points in zip(rows, fantasy_scores, fantasy_points):
+            row['fantasyScores'], row['fantasyPoints'] = scores, points
+            row['statHash'] = content_hash({key: value for key, value in row.items() if key != 'scrapedAt'})
+        collection = self.db.player_box_scores
+        stored_hashes = {
+            (doc.get('playerName'), doc.get('gameDate')): doc.get('statHash')
+            for doc in collection.find(
+                {'gameId': {'$in': list({row['gameId'] for row in rows})}},
+                {'playerName': 1, 'gameDate': 1, 'statHash': 1}
+            )
+        }
+        operations = [
+            UpdateOne({'playerName': row['playerName'], 'gameDate': row['gameDate']}, {'$set': row}, upsert=True)
+            for row in rows if stored_hashes.get((row['playerName'], row['gameDate'])) != row['statHash']
+        ]
+        if operations:
+            with scraperMetrics.stage('write.box_scores'):
+                collection.bulk_write(operations, ordered=False)
+        scraperMetrics.count('boxScoreRows', len(rows))
+        logger.info(f"NBA player box scores written: {len(operations)}, unchanged and skipped: {len(rows) - len(operations)}")
+        return len(operations)
     def get_game_status_text(self, status_id):
         return ''
+    def cleanup(self):
+        self.http_cache.close()
+        if self.client:
+            self.client.close()
 
 def main():
     logger.info("Starting NBA live games update")
@@ -143,4 +326,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import profiling
+    profiling.run('liveGames', main)
\ No newline at end of file
@@ -3,12 +3,23 @@ import os
 import time
 import json
 import logging
-import requests
+import asyncio
 import concurrent.futures
-from datetime import datetime
-from pymongo import MongoClient
+from collections import defaultdict
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from httpClient import HttpClient
+from pymongo import MongoClient, UpdateOne, ReplaceOne, DeleteMany, IndexModel, ASCENDING
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
 from pytz import timezone
+from httpCache import HttpCache, NOT_MODIFIED
+from feedStore import FeedStore
+from docFingerprint import content_hash, changed_fields
+from pitchColumns import CHUNK_AT_BATS, encode_pitch_chunk
+from upstreams import STATSAPI_BASE
+from streamJson import STREAM_JSON, WILDCARD, build_path_tree, prune_value
+import scraperMetrics
 
 logging.basicConfig(
     level=logging.INFO,
@@ -17,153 +28,643 @@ logging.basicConfig(
 logger = logging.getLogger('MLB-LiveGames')
 load_dotenv()
 
+LIVE_POLL_SECONDS = int(os.getenv('MLB_LIVE_POLL_SECONDS', '10'))
+IDLE_POLL_SECONDS = int(os.getenv('MLB_IDLE_POLL_SECONDS', '300'))
+SCHEDULE_REFRESH_SECONDS = int(os.getenv('MLB_SCHEDULE_REFRESH_SECONDS', '300'))
+LIVE_CONCURRENCY = int(os.getenv('MLB_LIVE_CONCURRENCY', '8'))
+PER_HOST_LIMIT = int(os.getenv('MLB_LIVE_PER_HOST_LIMIT', '6'))
+FETCH_TIMEOUT_SECONDS = float(os.getenv('MLB_LIVE_FETCH_TIMEOUT', '10'))
+RETENTION_DAYS = int(os.getenv('MLB_LIVE_RETENTION_DAYS', '1'))
+# Oldest shared-store feed (see feedStore.py) served without revalidating upstream
+FEED_MAX_AGE_SECONDS = float(os.getenv('MLB_LIVE_FEED_MAX_AGE', '0'))
+# How often a feed kept current from diffPatch updates is written back to the shared store
+FEED_STORE_WRITE_SECONDS = float(os.getenv('MLB_FEED_STORE_WRITE_SECONDS', '60'))
+# Pitches always go to the columnar live_mlb_pitch_chunks store; the nested copy is kept for the LiveGames page
+NESTED_PITCHES = os.getenv('MLB_NESTED_PITCHES', '1') != '0'
+
+# The parts of the GUMBO feed read by build_game_info; everything else is skipped while parsing
+LIVE_FEED_PATHS = [
+    ("metaData", "timeStamp"),
+    ("gameData", "status"),
+    ("gameData", "teams"),
+    ("gameData", "datetime"),
+    ("gameData", "players", WILDCARD, "strikeZoneTop"),
+    ("gameData", "players", WILDCARD, "strikeZoneBottom"),
+    ("liveData", "linescore"),
+    ("liveData", "plays", "allPlays"),
+    ("liveData", "boxscore", "teams", WILDCARD, "players"),
+]
+LIVE_FEED_TREE = build_path_tree(LIVE_FEED_PATHS)
+
 def get_mongodb_connection():
     mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/sports_trading')
     client = MongoClient(mongo_uri)
     return client
 
+def pointer_tokens(path):
+    if not path:
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in path.split('/')[1:]]
+
+def resolve_pointer(doc, tokens):
+    for token in tokens:
+        doc = doc[int(token)] if isinstance(doc, list) else doc[token]
+    return doc
+
+PATCH_OPS = frozenset({"add", "remove", "replace", "move", "copy", "test"})
+
+def apply_json_patch(doc, operations):
+    # RFC 6902 operations as returned by the GUMBO diffPatch endpoint
+    for operation in operations:
+        op = operation["op"]
+        if op not in PATCH_OPS:
+            # Raising makes the caller drop the game's feed state and refetch the full feed
+            raise ValueError(f"Unsupported JSON patch op {op!r}")
+        tokens = pointer_tokens(operation["path"])
+        if op == "test":
+            continue
+        if op in ("move", "copy"):
+            from_tokens = pointer_tokens(operation["from"])
+            value = resolve_pointer(doc, from_tokens)
+            if op == "move":
+                parent = resolve_pointer(doc, from_tokens[:-1])
+                if isinstance(parent, list):
+                    parent.pop(int(from_tokens[-1]))
+                else:
+                    del parent[from_tokens[-1]]
+            else:
+                value = json.loads(json.dumps(value))
+            op = "add"
+        else:
+            value = operation.get("value")
+        if not tokens:
+            if op == "remove":
+                raise ValueError("Cannot remove the document root")
+            doc = value
+            continue
+        parent = resolve_pointer(doc, tokens[:-1])
+        key = tokens[-1]
+        if isinstance(parent, list):
+            if op == "add":
+                if key == "-":
+                    parent.append(value)
+                else:
+                    parent.insert(int(key), value)
+            elif op == "replace":
+                parent[int(key)] = value
+            elif op == "remove":
+                parent.pop(int(key))
+        else:
+            if op in ("add", "replace"):
+                parent[key] = value
+            elif op == "remove":
+                del parent[key]
+    return doc
+
+def retained_node(tree, tokens):
+    # The path tree node a pointer lands on: True inside a kept sub-tree, a dict on an ancestor, None if dropped
+    node = tree
+    for token in tokens:
+        if node is True:
+            break
+        node = node.get(token, node.get(WILDCARD))
+        if node is None:
+            break
+    return node
+
+def retained_operations(operations, tree):
+    # Restricts a patch to a feed parsed with extract_json_paths(..., paths of tree)
+    kept = []
+    for operation in operations:
+        node = retained_node(tree, pointer_tokens(operation["path"]))
+        if node is None or operation["op"] == "test":
+            continue
+        if operation["op"] in ("move", "copy"):
+            if node is not True or retained_node(tree, pointer_tokens(operation["from"])) is not True:
+                raise ValueError(f"Cannot apply {operation['op']} across skipped feed paths")
+        elif node is not True and "value" in operation:
+            operation = {**operation, "value": prune_value(operation["value"], node)}
+        kept.append(operation)
+    return kept
+
+def changed_play_indices(operations, stored_count):
+    # Returns the allPlays indices touched by a patch, or None if every at-bat must be rebuilt.
+    # Appended plays are not listed; callers push everything past the stored count.
+    indices = set()
+    for operation in operations:
+        paths = [operation["path"]] + ([operation["from"]] if "from" in operation else [])
+        for path in paths:
+            tokens = pointer_tokens(path)
+            if not tokens:
+                return None
+            if tokens[:3] == ["liveData", "plays", "allPlays"]:
+                if len(tokens) == 3:
+                    return None
+                if tokens[3] == "-":
+                    continue
+                index = int(tokens[3])
+                if len(tokens) == 4 and operation["op"] != "replace":
+                    if operation["op"] == "add" and index >= stored_count:
+                        continue
+                    return None
+                indices.add(index)
+            elif tokens[:2] == ["gameData", "players"] and any("strikeZone" in token for token in tokens[2:]):
+                return None
+    return indices
+
 class MLBLiveGamesAPI:
-    def __init__(self):
-        self.SCOREBOARD_URL = "https://statsapi.mlb.com/api/v1/schedule?sportId=1&date={date}"
-        self.GAME_URL = "https://statsapi.mlb.com/api/v1.1/game/{gamePk}/feed/live"
+    def __init__(self, incremental=False, concurrency=LIVE_CONCURRENCY, per_host_limit=PER_HOST_LIMIT, fetch_timeout=FETCH_TIMEOUT_SECONDS):
+        self.SCOREBOARD_URL = STATSAPI_BASE + "/api/v1/schedule?sportId=1&date={date}"
+        self.GAME_URL = STATSAPI_BASE + "/api/v1.1/game/{gamePk}/feed/live"
+        self.DIFF_PATCH_URL = STATSAPI_BASE + "/api/v1.1/game/{gamePk}/feed/live/diffPatch?startTimecode={timecode}"
         self.client = get_mongodb_connection()
         self.db = self.client.get_database()
         self.live_games_collection = self.db.live_mlb_games
+        self.pitch_chunks_collection = self.db.live_mlb_pitch_chunks
+        self.ensure_indexes()
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.fetch_timeout = fetch_timeout
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        # Blocks instead of opening extra sockets once per_host_limit connections to a host are busy
+        self.session = HttpClient(pool_maxsize=per_host_limit, pool_block=True)
+        self.http_cache = HttpCache('mlb-live', session=self.session)
+        self.feed_store = FeedStore(session=self.session)
+        self.next_poll = {}
+        self.finished_games = set()
+        self.game_status = {}
+        self.incremental = incremental
+        # gamePk -> {"feed", "timeStamp", "playCount"} for games ingested incrementally
+        self.feed_state = {}
+        # gamePk -> per-field content hashes of the stored document
+        self.field_hashes = {}
+        # gamePk -> content hash of every extracted at-bat, used to find pitch chunks to rewrite
+        self.at_bat_hashes = {}
 
     def fetch_scoreboard(self, date_str):
         url = self.SCOREBOARD_URL.format(date=date_str)
-        response = requests.get(url)
-        return response.json()
+        return self.http_cache.get_json(url, timeout=15)
 
-    def fetch_game_data(self, game_pk):
+    def fetch_game_data(self, game_pk, conditional=False):
         url = self.GAME_URL.format(gamePk=game_pk)
-        response = requests.get(url)
+        return self.feed_store.get(
+            game_pk, url, 'mlb-live', max_age=FEED_MAX_AGE_SECONDS, conditional=conditional,
+            paths=LIVE_FEED_PATHS if STREAM_JSON else None, timeout=self.fetch_timeout
+        )
+
+    def store_feed(self, game_pk, game_data):
+        # Shares a diffPatch-maintained feed with mlbBoxScores through the feed store
+        try:
+            self.feed_store.put(game_pk, game_data, LIVE_FEED_PATHS if STREAM_JSON else None)
+        except Exception as e:
+            logger.warning(f"Could not write MLB game {game_pk} to the feed store: {e}")
+
+    def fetch_game_diff(self, game_pk, timecode):
+        url = self.DIFF_PATCH_URL.format(gamePk=game_pk, timecode=timecode)
+        response = self.session.get(url, timeout=self.fetch_timeout)
         return response.json()
 
-    def process_live_games(self):
+    def build_game_info(self, game_pk, game_data):
+        game_info = self.build_game_summary(game_pk, game_data)
+        game_info["playByPlay"] = self.extract_play_by_play(game_data)
+        return game_info
+
+    def build_game_summary(self, game_pk, game_data):
+        return {
+            "gameId": game_pk,
+            "gameDate": game_data["gameData"].get("datetime", {}).get("officialDate"),
+            "status": game_data["gameData"]["status"]["detailedState"],
+            "homeTeam": {
+                "name": game_data["gameData"]["teams"]["home"]["name"],
+                "abbreviation": game_data["gameData"]["teams"]["home"]["abbreviation"],
+                "score": game_data["liveData"]["linescore"]["teams"]["home"].get("runs", 0),
+                "players": self.extract_players(game_data, "home")
+            },
+            "awayTeam": {
+                "name": game_data["gameData"]["teams"]["away"]["name"],
+                "abbreviation": game_data["gameData"]["teams"]["away"]["abbreviation"],
+                "score": game_data["liveData"]["linescore"]["teams"]["away"].get("runs", 0),
+                "players": self.extract_players(game_data, "away")
+            },
+            "inning": game_data["liveData"]["linescore"].get("currentInning", 0),
+            "inningHalf": game_data["liveData"]["linescore"].get("inningHalf", ""),
+            "lastUpdated": datetime.now(),
+        }
+
+    def fetch_game_update(self, game_pk):
+        # Network stage: a diffPatch operation list for games tracked incrementally, otherwise the full feed
+        with scraperMetrics.stage('fetch', game=game_pk):
+            state = self.feed_state.get(game_pk) if self.incremental else None
+            if state:
+                try:
+                    diff = self.fetch_game_diff(game_pk, state["timeStamp"])
+                    if isinstance(diff, list):
+                        return diff
+                    logger.info(f"diffPatch returned a full feed for MLB game {game_pk}")
+                    self.feed_state.pop(game_pk, None)
+                    if diff:
+                        if STREAM_JSON:
+                            diff = prune_value(diff, LIVE_FEED_TREE)
+                        self.store_feed(game_pk, diff)
+                    return diff
+                except Exception as e:
+                    logger.warning(f"Incremental update failed for MLB game {game_pk}, refetching full feed: {e}")
+                    self.feed_state.pop(game_pk, None)
+                    return self.fetch_game_data(game_pk)
+            return self.fetch_game_data(game_pk, conditional=not self.incremental)
+
+    def prepare_game_writes(self, game_pk, game_data):
+        # Parse stage: returns the game status and the Mongo writes for this game
+        with scraperMetrics.stage('parse', game=game_pk):
+            if game_data is NOT_MODIFIED:
+                # Feed unchanged since the last poll: nothing to parse or write
+                return self.game_status.get(game_pk, {}), []
+            if isinstance(game_data, list):
+                try:
+                    return self.prepare_game_diff(game_pk, self.feed_state[game_pk], game_data)
+                except Exception as e:
+                    logger.warning(f"Could not apply diff for MLB game {game_pk}, will refetch full feed: {e}")
+                    self.feed_state.pop(game_pk, None)
+                    return None, []
+            if not game_data:
+                return None, []
+            game_info = self.build_game_info(game_pk, game_data)
+            at_bat_hashes = [content_hash(at_bat) for at_bat in game_info["playByPlay"]]
+            changed, hashes = changed_fields(
+                {**game_info, "playByPlay": at_bat_hashes}, self.field_hashes.get(game_pk)
+            )
+            writes = self.pitch_chunk_writes(
+                game_pk, game_info["gameDate"], dict(enumerate(game_info["playByPlay"])), at_bat_hashes
+            )
+            if changed:
+                update = {key: game_info[key] for key in changed}
+                if "playByPlay" in update:
+                    update["playByPlay"] = [self.nested_at_bat(at_bat) for at_bat in update["playByPlay"]]
+                update.update({"lastUpdated": game_info["lastUpdated"], "fieldHashes": hashes})
+                writes.append((self.live_games_collection, UpdateOne({"gameId": game_pk}, {"$set": update}, upsert=True)))
+            self.field_hashes[game_pk] = hashes
+            self.at_bat_hashes[game_pk] = at_bat_hashes
+            timestamp = game_data.get("metaData", {}).get("timeStamp")
+            if self.incremental and timestamp:
+                self.feed_state[game_pk] = {
+                    "feed": game_data,
+                    "timeStamp": timestamp,
+                    "playCount": len(game_info["playByPlay"]),
+                    "storedAt": time.monotonic(),
+                }
+            self.game_status[game_pk] = game_data["gameData"]["status"]
+            return self.game_status[game_pk], writes
+
+    def prepare_game_diff(self, game_pk, state, diff):
+        operations = []
+        for entry in diff:
+            operations.extend(entry.get("diff", []) if isinstance(entry, dict) else entry)
+        if STREAM_JSON:
+            operations = retained_operations(operations, LIVE_FEED_TREE)
+        if not operations:
+            return state["feed"]["gameData"]["status"], []
+        game_data = apply_json_patch(state["feed"], operations)
+        state["feed"] = game_data
+        state["timeStamp"] = game_data.get("metaData", {}).get("timeStamp", state["timeStamp"])
+        all_plays = game_data.get("liveData", {}).get("plays", {}).get("allPlays", [])
+        player_lookup = game_data.get("gameData", {}).get("players", {})
+        stored_count = state["playCount"]
+        changed = changed_play_indices(operations, stored_count)
+        if changed is None or len(all_plays) < stored_count:
+            stored_count = 0
+            changed = set()
+        at_bat_hashes = self.at_bat_hashes[game_pk][:stored_count]
+        extracted = {}
+        set_fields = {}
+        for index in sorted(changed):
+            if index < stored_count:
+                at_bat = self.extract_at_bat(all_plays[index], player_lookup)
+                at_bat_hash = content_hash(at_bat)
+                if at_bat_hash != at_bat_hashes[index]:
+                    extracted[index] = at_bat
+                    at_bat_hashes[index] = at_bat_hash
+        for index in range(stored_count, len(all_plays)):
+            extracted[index] = self.extract_at_bat(all_plays[index], player_lookup)
+            at_bat_hashes.append(content_hash(extracted[index]))
+        summary = self.build_game_summary(game_pk, game_data)
+        changed_summary, hashes = changed_fields(
+            {**summary, "playByPlay": at_bat_hashes}, self.field_hashes.get(game_pk)
+        )
+        writes = self.pitch_chunk_writes(game_pk, summary["gameDate"], dict(extracted), at_bat_hashes, all_plays, player_lookup)
+        new_at_bats = [self.nested_at_bat(extracted[index]) for index in range(stored_count, len(all_plays))]
+        if stored_count == 0:
+            if "playByPlay" in changed_summary:
+                set_fields["playByPlay"] = new_at_bats
+            new_at_bats = []
+        else:
+            for index in range(stored_count):
+                if index in extracted:
+                    set_fields[f"playByPlay.{index}"] = self.nested_at_bat(extracted[index])
+        set_fields.update({key: summary[key] for key in changed_summary if key != "playByPlay"})
+        if set_fields or new_at_bats:
+            set_fields.update({"lastUpdated": summary["lastUpdated"], "fieldHashes": hashes})
+            writes.append((self.live_games_collection, UpdateOne({"gameId": game_pk}, {"$set": set_fields}, upsert=True)))
+            if new_at_bats:
+                writes.append((self.live_games_collection, UpdateOne(
+                    {"gameId": game_pk}, {"$push": {"playByPlay": {"$each": new_at_bats}}}
+                )))
+        self.field_hashes[game_pk] = hashes
+        self.at_bat_hashes[game_pk] = at_bat_hashes
+        state["playCount"] = len(all_plays)
+        self.game_status[game_pk] = game_data["gameData"]["status"]
+        if (self.game_status[game_pk].get("abstractGameState") == "Final"
+                or time.monotonic() - state["storedAt"] >= FEED_STORE_WRITE_SECONDS):
+            self.store_feed(game_pk, game_data)
+            state["storedAt"] = time.monotonic()
+        return self.game_status[game_pk], writes
+
+    def nested_at_bat(self, at_bat):
+        if NESTED_PITCHES:
+            return at_bat
+        return {**at_bat, "pitches": [], "pitchCount": len(at_bat["pitches"])}
+
+    def pitch_chunk_writes(self, game_pk, game_date, extracted, at_bat_hashes, all_plays=None, player_lookup=None):
+        # Rewrites only the chunks holding at-bats whose hash changed; at-bats missing from extracted are rebuilt from all_plays
+        previous = self.at_bat_hashes.get(game_pk, [])
+        chunks = sorted({
+            index // CHUNK_AT_BATS for index, at_bat_hash in enumerate(at_bat_hashes)
+            if index >= len(previous) or previous[index] != at_bat_hash
+        })
+        writes = []
+        for chunk in chunks:
+            start = chunk * CHUNK_AT_BATS
+            end = min(start + CHUNK_AT_BATS, len(at_bat_hashes))
+            at_bats = []
+            for index in range(start, end):
+                if index not in extracted:
+                    extracted[index] = self.extract_at_bat(all_plays[index], player_lookup)
+                at_bats.append(extracted[index])
+            writes.append((self.pitch_chunks_collection, ReplaceOne(
+                {"gameId": game_pk, "chunk": chunk},
+                encode_pitch_chunk(game_pk, chunk, at_bats, start, game_date),
+                upsert=True
+            )))
+        if len(at_bat_hashes) < len(previous):
+            chunk_count = -(-len(at_bat_hashes) // CHUNK_AT_BATS)
+            writes.append((self.pitch_chunks_collection, DeleteMany({"gameId": game_pk, "chunk": {"$gte": chunk_count}})))
+        return writes
+
+    def forget_game(self, game_pk):
+        # The stored document no longer matches the cached feed or hashes, so start over from a full fetch
+        self.feed_state.pop(game_pk, None)
+        self.field_hashes.pop(game_pk, None)
+        self.at_bat_hashes.pop(game_pk, None)
+        self.feed_store.forget_seen('mlb-live', game_pk)
+
+    def write_games(self, game_writes):
+        # One unordered bulk_write per collection for the whole cycle; a game's writes touch disjoint
+        # playByPlay slots and pitch chunks, so order is irrelevant
+        batches = {}
+        for game_pk, game_ops in game_writes.items():
+            for collection, operation in game_ops:
+                batch = batches.setdefault(collection.name, (collection, [], []))
+                batch[1].append(operation)
+                batch[2].append(game_pk)
+        failed = set()
+        for collection, operations, owners in batches.values():
+            try:
+                with scraperMetrics.stage(f"write.{collection.name}"):
+                    collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                failed.update(owners[error["index"]] for error in e.details.get("writeErrors", []))
+            except Exception as e:
+                logger.error(f"Error writing to {collection.name}: {e}")
+                failed.update(owners)
+        for game_pk in failed:
+            logger.error(f"Error writing MLB game {game_pk}")
+            self.forget_game(game_pk)
+        return list(failed)
+
+    def load_field_hashes(self, game_pks):
+        missing = [game_pk for game_pk in game_pks if game_pk not in self.field_hashes]
+        if not missing:
+            return
+        for doc in self.live_games_collection.find({"gameId": {"$in": missing}}, {"gameId": 1, "fieldHashes": 1}):
+            self.field_hashes[doc["gameId"]] = doc.get("fieldHashes", {})
+
+    def process_game(self, game_pk):
+        self.load_field_hashes([game_pk])
+        status, writes = self.prepare_game_writes(game_pk, self.fetch_game_update(game_pk))
+        if self.write_games({game_pk: writes}):
+            return None
+        return status
+
+    async def run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def process_game_async(self, game_pk, game_slots, host_slots, fetches):
+        async with game_slots:
+            # A fetch thread cannot be cancelled, so the host slot is held until it really finishes; giving
+            # it back at the deadline would let more than per_host_limit requests run against the host
+            host_slot = host_slots[urlparse(self.GAME_URL).hostname]
+            await host_slot.acquire()
+            fetch = asyncio.get_running_loop().run_in_executor(self.executor, self.fetch_game_update, game_pk)
+            fetch.add_done_callback(lambda _: host_slot.release())
+            fetches.append(fetch)
+            done, _ = await asyncio.wait({fetch}, timeout=self.fetch_timeout)
+            if not done:
+                raise asyncio.TimeoutError()
+            game_data = fetch.result()
+            return await self.run_blocking(self.prepare_game_writes, game_pk, game_data)
+
+    async def process_games_async(self, game_pks):
+        try:
+            await self.run_blocking(self.load_field_hashes, game_pks)
+        except Exception as e:
+            logger.warning(f"Could not load stored MLB game hashes, writing full documents: {e}")
+        game_slots = asyncio.Semaphore(self.concurrency)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        fetches = []
+        tasks = {
+            game_pk: asyncio.create_task(self.process_game_async(game_pk, game_slots, host_slots, fetches))
+            for game_pk in game_pks
+        }
+        results = {}
+        game_writes = {}
+        for game_pk, task in tasks.items():
+            try:
+                results[game_pk], writes = await task
+                if writes:
+                    game_writes[game_pk] = writes
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out fetching MLB game {game_pk} after {self.fetch_timeout}s")
+                results[game_pk] = None
+            except Exception as e:
+                logger.error(f"Error processing MLB game {game_pk}: {e}")
+                results[game_pk] = None
+        failed = await self.run_blocking(self.write_games, game_writes)
+        # Timed-out fetches may still be running; the next poll starts only once they are done
+        await asyncio.gather(*fetches, return_exceptions=True)
+        for game_pk in failed:
+            results[game_pk] = None
+        skipped = sum(1 for game_pk, status in results.items() if status and game_pk not in game_writes)
+        logger.info(f"MLB live games written: {len(game_writes) - len(failed)}, unchanged and skipped: {skipped}")
+        return results
+
+    def process_games(self, game_pks):
+        # One metrics cycle per poll, over budget when it runs past the live poll interval
+        with scraperMetrics.cycle('mlbLiveGames', budget_seconds=LIVE_POLL_SECONDS, incremental=self.incremental):
+            scraperMetrics.count('games', len(game_pks))
+            return asyncio.run(self.process_games_async(game_pks))
+
+    def fetch_todays_games(self):
         # Use Pacific Time for today's date
         pacific = timezone('US/Pacific')
         today = datetime.now(pacific).strftime("%Y-%m-%d")
         scoreboard = self.fetch_scoreboard(today)
         if not scoreboard or "dates" not in scoreboard or not scoreboard["dates"]:
-            return
+            return []
         games = scoreboard["dates"][0].get("games", [])
-        active_game_ids = []
-        def process_single_game(game):
-            game_pk = game["gamePk"]
-            game_data = self.fetch_game_data(game_pk)
-            if not game_data:
-                return None
-            play_data = self.extract_play_by_play(game_data)
-            game_info = {
-                "gameId": game_pk,
-                "status": game_data["gameData"]["status"]["detailedState"],
-                "homeTeam": {
-                    "name": game_data["gameData"]["teams"]["home"]["name"],
-                    "abbreviation": game_data["gameData"]["teams"]["home"]["abbreviation"],
-                    "score": game_data["liveData"]["linescore"]["teams"]["home"].get("runs", 0),
-                    "players": self.extract_players(game_data, "home")
-                },
-                "awayTeam": {
-                    "name": game_data["gameData"]["teams"]["away"]["name"],
-                    "abbreviation": game_data["gameData"]["teams"]["away"]["abbreviation"],
-                    "score": game_data["liveData"]["linescore"]["teams"]["away"].get("runs", 0),
-                    "players": self.extract_players(game_data, "away")
-                },
-                "inning": game_data["liveData"]["linescore"].get("currentInning", 0),
-                "inningHalf": game_data["liveData"]["linescore"].get("inningHalf", ""),
-                "lastUpdated": datetime.now(),
-                "playByPlay": play_data,
-            }
-            self.live_games_collection.update_one(
-                {"gameId": game_pk},
-                {"$set": game_info},
-                upsert=True
-            )
-            return game_pk
-        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
-            futures = [executor.submit(process_single_game, game) for game in games]
-            for future in concurrent.futures.as_completed(futures):
-                game_pk = future.result()
-                if game_pk:
-                    active_game_ids.append(game_pk)
+        for game in games:
+            # Seeds the status used when a game's feed answers 304 before we have parsed it
+            self.game_status.setdefault(game["gamePk"], game.get("status", {}))
+        return games
+
+    def process_live_games(self):
+        games = self.fetch_todays_games()
+        if not games:
+            return
+        results = self.process_games([game["gamePk"] for game in games])
+        active_game_ids = [game_pk for game_pk, status in results.items() if status]
         print(f"Processed {len(active_game_ids)} MLB live games.")
-        self.cleanup_old_games(active_game_ids)
+        self.cleanup_old_games()
+
+    def next_poll_delay(self, status):
+        abstract_state = status.get("abstractGameState", "")
+        detailed_state = status.get("detailedState", "")
+        if abstract_state == "Final":
+            return None
+        if abstract_state == "Live" and not detailed_state.startswith("Delayed"):
+            return LIVE_POLL_SECONDS
+        return IDLE_POLL_SECONDS
+
+    def refresh_schedule(self):
+        games = self.fetch_todays_games()
+        todays_game_ids = [game["gamePk"] for game in games]
+        now = time.monotonic()
+        for game_pk in todays_game_ids:
+            if game_pk not in self.finished_games and game_pk not in self.next_poll:
+                self.next_poll[game_pk] = now
+        for game_pk in list(self.next_poll):
+            if game_pk not in todays_game_ids:
+                del self.next_poll[game_pk]
+        self.finished_games.intersection_update(todays_game_ids)
+        self.cleanup_old_games()
+
+    def run_daemon(self):
+        logger.info(
+            f"Starting MLB live games daemon (live every {LIVE_POLL_SECONDS}s, "
+            f"idle every {IDLE_POLL_SECONDS}s)"
+        )
+        next_schedule_refresh = 0
+        while True:
+            now = time.monotonic()
+            if now >= next_schedule_refresh:
+                try:
+                    self.refresh_schedule()
+                except Exception as e:
+                    logger.error(f"Error refreshing MLB schedule: {e}")
+                next_schedule_refresh = now + SCHEDULE_REFRESH_SECONDS
+                now = time.monotonic()
+            due_games = [game_pk for game_pk, due in self.next_poll.items() if due <= now]
+            if due_games:
+                cycle_start = time.time()
+                results = self.process_games(due_games)
+                now = time.monotonic()
+                for game_pk, status in results.items():
+                    if status is None:
+                        self.next_poll[game_pk] = now + LIVE_POLL_SECONDS
+                        continue
+                    delay = self.next_poll_delay(status)
+                    if delay is None:
+                        self.next_poll.pop(game_pk, None)
+                        self.finished_games.add(game_pk)
+                        logger.info(f"MLB game {game_pk} is final, no longer polling")
+                    else:
+                        self.next_poll[game_pk] = now + delay
+                logger.info(f"Polled {len(due_games)} MLB games in {time.time() - cycle_start:.2f} seconds")
+            wake_at = min([next_schedule_refresh, *self.next_poll.values()])
+            time.sleep(max(0.5, wake_at - time.monotonic()))
 
     def extract_play_by_play(self, game_data):
         plays = game_data.get("liveData", {}).get("plays", {})
         all_plays = plays.get("allPlays", [])
         if not all_plays:
             return []
-        at_bats = []
         player_lookup = game_data.get("gameData", {}).get("players", {})
-        for play in all_plays:
-            batter_obj = play.get("matchup", {}).get("batter", {})
-            batter_id = batter_obj.get("id")
-            strike_zone_top = None
-            strike_zone_bottom = None
-            if batter_id:
-                player_key = f"ID{batter_id}"
-                player_data = player_lookup.get(player_key, {})
-                strike_zone_top = player_data.get("strikeZoneTop")
-                strike_zone_bottom = player_data.get("strikeZoneBottom")
-            at_bat = {
-                "batter": batter_obj.get("fullName", ""),
-                "batterId": batter_id,
-                "strikeZoneTop": strike_zone_top,
-                "strikeZoneBottom": strike_zone_bottom,
-                "pitcher": play.get("matchup", {}).get("pitcher", {}).get("fullName", ""),
-                "count": play.get("count", {}),
-                "result": play.get("result", {}).get("event", ""),
-                "description": play.get("result", {}).get("description", ""),
-                "pitches": []
-            }
-            play_events = play.get("playEvents", [])
-            for event in play_events:
-                if not event.get("isPitch", False):
-                    continue
-                details = event.get("details", {})
-                pitch_data = event.get("pitchData", {})
-                coordinates = pitch_data.get("coordinates", {})
-                breaks = pitch_data.get("breaks", {})
-                px = coordinates.get("pX")
-                pz = coordinates.get("pZ")
-                at_bat["pitches"].append({
-                    "pitchType": details.get("type", {}).get("description", ""),
-                    "pitchTypeCode": details.get("type", {}).get("code", ""),
-                    "pitchSpeed": pitch_data.get("startSpeed", None),
-                    "endSpeed": pitch_data.get("endSpeed", None),
-                    "spinRate": breaks.get("spinRate", None),
-                    "spinAxis": breaks.get("spinAxis", None),
-                    "releaseSpinRate": pitch_data.get("releaseSpinRate", None),
-                    "releaseSpinAxis": pitch_data.get("releaseSpinAxis", None),
-                    "breakAngle": breaks.get("breakAngle", None),
-                    "breakLength": breaks.get("breakLength", None),
-                    "breakY": breaks.get("breakY", None),
-                    "extension": pitch_data.get("extension", None),
-                    "releaseExtension": pitch_data.get("releaseSpinAxis", None),
-                    "releasePosX": pitch_data.get("releasePosX", None),
-                    "releasePosY": pitch_data.get("releasePosY", None),
-                    "releasePosZ": pitch_data.get("releasePosZ", None),
-                    "pX": coordinates.get("pX", None),
-                    "pZ": coordinates.get("pZ", None),
-                    "plateX": coordinates.get("plateX", None),
-                    "plateZ": coordinates.get("plateZ", None),
-                    "vx0": pitch_data.get("vx0", None),
-                    "vy0": pitch_data.get("vy0", None),
-                    "vz0": pitch_data.get("vz0", None),
-                    "ax": pitch_data.get("ax", None),
-                    "ay": pitch_data.get("ay", None),
-                    "az": pitch_data.get("az", None),
-                    "pfxX": pitch_data.get("pfxX", None),
-                    "pfxZ": pitch_data.get("pfxZ", None),
-                    "plateTime": pitch_data.get("plateTime", None),
-                    "result": details.get("event", ""),
-                    "resultCode": details.get("code", ""),
-                    "description": details.get("description", ""),
-                })
-            at_bats.append(at_bat)
-        return at_bats
+        return [self.extract_at_bat(play, player_lookup) for play in all_plays]
+
+    def extract_at_bat(self, play, player_lookup):
+        batter_obj = play.get("matchup", {}).get("batter", {})
+        batter_id = batter_obj.get("id")
+        strike_zone_top = None
+        strike_zone_bottom = None
+        if batter_id:
+            player_key = f"ID{batter_id}"
+            player_data = player_lookup.get(player_key, {})
+            strike_zone_top = player_data.get("strikeZoneTop")
+            strike_zone_bottom = player_data.get("strikeZoneBottom")
+        at_bat = {
+            "batter": batter_obj.get("fullName", ""),
+            "batterId": batter_id,
+            "strikeZoneTop": strike_zone_top,
+            "strikeZoneBottom": strike_zone_bottom,
+            "pitcher": play.get("matchup", {}).get("pitcher", {}).get("fullName", ""),
+            "count": play.get("count", {}),
+            "result": play.get("result", {}).get("event", ""),
+            "description": play.get("result", {}).get("description", ""),
+            "pitches": []
+        }
+        play_events = play.get("playEvents", [])
+        for event in play_events:
+            if not event.get("isPitch", False):
+                continue
+            details = event.get("details", {})
+            pitch_data = event.get("pitchData", {})
+            coordinates = pitch_data.get("coordinates", {})
+            breaks = pitch_data.get("breaks", {})
+            px = coordinates.get("pX")
+            pz = coordinates.get("pZ")
+            at_bat["pitches"].append({
+                "pitchType": details.get("type", {}).get("description", ""),
+                "pitchTypeCode": details.get("type", {}).get("code", ""),
+                "pitchSpeed": pitch_data.get("startSpeed", None),
+                "endSpeed": pitch_data.get("endSpeed", None),
+                "spinRate": breaks.get("spinRate", None),
+                "spinAxis": breaks.get("spinAxis", None),
+                "releaseSpinRate": pitch_data.get("releaseSpinRate", None),
+                "releaseSpinAxis": pitch_data.get("releaseSpinAxis", None),
+                "breakAngle": breaks.get("breakAngle", None),
+                "breakLength": breaks.get("breakLength", None),
+                "breakY": breaks.get("breakY", None),
+                "extension": pitch_data.get("extension", None),
+                "releaseExtension": pitch_data.get("releaseSpinAxis", None),
+                "releasePosX": pitch_data.get("releasePosX", None),
+                "releasePosY": pitch_data.get("releasePosY", None),
+                "releasePosZ": pitch_data.get("releasePosZ", None),
+                "pX": coordinates.get("pX", None),
+                "pZ": coordinates.get("pZ", None),
+                "plateX": coordinates.get("plateX", None),
+                "plateZ": coordinates.get("plateZ", None),
+                "vx0": pitch_data.get("vx0", None),
+                "vy0": pitch_data.get("vy0", None),
+                "vz0": pitch_data.get("vz0", None),
+                "ax": pitch_data.get("ax", None),
+                "ay": pitch_data.get("ay", None),
+                "az": pitch_data.get("az", None),
+                "pfxX": pitch_data.get("pfxX", None),
+                "pfxZ": pitch_data.get("pfxZ", None),
+                "plateTime": pitch_data.get("plateTime", None),
+                "result": details.get("event", ""),
+                "resultCode": details.get("code", ""),
+                "description": details.get("description", ""),
+            })
+        return at_bat
 
     def extract_players(self, game_data, team_type):
         players = []
@@ -202,21 +703,59 @@ class MLBLiveGamesAPI:
             logger.error(f"Error extracting players for {team_type}: {e}")
         return players
 
-    def cleanup_old_games(self, active_game_ids):
+    def ensure_indexes(self):
+        try:
+            self.live_games_collection.create_indexes([
+                IndexModel([("gameId", ASCENDING)], unique=True),
+                IndexModel([("status", ASCENDING)]),
+                IndexModel([("gameDate", ASCENDING)]),
+            ])
+            self.pitch_chunks_collection.create_indexes([
+                IndexModel([("gameId", ASCENDING), ("chunk", ASCENDING)], unique=True),
+                IndexModel([("gameDate", ASCENDING)]),
+            ])
+        except Exception as e:
+            logger.error(f"Error creating MLB live game indexes: {e}")
+
+    def cleanup_old_games(self):
+        # Keeps yesterday's games around after the date flips; legacy documents without a gameDate are removed
+        cutoff = (datetime.now(timezone('US/Pacific')) - timedelta(days=RETENTION_DAYS)).strftime("%Y-%m-%d")
         try:
             result = self.live_games_collection.delete_many({
-                "gameId": {"$nin": active_game_ids}
+                "$or": [{"gameDate": {"$lt": cutoff}}, {"gameDate": None}]
             })
             if result.deleted_count > 0:
                 logger.info(f"Cleaned up {result.deleted_count} old MLB games from MongoDB")
+            self.pitch_chunks_collection.delete_many({"gameDate": {"$lt": cutoff}})
         except Exception as e:
             logger.error(f"Error cleaning up old MLB games: {e}")
 
     def cleanup(self):
+        self.executor.shutdown(wait=False)
+        self.http_cache.close()
+        self.feed_store.close()
+        self.session.close()
         if self.client:
             self.client.close()
 
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Update MLB live games')
+    parser.add_argument('--daemon', action='store_true', help='Keep running and poll each game on its own cadence')
+    parser.add_argument('--incremental', action='store_true', help='In daemon mode, pull only feed diffs after the first full fetch')
+    args = parser.parse_args()
+
+    if args.daemon:
+        api = MLBLiveGamesAPI(incremental=args.incremental)
+        try:
+            api.run_daemon()
+        except KeyboardInterrupt:
+            logger.info("MLB live games daemon stopped")
+        finally:
+            api.cleanup()
+        return
+
     logger.info("Starting MLB live games update")
     start_time = time.time()
     api = MLBLiveGamesAPI()
@@ -226,4 +765,5 @@ def main():
     logger.info(f"MLB live games update completed in {elapsed:.2f} seconds")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import profiling
+    profiling.run('mlbLiveGames', main)
\ No newline at end of file
@@ -1,31 +1,68 @@
 import requests
-import json
 from datetime import datetime, timedelta
-from pathlib import Path
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne, ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
 import os
 import sys
 from dotenv import load_dotenv
 import pytz
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from httpCache import HttpCache
+from feedStore import FeedStore
+from docFingerprint import content_hash
+from upstreams import STATSAPI_BASE
+from streamJson import STREAM_JSON, WILDCARD
+import scraperMetrics
+
+# Only the parts of the live feed that main() and extract_boxscores read
+BOXSCORE_PATHS = [
+    ("gameData", "status"),
+    ("liveData", "boxscore", "teams", WILDCARD, "players"),
+]
+
 load_dotenv()
 
+# Box score runs read the feed mlbLiveGames keeps in the shared store unless it is older than this
+FEED_MAX_AGE_SECONDS = float(os.getenv('MLB_BOXSCORE_FEED_MAX_AGE', '600'))
+DUPLICATE_KEY = 11000
+
+_http_cache = None
+_feed_store = None
+
+def get_http_cache():
+    global _http_cache
+    if _http_cache is None:
+        _http_cache = HttpCache('mlb-boxscores')
+    return _http_cache
+
+def get_feed_store():
+    global _feed_store
+    if _feed_store is None:
+        _feed_store = FeedStore()
+    return _feed_store
+
+def cached_get(url):
+    resp = get_http_cache().get(url)
+    if resp.status_code != 200:
+        raise requests.HTTPError(f"{resp.status_code} Error for url: {url}")
+    return resp
+
 def get_today_str():
     pacific = pytz.timezone('US/Pacific')
     now_pacific = datetime.now(pacific)
     return now_pacific.strftime("%Y-%m-%d")
 
 def fetch_mlb_schedule(date_str):
-    url = f"https://statsapi.mlb.com/api/v1/schedule?sportId=1&date={date_str}"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    return resp.json()
+    url = f"{STATSAPI_BASE}/api/v1/schedule?sportId=1&date={date_str}"
+    return cached_get(url).json()
 
 def fetch_boxscore(game_pk):
-    url = f"https://statsapi.mlb.com/api/v1.1/game/{game_pk}/feed/live"
-    resp = requests.get(url)
-    resp.raise_for_status()
-    return resp.json()
+    url = f"{STATSAPI_BASE}/api/v1.1/game/{game_pk}/feed/live"
+    return get_feed_store().get(
+        game_pk, url, 'mlb-boxscores', max_age=FEED_MAX_AGE_SECONDS,
+        paths=BOXSCORE_PATHS if STREAM_JSON else None
+    )
 
 def extract_boxscores(game_data):
     boxscores = {"home": [], "away": []}
@@ -66,14 +103,94 @@ def extract_boxscores(game_data):
                 })
     return boxscores
 
-def get_mongo_collection():
+def get_mongo_database():
     mongo_uri = os.getenv("MONGO_URI")
     if not mongo_uri:
         print("MONGO_URI not set in environment!")
         sys.exit(1)
     client = MongoClient(mongo_uri)
-    db = client.get_database()
-    return db.mlb_player_box_scores
+    return client.get_database()
+
+def get_mongo_collection():
+    return get_mongo_database().mlb_player_box_scores
+
+def ensure_player_index(collection):
+    # The bulk upserts below rely on (gamePk, playerName) being unique; older runs may have left duplicates
+    keys = [("gamePk", ASCENDING), ("playerName", ASCENDING)]
+    try:
+        collection.create_index(keys, unique=True)
+        return
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY:
+            raise
+        print(f"Could not create unique box score index, removing duplicates first: {e}")
+    # Newest document first in each group, so the most recently scraped line is the one kept
+    duplicates = collection.aggregate([
+        {"$sort": {"_id": -1}},
+        {"$group": {"_id": {"gamePk": "$gamePk", "playerName": "$playerName"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    extra_ids = [doc_id for group in duplicates for doc_id in group["ids"][1:]]
+    if extra_ids:
+        collection.delete_many({"_id": {"$in": extra_ids}})
+        print(f"Removed {len(extra_ids)} duplicate player box scores")
+    collection.create_index(keys, unique=True)
+
+def load_watermarks(watermarks, game_pks):
+    return {doc["gamePk"]: doc for doc in watermarks.find({"gamePk": {"$in": game_pks}})}
+
+def build_player_docs(game, game_data):
+    game_pk = game["gamePk"]
+    eastern_game_date = get_eastern_game_date(game.get("gameDate"))
+    home_team = game["teams"]["home"]["team"]["name"]
+    home_abbr = game["teams"]["home"]["team"].get("abbreviation")
+    away_team = game["teams"]["away"]["team"]["name"]
+    away_abbr = game["teams"]["away"]["team"].get("abbreviation")
+    game_status = game_data.get("gameData", {}).get("status", {}).get("abstractGameState", "")
+    player_docs = []
+    for side, players in extract_boxscores(game_data).items():
+        team = home_team if side == "home" else away_team
+        team_abbr = home_abbr if side == "home" else away_abbr
+        opponent = away_team if side == "home" else home_team
+        opponent_abbr = away_abbr if side == "home" else home_abbr
+        for player in players:
+            player_docs.append({
+                "gamePk": game_pk,
+                "gameDate": eastern_game_date,
+                "team": team,
+                "teamAbbr": team_abbr,
+                "opponent": opponent,
+                "opponentAbbr": opponent_abbr,
+                "side": side,
+                "playerName": player.get("name"),
+                "position": player.get("position", ""),
+                "type": player.get("type", ""),
+                "stats": player,
+                "gameStatus": game_status
+            })
+    return player_docs, game_status
+
+def write_player_docs(collection, game_docs):
+    # One unordered bulk upsert for every changed game; returns the gamePks whose writes failed
+    operations = []
+    owners = []
+    for game_pk, player_docs in game_docs.items():
+        for doc in player_docs:
+            operations.append(UpdateOne(
+                {"gamePk": doc["gamePk"], "playerName": doc["playerName"]},
+                {"$set": doc},
+                upsert=True
+            ))
+            owners.append(game_pk)
+    if not operations:
+        return set()
+    try:
+        collection.bulk_write(operations, ordered=False)
+        return set()
+    except BulkWriteError as e:
+        failed = {owners[error["index"]] for error in e.details.get("writeErrors", [])}
+        print(f"Box score writes failed for games {sorted(failed)}: {e.details.get('writeErrors', [])[:3]}")
+        return failed
 
 def get_eastern_game_date(game_date_str):
     dt_utc = datetime.strptime(game_date_str, "%Y-%m-%dT%H:%M:%SZ")
@@ -84,55 +201,63 @@ def get_eastern_game_date(game_date_str):
     return dt_eastern.strftime("%Y-%m-%d")
 
 def main():
+    with scraperMetrics.cycle('mlbBoxScores'):
+        update_box_scores()
+
+def update_box_scores():
     today = get_today_str()
-    schedule = fetch_mlb_schedule(today)
-    collection = get_mongo_collection()
-    player_docs = []
+    with scraperMetrics.stage('fetch.schedule'):
+        schedule = fetch_mlb_schedule(today)
+    db = get_mongo_database()
+    collection = db.mlb_player_box_scores
+    watermarks = db.mlb_box_score_watermarks
+    ensure_player_index(collection)
+    watermarks.create_index("gamePk", unique=True)
 
-    for date in schedule.get("dates", []):
-        for game in date.get("games", []):
-            game_pk = game["gamePk"]
-            game_date = game.get("gameDate")
-            eastern_game_date = get_eastern_game_date(game_date)
-            home_team = game["teams"]["home"]["team"]["name"]
-            home_abbr = game["teams"]["home"]["team"].get("abbreviation")
-            away_team = game["teams"]["away"]["team"]["name"]
-            away_abbr = game["teams"]["away"]["team"].get("abbreviation")
-            try:
+    games = [game for date in schedule.get("dates", []) for game in date.get("games", [])]
+    marks = load_watermarks(watermarks, [game["gamePk"] for game in games])
+    game_docs = {}
+    game_marks = {}
+    skipped = 0
+
+    for game in games:
+        game_pk = game["gamePk"]
+        mark = marks.get(game_pk, {})
+        if mark.get("final"):
+            skipped += 1
+            continue
+        try:
+            with scraperMetrics.stage('fetch.boxscore', game=game_pk):
                 game_data = fetch_boxscore(game_pk)
-                boxscores = extract_boxscores(game_data)
-                for side, players in boxscores.items():
-                    team = home_team if side == "home" else away_team
-                    team_abbr = home_abbr if side == "home" else away_abbr
-                    opponent = away_team if side == "home" else home_team
-                    opponent_abbr = away_abbr if side == "home" else home_abbr
-                    for player in players:
-                        doc = {
-                            "gamePk": game_pk,
-                            "gameDate": eastern_game_date,
-                            "team": team,
-                            "teamAbbr": team_abbr,
-                            "opponent": opponent,
-                            "opponentAbbr": opponent_abbr,
-                            "side": side,
-                            "playerName": player.get("name"),
-                            "position": player.get("position", ""),
-                            "type": player.get("type", ""),
-                            "stats": player,
-                            "gameStatus": game_data.get("gameData", {}).get("status", {}).get("abstractGameState", "")
-                        }
-                        player_docs.append(doc)
-                print(f"Processed {len(boxscores['home']) + len(boxscores['away'])} players for game {game_pk}")
-            except Exception as e:
-                print(f"Failed to fetch/store boxscore for game {game_pk}: {e}")
-
-    for doc in player_docs:
-        collection.update_one(
-            {"gamePk": doc["gamePk"], "playerName": doc["playerName"]},
-            {"$set": doc},
-            upsert=True
-        )
-    print(f"Stored {len(player_docs)} player box scores in MongoDB")
+            with scraperMetrics.stage('parse.boxscore', game=game_pk):
+                player_docs, game_status = build_player_docs(game, game_data)
+                docs_hash = content_hash(player_docs)
+            if docs_hash == mark.get("contentHash"):
+                print(f"Boxscore for game {game_pk} unchanged, skipping")
+                continue
+            game_marks[game_pk] = {"gamePk": game_pk, "final": game_status == "Final", "contentHash": docs_hash,
+                                   "gameStatus": game_status, "updatedAt": datetime.utcnow()}
+            game_docs[game_pk] = player_docs
+            print(f"Processed {len(player_docs)} players for game {game_pk}")
+        except Exception as e:
+            print(f"Failed to fetch/store boxscore for game {game_pk}: {e}")
+
+    with scraperMetrics.stage('write.box_scores'):
+        failed = write_player_docs(collection, game_docs)
+    # Watermarks only advance for games whose players were all written
+    mark_updates = [
+        UpdateOne({"gamePk": game_pk}, {"$set": mark}, upsert=True)
+        for game_pk, mark in game_marks.items() if game_pk not in failed
+    ]
+    if mark_updates:
+        with scraperMetrics.stage('write.watermarks'):
+            watermarks.bulk_write(mark_updates, ordered=False)
+    scraperMetrics.count('games', len(games))
+    scraperMetrics.count('skippedFinal', skipped)
+    stored = sum(len(docs) for game_pk, docs in game_docs.items() if game_pk not in failed)
+    print(f"Stored {stored} player box scores from {len(game_docs) - len(failed)} games in MongoDB, "
+          f"skipped {skipped} final games")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import profiling
+    profiling.run('mlbBoxScores', main)
\ No newline at end of file
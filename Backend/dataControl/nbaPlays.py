@@ -0,0 +1,91 @@
+import os
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Incremental NBA play-by-play storage shared by playersBoxScores (stats.nba.com PlayByPlayV2, EVENTNUM)
+# and liveGames (cdn.nba.com play-by-play, actionNumber).
+#   nba_game_plays       append-only, one document per play: {gameId, source, eventNum, ...formatted play}
+#   nba_play_watermarks  highest eventNum stored per (gameId, source), so only newer plays are parsed and written;
+#                        final=True once a finished game's last plays are stored, so it is not fetched again
+# The live_games document keeps a rolling "plays" list, newest first, updated with $push/$slice.
+
+PLAYS_COLLECTION = 'nba_game_plays'
+WATERMARKS_COLLECTION = 'nba_play_watermarks'
+RECENT_PLAYS = int(os.getenv('NBA_RECENT_PLAYS', '10'))
+DUPLICATE_KEY = 11000
+
+indexed_databases = set()
+
+def play_collections(db):
+    # (plays, watermarks), with their indexes created once per process
+    plays, watermarks = db[PLAYS_COLLECTION], db[WATERMARKS_COLLECTION]
+    if db.name not in indexed_databases:
+        plays.create_index([("gameId", 1), ("source", 1), ("eventNum", 1)], unique=True)
+        watermarks.create_index([("gameId", 1), ("source", 1)], unique=True)
+        indexed_databases.add(db.name)
+    return plays, watermarks
+
+def load_watermarks(db, source, game_ids):
+    """{gameId: last stored eventNum} for the given games; games never ingested are absent"""
+    _, watermarks = play_collections(db)
+    return {
+        doc["gameId"]: doc["lastEventNum"]
+        for doc in watermarks.find({"source": source, "gameId": {"$in": list(game_ids)}})
+    }
+
+def closed_games(db, source, game_ids):
+    """Games whose plays were stored after they finished"""
+    _, watermarks = play_collections(db)
+    return set(watermarks.distinct("gameId", {"source": source, "gameId": {"$in": list(game_ids)}, "final": True}))
+
+def close_games(db, source, game_ids):
+    # Call only once the plays fetched after the game went final are stored
+    if not game_ids:
+        return
+    _, watermarks = play_collections(db)
+    now = datetime.utcnow()
+    watermarks.bulk_write([
+        UpdateOne(
+            {"gameId": game_id, "source": source},
+            {"$set": {"final": True, "updatedAt": now}, "$max": {"lastEventNum": -1}},
+            upsert=True
+        )
+        for game_id in game_ids
+    ], ordered=False)
+
+def append_plays(db, source, plays_by_game):
+    """Insert new plays ({gameId: [play, ...]}, each with a playId) and advance the watermarks.
+
+    Plays already stored (e.g. after a failed watermark update) are skipped by the unique index.
+    Returns the number of plays inserted.
+    """
+    now = datetime.utcnow()
+    docs = [
+        {**play, "gameId": game_id, "source": source, "eventNum": play["playId"], "ingestedAt": now}
+        for game_id, plays in plays_by_game.items() for play in plays
+    ]
+    if not docs:
+        return 0
+    plays_collection, watermarks = play_collections(db)
+    try:
+        inserted = len(plays_collection.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY for error in errors):
+            raise
+        inserted = e.details.get("nInserted", 0)
+    # $max keeps a watermark from moving backwards if two writers race
+    watermarks.bulk_write([
+        UpdateOne(
+            {"gameId": game_id, "source": source},
+            {"$max": {"lastEventNum": max(play["playId"] for play in plays)}, "$set": {"updatedAt": now}},
+            upsert=True
+        )
+        for game_id, plays in plays_by_game.items() if plays
+    ], ordered=False)
+    return inserted
+
+def recent_plays_update(plays):
+    """$push that prepends new plays (chronological order in) to the rolling newest-first list"""
+    return {"plays": {"$each": list(reversed(plays)), "$position": 0, "$slice": RECENT_PLAYS}}
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from pytz import timezone
+
+logger = logging.getLogger('NBA-Stats-Cache')
+
+# Persistent cache in front of every nba_api stats.nba.com request, keyed by endpoint and parameters.
+# Responses about finished games (or dates that are over) never change and are kept until evicted
+# for space; anything else is reused for NBA_STATS_CACHE_TTL seconds.
+
+NBA_STATS_CACHE_DIR = os.getenv(
+    'NBA_STATS_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'nba-stats')
+)
+NBA_STATS_CACHE_MAX_BYTES = int(os.getenv('NBA_STATS_CACHE_MAX_MB', '256')) * 1024 * 1024
+NBA_STATS_CACHE_TTL = float(os.getenv('NBA_STATS_CACHE_TTL', '60'))
+# Set NBA_STATS_CACHE=0 to always go to the network (requests are still rate limited)
+NBA_STATS_CACHE = os.getenv('NBA_STATS_CACHE', '1') != '0'
+# VACUUM once this share of the database file is free pages
+COMPACT_FREE_RATIO = 0.25
+
+DATE_PARAMS = ('DateTo', 'GameDate')
+
+def parse_param_date(value):
+    for date_format in ("%m/%d/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(str(value), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def request_key(endpoint, parameters):
+    encoded = json.dumps(sorted((key, value) for key, value in parameters.items()), default=str)
+    return hashlib.sha1(f"{endpoint.lower()}:{encoded}".encode('utf-8')).hexdigest()
+
+def finished_game_ids(contents):
+    # Games in a LeagueGameFinder result whose every team row has a W/L
+    try:
+        result_set = json.loads(contents)["resultSets"][0]
+        headers = result_set["headers"]
+        game_index = headers.index("GAME_ID")
+        wl_index = headers.index("WL")
+    except (ValueError, KeyError, IndexError, TypeError):
+        return set()
+    finished = {}
+    for row in result_set["rowSet"]:
+        game_id = row[game_index]
+        finished[game_id] = finished.get(game_id, True) and bool(row[wl_index])
+    return {game_id for game_id, done in finished.items() if done}
+
+class NbaStatsCache:
+    def __init__(self, cache_dir=NBA_STATS_CACHE_DIR, max_bytes=NBA_STATS_CACHE_MAX_BYTES, ttl=NBA_STATS_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'responses.db'), timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                url TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                final INTEGER NOT NULL DEFAULT 0,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        # Games LeagueGameFinder has reported as finished; their box scores and play-by-play are immutable
+        self.conn.execute('CREATE TABLE IF NOT EXISTS final_games (game_id TEXT PRIMARY KEY)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self.conn.commit()
+        self.compact()
+
+    def lookup(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT url, body, final, fetched_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if not row:
+                return None
+            url, body, final, fetched_at = row
+            if not final and time.time() - fetched_at > self.ttl:
+                return None
+            self.conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+        return url, zlib.decompress(body).decode('utf-8')
+
+    def is_final(self, parameters):
+        game_id = parameters.get('GameID')
+        if game_id:
+            with self.lock:
+                return self.conn.execute(
+                    'SELECT 1 FROM final_games WHERE game_id = ?', (str(game_id),)
+                ).fetchone() is not None
+        # A date is over once the next day's late games have finished too
+        cutoff = datetime.now(timezone('US/Eastern')).date() - timedelta(days=1)
+        dates = [parse_param_date(parameters[name]) for name in DATE_PARAMS if parameters.get(name)]
+        return bool(dates) and all(date is not None and date < cutoff for date in dates)
+
+    def store(self, key, endpoint, parameters, url, contents):
+        if endpoint.lower() == 'leaguegamefinder':
+            self.mark_final(finished_game_ids(contents))
+        body = zlib.compress(contents.encode('utf-8'))
+        final = self.is_final(parameters)
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (key, endpoint, url, body, size, final, fetched_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, endpoint.lower(), url, body, len(body), int(final), now, now)
+            )
+            self.conn.commit()
+        self.evict()
+
+    def mark_final(self, game_ids):
+        if not game_ids:
+            return
+        with self.lock:
+            self.conn.executemany('INSERT OR IGNORE INTO final_games (game_id) VALUES (?)', [(game_id,) for game_id in game_ids])
+            self.conn.commit()
+
+    def evict(self):
+        # Least recently used first once over the size cap
+        with self.lock:
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            target = int(self.max_bytes * 0.9)
+            victims = []
+            for key, size in self.conn.execute('SELECT key, size FROM responses ORDER BY last_access'):
+                if total <= target:
+                    break
+                victims.append(key)
+                total -= size
+            self.conn.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key in victims])
+            self.conn.commit()
+        logger.info(f"Evicted {len(victims)} cached stats.nba.com responses")
+        self.compact()
+
+    def compact(self):
+        # Drops expired in-progress responses and reclaims free pages left by deletes
+        with self.lock:
+            self.conn.execute('DELETE FROM responses WHERE final = 0 AND fetched_at < ?', (time.time() - self.ttl,))
+            self.conn.commit()
+            page_count = self.conn.execute('PRAGMA page_count').fetchone()[0]
+            free_pages = self.conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if page_count and free_pages / page_count > COMPACT_FREE_RATIO:
+                self.conn.execute('VACUUM')
+                logger.info(f"Compacted stats.nba.com cache, reclaimed {free_pages} pages")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+installed_cache = None
+
+def install_nba_stats_cache():
+    """Route every nba_api stats endpoint through the cache.
+
+    Misses go out through the shared httpClient, which applies the stats.nba.com rate limit, backoff
+    and circuit breaker.
+    """
+    global installed_cache
+    from nba_api.stats.library.http import NBAStatsHTTP
+    from httpClient import http_client
+
+    if installed_cache is not None or getattr(NBAStatsHTTP.send_api_request, 'cached', False):
+        return installed_cache
+    cache = NbaStatsCache() if NBA_STATS_CACHE else None
+    NBAStatsHTTP.set_session(http_client())
+    send_api_request = NBAStatsHTTP.send_api_request
+
+    def cached_send_api_request(self, endpoint, parameters, *args, **kwargs):
+        key = request_key(endpoint, parameters)
+        if cache:
+            hit = cache.lookup(key)
+            if hit:
+                url, contents = hit
+                return self.nba_response(response=contents, status_code=200, url=url)
+        response = send_api_request(self, endpoint, parameters, *args, **kwargs)
+        if cache and response.get_response() and response._status_code == 200 and response.valid_json():
+            cache.store(key, endpoint, parameters, response.get_url(), response.get_response())
+        return response
+
+    cached_send_api_request.cached = True
+    NBAStatsHTTP.send_api_request = cached_send_api_request
+    installed_cache = cache
+    return cache
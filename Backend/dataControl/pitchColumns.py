@@ -0,0 +1,94 @@
+import sys
+import math
+from array import array
+from bson.binary import Binary
+
+# Pitch fields as emitted by MLBLiveGamesAPI.extract_at_bat, stored one typed array per field
+NUMERIC_FIELDS = (
+    "pitchSpeed", "endSpeed", "spinRate", "spinAxis", "releaseSpinRate", "releaseSpinAxis",
+    "breakAngle", "breakLength", "breakY", "extension", "releaseExtension",
+    "releasePosX", "releasePosY", "releasePosZ", "pX", "pZ", "plateX", "plateZ",
+    "vx0", "vy0", "vz0", "ax", "ay", "az", "pfxX", "pfxZ", "plateTime",
+)
+STRING_FIELDS = ("pitchType", "pitchTypeCode", "result", "resultCode", "description")
+
+# At-bats per chunk document; only chunks containing changed at-bats are rewritten
+CHUNK_AT_BATS = 20
+
+def to_float(value):
+    try:
+        return math.nan if value is None else float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def encode_pitch_chunk(game_pk, chunk, at_bats, at_bat_start, game_date=None):
+    at_bat_index = array('i')
+    pitch_number = array('h')
+    numeric = {field: array('d') for field in NUMERIC_FIELDS}
+    string_codes = {field: array('H') for field in STRING_FIELDS}
+    strings = [""]
+    string_ids = {"": 0}
+    for offset, at_bat in enumerate(at_bats):
+        for number, pitch in enumerate(at_bat.get("pitches", [])):
+            at_bat_index.append(at_bat_start + offset)
+            pitch_number.append(number)
+            for field in NUMERIC_FIELDS:
+                numeric[field].append(to_float(pitch.get(field)))
+            for field in STRING_FIELDS:
+                value = pitch.get(field) or ""
+                if value not in string_ids:
+                    string_ids[value] = len(strings)
+                    strings.append(value)
+                string_codes[field].append(string_ids[value])
+    columns = {"atBatIndex": at_bat_index, "pitchNumber": pitch_number, **numeric, **string_codes}
+    return {
+        "gameId": game_pk,
+        "chunk": chunk,
+        "gameDate": game_date,
+        "atBatStart": at_bat_start,
+        "atBatEnd": at_bat_start + len(at_bats),
+        "pitchCount": len(at_bat_index),
+        "byteOrder": sys.byteorder,
+        "strings": strings,
+        "columns": {name: Binary(values.tobytes()) for name, values in columns.items()},
+    }
+
+def decode_pitch_chunk(doc):
+    typecodes = {"atBatIndex": 'i', "pitchNumber": 'h'}
+    typecodes.update({field: 'd' for field in NUMERIC_FIELDS})
+    typecodes.update({field: 'H' for field in STRING_FIELDS})
+    columns = {}
+    for name, typecode in typecodes.items():
+        values = array(typecode)
+        raw = doc["columns"].get(name)
+        if raw is not None:
+            values.frombytes(bytes(raw))
+        if doc.get("byteOrder", sys.byteorder) != sys.byteorder:
+            values.byteswap()
+        columns[name] = values
+    return columns, doc["strings"]
+
+def load_game_pitches(collection, game_pk):
+    # Returns {field: array} for every pitch in the game; string fields are decoded to lists
+    merged = {"atBatIndex": array('i'), "pitchNumber": array('h')}
+    merged.update({field: array('d') for field in NUMERIC_FIELDS})
+    merged.update({field: [] for field in STRING_FIELDS})
+    for doc in collection.find({"gameId": game_pk}).sort("chunk", 1):
+        columns, strings = decode_pitch_chunk(doc)
+        for name, values in columns.items():
+            if name in STRING_FIELDS:
+                merged[name].extend(strings[code] for code in values)
+            else:
+                merged[name].extend(values)
+    return merged
+
+def iter_pitch_rows(columns):
+    # Rebuilds the per-pitch dicts of extract_at_bat from load_game_pitches output
+    for i in range(len(columns["atBatIndex"])):
+        row = {"atBatIndex": columns["atBatIndex"][i], "pitchNumber": columns["pitchNumber"][i]}
+        for field in NUMERIC_FIELDS:
+            value = columns[field][i]
+            row[field] = None if math.isnan(value) else value
+        for field in STRING_FIELDS:
+            row[field] = columns[field][i]
+        yield row
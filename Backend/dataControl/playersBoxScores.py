@@ -1,13 +1,16 @@
-import requests
 from datetime import datetime, timedelta
 import time
 import logging
 import os
 import sys
 import json
-from pymongo import MongoClient
+import threading
 from dotenv import load_dotenv
-from nba_api.stats.endpoints import leaguegamefinder, boxscoretraditionalv2, playbyplayv2
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import scraperMetrics
+
+# Node spawns this script per request, so nba_api, pandas and MongoDB are loaded on first use
+# rather than at import; see bench/startup.py for the import-time budget
 
 NBA_TEAM_ABBRS = [
     'ATL', 'BOS', 'BKN', 'CHA', 'CHI', 'CLE', 'DAL', 'DEN', 'DET', 'GSW',
@@ -15,127 +18,218 @@ NBA_TEAM_ABBRS = [
     'OKC', 'ORL', 'PHI', 'PHX', 'POR', 'SAC', 'SAS', 'TOR', 'UTA', 'WAS'
 ]
 
-try:
-    from nba_api.stats.endpoints import scoreboardv2
-    # Create a compatible wrapper to match the old API usage
-    class ScoreboardWrapper:
-        def __init__(self, game_date=None):
-            self.game_date = game_date
+# Create a compatible wrapper to match the old API usage
+class ScoreboardWrapper:
+    def __init__(self, game_date=None):
+        self.game_date = game_date
+        
+    def get_data_frames(self):
+        import pandas as pd
+        sb = nba_stats().scoreboardv2.ScoreboardV2(game_date=self.game_date)
+        games_df = sb.game_header.get_data_frame()
+        if games_df.empty:
+            return [pd.DataFrame()]
+        # GameHeader only has team ids; names, scores and records come from each team's LineScore row
+        teams = sb.line_score.get_data_frame().set_index(['GAME_ID', 'TEAM_ID'])
+        for side in ('HOME', 'VISITOR'):
+            rows = teams.reindex(list(zip(games_df['GAME_ID'], games_df[f'{side}_TEAM_ID'])))
+            records = rows['TEAM_WINS_LOSSES'].fillna('0-0').str.split('-', n=1, expand=True)
+            games_df[f'{side}_TEAM_NAME'] = rows['TEAM_NAME'].values
+            games_df[f'{side}_TEAM_CITY'] = rows['TEAM_CITY_NAME'].values
+            games_df[f'{side}_TEAM_ABBREVIATION'] = rows['TEAM_ABBREVIATION'].values
+            games_df[f'{side}_TEAM_SCORE'] = rows['PTS'].values
+            games_df[f'{side}_TEAM_WINS'] = records[0].values
+            games_df[f'{side}_TEAM_LOSSES'] = records[1].values
+        games_df['PERIOD'] = games_df['LIVE_PERIOD']
+        games_df['GAME_CLOCK'] = games_df['LIVE_PC_TIME'].str.strip()
+        games_df['SERIES_ID'] = None
+        games_df['SERIES_SUMMARY'] = None
+        games_df['ROUND_NUM'] = None
+        return [games_df]
+
+# Keep fallback implementation if needed
+class FallbackScoreboard:
+    def __init__(self, game_date=None):
+        self.game_date = game_date
+        
+    def get_data_frames(self):
+        import pandas as pd
+        # Use leaguegamefinder instead to get today's games
+        today_date = self.game_date if self.game_date else datetime.now().strftime("%Y-%m-%d")
+        game_finder = nba_stats().leaguegamefinder.LeagueGameFinder(
+            date_from_nullable=today_date,
+            date_to_nullable=today_date
+        )
+        games_df = game_finder.get_data_frames()[0]
+        
+        # Transform to match scoreboard format as closely as possible
+        if not games_df.empty:
+            # Add necessary columns that scoreboard would provide
+            games_df['GAME_STATUS_TEXT'] = 'In Progress'  # Assume all games are in progress
+            games_df['GAME_STATUS_ID'] = 2  # 2 means in progress
+            games_df['PERIOD'] = 1  # Default to 1st period
+            games_df['GAME_CLOCK'] = ''  # No clock info available
             
-        def get_data_frames(self):
-            sb = scoreboardv2.ScoreboardV2(game_date=self.game_date)
-            return sb.get_data_frames()
-    
-    scoreboard = ScoreboardWrapper
-except ImportError:
-    # Keep fallback implementation if needed
-    class FallbackScoreboard:
-        def __init__(self, game_date=None):
-            self.game_date = game_date
+            # Identify home and away teams
+            home_mask = games_df['MATCHUP'].str.contains(' vs. ')
+            games_df.loc[home_mask, 'HOME_TEAM_ID'] = games_df.loc[home_mask, 'TEAM_ID']
+            games_df.loc[home_mask, 'HOME_TEAM_NAME'] = games_df.loc[home_mask, 'TEAM_NAME']
+            games_df.loc[home_mask, 'HOME_TEAM_CITY'] = ''
+            games_df.loc[home_mask, 'HOME_TEAM_ABBREVIATION'] = games_df.loc[home_mask, 'TEAM_ABBREVIATION']
+            games_df.loc[home_mask, 'HOME_TEAM_SCORE'] = games_df.loc[home_mask, 'PTS']
             
-        def get_data_frames(self):
-            # Use leaguegamefinder instead to get today's games
-            today_date = self.game_date if self.game_date else datetime.now().strftime("%Y-%m-%d")
-            game_finder = leaguegamefinder.LeagueGameFinder(
-                date_from_nullable=today_date,
-                date_to_nullable=today_date
-            )
-            games_df = game_finder.get_data_frames()[0]
+            # For away teams, we need to find their matching home games
+            away_games = games_df[~home_mask].copy()
+            for _, away_game in away_games.iterrows():
+                # Find the corresponding home game
+                matchup_parts = away_game['MATCHUP'].split(' @ ')
+                if len(matchup_parts) == 2:
+                    home_team_abbr = matchup_parts[1]
+                    home_game = games_df[(games_df['TEAM_ABBREVIATION'] == home_team_abbr) & home_mask]
+                    
+                    if not home_game.empty:
+                        home_game_id = home_game.iloc[0]['GAME_ID']
+                        # Now update the original away game entry with visitor info
+                        games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_ID'] = away_game['TEAM_ID']
+                        games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_NAME'] = away_game['TEAM_NAME']
+                        games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_CITY'] = ''
+                        games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_ABBREVIATION'] = away_game['TEAM_ABBREVIATION']
+                        games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_SCORE'] = away_game['PTS']
             
-            # Transform to match scoreboard format as closely as possible
-            if not games_df.empty:
-                # Add necessary columns that scoreboard would provide
-                games_df['GAME_STATUS_TEXT'] = 'In Progress'  # Assume all games are in progress
-                games_df['GAME_STATUS_ID'] = 2  # 2 means in progress
-                games_df['PERIOD'] = 1  # Default to 1st period
-                games_df['GAME_CLOCK'] = ''  # No clock info available
-                
-                # Identify home and away teams
-                home_mask = games_df['MATCHUP'].str.contains(' vs. ')
-                games_df.loc[home_mask, 'HOME_TEAM_ID'] = games_df.loc[home_mask, 'TEAM_ID']
-                games_df.loc[home_mask, 'HOME_TEAM_NAME'] = games_df.loc[home_mask, 'TEAM_NAME']
-                games_df.loc[home_mask, 'HOME_TEAM_CITY'] = ''
-                games_df.loc[home_mask, 'HOME_TEAM_ABBREVIATION'] = games_df.loc[home_mask, 'TEAM_ABBREVIATION']
-                games_df.loc[home_mask, 'HOME_TEAM_SCORE'] = games_df.loc[home_mask, 'PTS']
-                
-                # For away teams, we need to find their matching home games
-                away_games = games_df[~home_mask].copy()
-                for _, away_game in away_games.iterrows():
-                    # Find the corresponding home game
-                    matchup_parts = away_game['MATCHUP'].split(' @ ')
-                    if len(matchup_parts) == 2:
-                        home_team_abbr = matchup_parts[1]
-                        home_game = games_df[(games_df['TEAM_ABBREVIATION'] == home_team_abbr) & home_mask]
-                        
-                        if not home_game.empty:
-                            home_game_id = home_game.iloc[0]['GAME_ID']
-                            # Now update the original away game entry with visitor info
-                            games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_ID'] = away_game['TEAM_ID']
-                            games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_NAME'] = away_game['TEAM_NAME']
-                            games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_CITY'] = ''
-                            games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_ABBREVIATION'] = away_game['TEAM_ABBREVIATION']
-                            games_df.loc[games_df['GAME_ID'] == home_game_id, 'VISITOR_TEAM_SCORE'] = away_game['PTS']
-                
-                # Only keep home games for scoreboard format compatibility
-                scoreboard_df = games_df[home_mask].copy()
-                
-                # Add default values for other expected columns
-                scoreboard_df['HOME_TEAM_WINS'] = 0
-                scoreboard_df['HOME_TEAM_LOSSES'] = 0
-                scoreboard_df['VISITOR_TEAM_WINS'] = 0
-                scoreboard_df['VISITOR_TEAM_LOSSES'] = 0
-                scoreboard_df['SERIES_ID'] = ''
-                scoreboard_df['SERIES_SUMMARY'] = ''
-                scoreboard_df['ROUND_NUM'] = ''
-                
-                return [scoreboard_df]
-            return [pd.DataFrame()]  # Empty DataFrame if no games
+            # Only keep home games for scoreboard format compatibility
+            scoreboard_df = games_df[home_mask].copy()
             
-    scoreboard = FallbackScoreboard
-
-# Rest of your imports
-import pandas as pd
+            # Add default values for other expected columns
+            scoreboard_df['HOME_TEAM_WINS'] = 0
+            scoreboard_df['HOME_TEAM_LOSSES'] = 0
+            scoreboard_df['VISITOR_TEAM_WINS'] = 0
+            scoreboard_df['VISITOR_TEAM_LOSSES'] = 0
+            scoreboard_df['SERIES_ID'] = ''
+            scoreboard_df['SERIES_SUMMARY'] = ''
+            scoreboard_df['ROUND_NUM'] = ''
+            
+            return [scoreboard_df]
+        return [pd.DataFrame()]  # Empty DataFrame if no games
 
-# Fix for Unicode encoding in logger
-import codecs
-sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer)
+scoreboard = ScoreboardWrapper
+nba_api_lock = threading.Lock()
+nba_api_ready = False
 
-# Configure NBA API request parameters - Fixed configuration
-from nba_api import stats
-# The correct way to set headers for NBA API
-from nba_api.stats.library import http
-http.STATS_HEADERS['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-http.TIMEOUT = 60  # Increase timeout to 60 seconds
+def nba_stats():
+    """nba_api's stats endpoints, imported and configured on first use (the import alone takes ~0.5s)"""
+    global nba_api_ready, scoreboard
+    from nba_api.stats import endpoints
+    with nba_api_lock:
+        if not nba_api_ready:
+            # The correct way to set headers for NBA API
+            from nba_api.stats.library import http
+            from upstreams import configure_nba_api
+            from nbaStatsCache import install_nba_stats_cache
+            http.STATS_HEADERS['User-Agent'] = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            configure_nba_api()
+            # Cache hits skip stats.nba.com entirely; misses are rate limited and retried by httpClient
+            install_nba_stats_cache()
+            if not hasattr(endpoints, 'scoreboardv2'):
+                scoreboard = FallbackScoreboard
+            nba_api_ready = True
+    return endpoints
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Set up logging with UTF-8 encoding
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("box_scores_api.log", encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger()
 
-# MongoDB connection
-try:
-    mongo_uri = os.environ.get('MONGODB_URI') or os.environ.get('MONGO_URI', 'mongodb://localhost:27017/sportsAH')
-    logger.info(f"Using MongoDB URI: {mongo_uri[:20]}...")
-    
-    client = MongoClient(mongo_uri)
-    db_name = os.environ.get('MONGODB_DATABASE', 'sportsAH')
-    db = client[db_name]
-    box_scores_collection = db['player_box_scores']
-    
-    client.admin.command('ping')
-    logger.info("Successfully connected to MongoDB")
-except Exception as e:
-    logger.error(f"Failed to connect to MongoDB: {e}")
-    sys.exit(1)
+def configure_logging():
+    # Fix for Unicode encoding in logger
+    import codecs
+    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer)
+    # Set up logging with UTF-8 encoding
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler("box_scores_api.log", encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+# MongoDB connection, opened by the first query
+mongo_lock = threading.Lock()
+mongo_client = None
+ready_collections = set()
+
+def get_db():
+    global mongo_client
+    with mongo_lock:
+        if mongo_client is None:
+            from pymongo import MongoClient
+            mongo_uri = os.environ.get('MONGODB_URI') or os.environ.get('MONGO_URI', 'mongodb://localhost:27017/sportsAH')
+            logger.info(f"Using MongoDB URI: {mongo_uri[:20]}...")
+            mongo_client = MongoClient(mongo_uri)
+    return mongo_client[os.environ.get('MONGODB_DATABASE', 'sportsAH')]
+
+BACKFILL_WORKERS = int(os.getenv('NBA_BACKFILL_WORKERS', '4'))
+BACKFILL_WINDOW_DAYS = int(os.getenv('NBA_BACKFILL_WINDOW_DAYS', '7'))
+BACKFILL_RETRIES = int(os.getenv('NBA_BACKFILL_RETRIES', '3'))
+# Watermark source for PlayByPlayV2 EVENTNUMs in nbaPlays
+PLAY_SOURCE = 'stats'
+# Operations per bulk_write round-trip
+BULK_WRITE_BATCH = int(os.getenv('NBA_BULK_WRITE_BATCH', '1000'))
+
+# Indexes the upserts rely on, created the first time each collection is used in a process
+COLLECTION_INDEXES = {
+    'player_box_scores': ([("playerName", 1), ("gameDate", 1)], {"unique": True, "background": True}),
+    'live_games': ([("gameId", 1)], {"unique": True, "background": True}),
+    # One document per game finished by a backfill, so an interrupted run resumes where it stopped
+    'box_score_backfill_checkpoints': ("gameId", {"unique": True}),
+}
+
+def get_collection(name):
+    collection = get_db()[name]
+    if name not in ready_collections and name in COLLECTION_INDEXES:
+        keys, options = COLLECTION_INDEXES[name]
+        collection.create_index(keys, **options)
+        ready_collections.add(name)
+    return collection
+
+def bulk_upsert(collection, operations):
+    """Run operations as chunked unordered bulk writes; returns upserted/modified/unchanged/failed counts"""
+    from pymongo.errors import BulkWriteError
+    counts = {"upserted": 0, "modified": 0, "unchanged": 0, "failed": 0}
+    for start in range(0, len(operations), BULK_WRITE_BATCH):
+        batch = operations[start:start + BULK_WRITE_BATCH]
+        try:
+            result = collection.bulk_write(batch, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+            errors = result.get("writeErrors", [])
+            counts["failed"] += len(errors)
+            logger.error(f"{len(errors)} of {len(batch)} writes to {collection.name} failed: {errors[:3]}")
+        counts["upserted"] += result.get("nUpserted", 0)
+        counts["modified"] += result.get("nModified", 0)
+        counts["unchanged"] += result.get("nMatched", 0) - result.get("nModified", 0)
+    return counts
+
+# Whole minutes are the first digit run before the colon, seconds the digits after it
+MINUTES_RE = r'^[^:\d]*(\d*)[^:]*(?::\D*(\d*))?'
+# ISO 8601 durations, as newer stats.nba.com and cdn.nba.com feeds send them, e.g. "PT25M01.00S"
+ISO_MINUTES_RE = r'^PT(?:(\d+)M)?(?:([\d.]+)S)?$'
+
+def parse_minutes(values):
+    """Parse MIN strings such as "12:34", "20.000000:12", "PT25M01.00S" or "25" into fractional minutes"""
+    import pandas as pd
+    text = values.astype(str).str.strip()
+    has_colon = text.str.contains(':', regex=False)
+    parts = text.str.extract(MINUTES_RE)
+    whole = pd.to_numeric(parts[0], errors='coerce').fillna(0)
+    seconds = pd.to_numeric(parts[1], errors='coerce').fillna(0)
+    plain = pd.to_numeric(text, errors='coerce')
+    # Anything else: keep the digits and dots, as the old per-row fallback did
+    salvaged = pd.to_numeric(text.str.replace(r'[^\d.]', '', regex=True), errors='coerce').fillna(0)
+    minutes = (whole + seconds / 60).where(has_colon, plain.fillna(salvaged))
+    iso = text.str.extract(ISO_MINUTES_RE)
+    iso_minutes = pd.to_numeric(iso[0], errors='coerce').fillna(0) + pd.to_numeric(iso[1], errors='coerce').fillna(0) / 60
+    return minutes.where(~text.str.match(ISO_MINUTES_RE), iso_minutes).astype(float)
 
 class NBABoxScoresAPI:
     def __init__(self):
@@ -168,11 +262,12 @@ class NBABoxScoresAPI:
             api_date_str = date.strftime("%m/%d/%Y")
             
             # Use leaguegamefinder to get games for the specified date
-            game_finder = leaguegamefinder.LeagueGameFinder(
-                date_from_nullable=api_date_str,
-                date_to_nullable=api_date_str,
-                league_id_nullable='00'  # Add this to specify NBA only (00 is NBA, 20 is G-League)
-            )
+            with scraperMetrics.stage('fetch.games'):
+                game_finder = nba_stats().leaguegamefinder.LeagueGameFinder(
+                    date_from_nullable=api_date_str,
+                    date_to_nullable=api_date_str,
+                    league_id_nullable='00'  # Add this to specify NBA only (00 is NBA, 20 is G-League)
+                )
             games_df = game_finder.get_data_frames()[0]
             
             if games_df.empty:
@@ -186,212 +281,7 @@ class NBABoxScoresAPI:
             # Process each game
             for game_id in game_ids:
                 try:
-                    box = boxscoretraditionalv2.BoxScoreTraditionalV2(game_id=game_id)
-                    player_stats = box.get_data_frames()[0]
-                    team_stats = box.get_data_frames()[1]
-                    if player_stats.empty:
-                        logger.warning(f"No box score data found for game {game_id}")
-                        continue
-                    
-                    # Debug what's in team_stats
-                    logger.debug(f"Team stats columns: {team_stats.columns.tolist()}")
-                    if not team_stats.empty:
-                        logger.debug(f"First team row: {team_stats.iloc[0].to_dict()}")
-                    
-                    # Get teams involved in this game - using a more robust approach
-                    home_team_id = None
-                    away_team_id = None
-                    home_team_abbr = None
-                    away_team_abbr = None
-                    
-                    # Check if we can identify teams by looking at all data available
-                    if 'TEAM_CITY' in team_stats.columns:
-                        # Try to find home/away by TEAM_CITY
-                        for _, team_row in team_stats.iterrows():
-                            if team_row['TEAM_CITY'] == 'Home':
-                                home_team_id = team_row['TEAM_ID']
-                                home_team_abbr = team_row['TEAM_ABBREVIATION']
-                            elif team_row['TEAM_CITY'] == 'Away':
-                                away_team_id = team_row['TEAM_ID']
-                                away_team_abbr = team_row['TEAM_ABBREVIATION']
-                    
-                    # If that didn't work, try identifying by team names from the game finder
-                    if not home_team_abbr or not away_team_abbr:
-                        # Find teams in this game from game_finder
-                        game_teams = games_df[games_df['GAME_ID'] == game_id]
-                        
-                        if len(game_teams) >= 2:  # We should have at least 2 teams
-                            # Usually the home team is listed with a different format
-                            home_idx = game_teams['MATCHUP'].str.contains(' vs. ').idxmax()
-                            away_idx = game_teams['MATCHUP'].str.contains(' @ ').idxmax()
-                            
-                            if home_idx in game_teams.index:
-                                home_team = game_teams.loc[home_idx]
-                                home_team_id = home_team['TEAM_ID'] 
-                                home_team_abbr = home_team['TEAM_ABBREVIATION']
-                            
-                            if away_idx in game_teams.index:
-                                away_team = game_teams.loc[away_idx]
-                                away_team_id = away_team['TEAM_ID']
-                                away_team_abbr = away_team['TEAM_ABBREVIATION']
-                    
-                    # If we still don't have team abbreviations, extract from the first two rows
-                    if not home_team_abbr or not away_team_abbr:
-                        if len(team_stats) >= 2:
-                            home_team_abbr = team_stats.iloc[0]['TEAM_ABBREVIATION']
-                            away_team_abbr = team_stats.iloc[1]['TEAM_ABBREVIATION']
-                            home_team_id = team_stats.iloc[0]['TEAM_ID']
-                            away_team_id = team_stats.iloc[1]['TEAM_ID']
-                    
-                    if not home_team_abbr or not away_team_abbr:
-                        logger.warning(f"Could not identify home/away teams for game {game_id}")
-                        continue
-                    
-                    logger.info(f"Game {game_id}: {home_team_abbr} (home) vs {away_team_abbr} (away)")
-                    
-                    # Create matchup strings
-                    home_matchup = f"{home_team_abbr} vs. {away_team_abbr}"
-                    away_matchup = f"{away_team_abbr} @ {home_team_abbr}"
-                    
-                    # Get team scores to determine win/loss
-                    try:
-                        home_score = team_stats[team_stats['TEAM_ID'] == home_team_id]['PTS'].values[0]
-                        away_score = team_stats[team_stats['TEAM_ID'] == away_team_id]['PTS'].values[0]
-                    except (IndexError, KeyError):
-                        # If we can't get scores by ID, try getting them by row index
-                        if len(team_stats) >= 2:
-                            home_score = team_stats.iloc[0]['PTS']
-                            away_score = team_stats.iloc[1]['PTS']
-                        else:
-                            home_score = away_score = 0
-                            logger.warning(f"Could not determine scores for game {game_id}")
-                    
-                    # Filter out non-NBA players
-                    player_stats = player_stats[
-                        player_stats['TEAM_ABBREVIATION'].isin(NBA_TEAM_ABBRS)
-                    ]
-                    
-                    # Process each player
-                    for _, player_row in player_stats.iterrows():
-                        # Skip players who didn't play
-                        if player_row['MIN'] is None or player_row['MIN'] == '':
-                            continue
-                            
-                        team_id = player_row['TEAM_ID']
-                        
-                        # Determine team by matching player's team ID
-                        if team_id == home_team_id:
-                            team_abbr = home_team_abbr
-                            matchup = home_matchup
-                            win_loss = 'W' if home_score > away_score else 'L'
-                        else:
-                            team_abbr = away_team_abbr
-                            matchup = away_matchup
-                            win_loss = 'W' if away_score > home_score else 'L'
-                            
-                        # Parse minutes (format can be like "12:34" or "20.000000:12")
-                        try:
-                            min_value = player_row['MIN']
-                            
-                            # First ensure we have a string to work with
-                            if min_value is None:
-                                minutes = 0
-                            else:
-                                min_str = str(min_value).strip()
-                                
-                                if not min_str:
-                                    minutes = 0
-                                elif ':' in min_str:
-                                    # Check if it's in "20.000000:12" format
-                                    if '.' in min_str.split(':')[0]:
-                                        # Handle "20.000000:12" format
-                                        parts = min_str.split(':')
-                                        minutes_part = float(parts[0].split('.')[0])  # Take just the integer part before decimal
-                                        seconds_part = int(parts[1]) if parts[1] else 0
-                                        minutes = minutes_part + (seconds_part / 60)
-                                    else:
-                                        # Regular "MM:SS" format
-                                        min_parts = min_str.split(':')
-                                        if len(min_parts) == 2:
-                                            minutes = int(min_parts[0]) + (int(min_parts[1]) / 60)
-                                        else:
-                                            minutes = float(min_parts[0])
-                                else:
-                                    # Try to convert directly to float
-                                    try:
-                                        minutes = float(min_str)
-                                    except ValueError:
-                                        minutes = 0
-                            
-                            # Add debug logging to understand the original format
-                            logger.debug(f"Parsed minutes for {player_row['PLAYER_NAME']}: original='{min_value}', parsed={minutes}")
-                            
-                            # Add check for players with minutes but also points (data validation)
-                            if minutes == 0 and player_row['PTS'] > 0:
-                                logger.warning(f"Player {player_row['PLAYER_NAME']} has 0 minutes but {player_row['PTS']} points - possible parsing error")
-                                # Ensure some minimal playing time
-                                minutes = 1.0
-                                
-                        except (ValueError, AttributeError, TypeError) as e:
-                            logger.warning(f"Error parsing minutes for {player_row['PLAYER_NAME']}: {e}, raw value: {player_row['MIN']}")
-                            # Try a different approach for problematic formats
-                            try:
-                                if ':' in str(player_row['MIN']):
-                                    parts = str(player_row['MIN']).split(':')
-                                    minutes_part = ''.join(c for c in parts[0] if c.isdigit() or c == '.')
-                                    seconds_part = ''.join(c for c in parts[1] if c.isdigit())
-                                    if minutes_part:
-                                        minutes = float(minutes_part)
-                                        if seconds_part:
-                                            minutes += int(seconds_part) / 60
-                                    else:
-                                        minutes = 0
-                                else:
-                                    numeric_chars = ''.join(c for c in str(player_row['MIN']) if c.isdigit() or c == '.')
-                                    minutes = float(numeric_chars) if numeric_chars else 0
-                            except:
-                                minutes = 0
-                                # If player scored points, give them at least some minutes
-                                if player_row['PTS'] > 0:
-                                    minutes = 1.0
-                        
-                        # Format player data
-                        player_data = {
-                            'playerName': f"{player_row['PLAYER_NAME']}",
-                            'teamAbbr': team_abbr,
-                            'matchup': matchup,
-                            'gameDate': formatted_date,
-                            'gameId': game_id,
-                            'scrapedAt': datetime.utcnow().isoformat(),
-                            'winLoss': win_loss,
-                            
-                            # Stats
-                            'min': round(minutes, 2),
-                            'pts': player_row['PTS'],
-                            'fgm': player_row['FGM'],
-                            'fga': player_row['FGA'],
-                            'fgp': player_row['FG_PCT'] * 100 if player_row['FGA'] > 0 else 0,
-                            'tpm': player_row['FG3M'],
-                            'tpa': player_row['FG3A'],
-                            'tpp': player_row['FG3_PCT'] * 100 if player_row['FG3A'] > 0 else 0,
-                            'ftm': player_row['FTM'],
-                            'fta': player_row['FTA'],
-                            'ftp': player_row['FT_PCT'] * 100 if player_row['FTA'] > 0 else 0,
-                            'oreb': player_row['OREB'],
-                            'dreb': player_row['DREB'],
-                            'reb': player_row['REB'],
-                            'ast': player_row['AST'],
-                            'stl': player_row['STL'],
-                            'blk': player_row['BLK'],
-                            'tov': player_row['TO'],
-                            'pf': player_row['PF'],
-                            'plusMinus': player_row['PLUS_MINUS']
-                        }
-                        
-                        # Calculate fantasy points
-                        player_data['fantasyPoints'] = self.calculate_fantasy_points(player_data)
-                        all_box_scores.append(player_data)
-                            
+                    all_box_scores.extend(self.get_game_box_scores(game_id, games_df, formatted_date))
                 except Exception as e:
                     logger.error(f"Error processing box score for game {game_id}: {e}")
                     continue
@@ -403,32 +293,234 @@ class NBABoxScoresAPI:
             logger.error(f"Error fetching box scores via API: {e}")
             return []
 
+    def get_game_box_scores(self, game_id, games_df, formatted_date):
+        """Get player box scores for one game; games_df holds the LeagueGameFinder rows for it"""
+        with scraperMetrics.stage('fetch.boxscore', game=game_id):
+            box = nba_stats().boxscoretraditionalv2.BoxScoreTraditionalV2(game_id=game_id)
+            frames = box.get_data_frames()
+        with scraperMetrics.stage('parse.boxscore', game=game_id):
+            return self.box_score_records(game_id, games_df, formatted_date, frames)
+
+    def box_score_records(self, game_id, games_df, formatted_date, frames):
+        """player_box_scores documents from a BoxScoreTraditionalV2 response"""
+        import numpy as np
+        import pandas as pd
+        from fantasyScoring import fantasy_fields
+        player_stats = frames[0]
+        team_stats = frames[1]
+        if player_stats.empty:
+            logger.warning(f"No box score data found for game {game_id}")
+            return []
+
+        home_team_id, home_team_abbr, away_team_id, away_team_abbr = self.identify_teams(game_id, games_df, team_stats)
+        if not home_team_abbr or not away_team_abbr:
+            logger.warning(f"Could not identify home/away teams for game {game_id}")
+            return []
+
+        logger.info(f"Game {game_id}: {home_team_abbr} (home) vs {away_team_abbr} (away)")
+
+        # Get team scores to determine win/loss
+        points = team_stats.drop_duplicates('TEAM_ID').set_index('TEAM_ID')['PTS']
+        if home_team_id in points.index and away_team_id in points.index:
+            home_score = points[home_team_id]
+            away_score = points[away_team_id]
+        elif len(team_stats) >= 2:
+            home_score = team_stats['PTS'].iloc[0]
+            away_score = team_stats['PTS'].iloc[1]
+        else:
+            home_score = away_score = 0
+            logger.warning(f"Could not determine scores for game {game_id}")
+
+        # Keep NBA players who actually played
+        played = player_stats[
+            player_stats['TEAM_ABBREVIATION'].isin(NBA_TEAM_ABBRS)
+            & player_stats['MIN'].notna()
+            & (player_stats['MIN'] != '')
+        ]
+        if played.empty:
+            return []
+
+        minutes = parse_minutes(played['MIN'])
+        # A player with points cannot have 0 minutes; the MIN string was something we could not parse
+        suspicious = (minutes == 0) & (played['PTS'] > 0)
+        if suspicious.any():
+            logger.warning(f"Players with 0 minutes but points in game {game_id}, assuming 1 minute: {played.loc[suspicious, 'PLAYER_NAME'].tolist()}")
+            minutes = minutes.mask(suspicious, 1.0)
+
+        is_home = (played['TEAM_ID'] == home_team_id).to_numpy()
+        records = pd.DataFrame({
+            'playerName': played['PLAYER_NAME'].astype(str),
+            'teamAbbr': np.where(is_home, home_team_abbr, away_team_abbr),
+            'matchup': np.where(is_home, f"{home_team_abbr} vs. {away_team_abbr}", f"{away_team_abbr} @ {home_team_abbr}"),
+            'gameDate': formatted_date,
+            'gameId': game_id,
+            'scrapedAt': datetime.utcnow().isoformat(),
+            'winLoss': np.where(is_home, 'W' if home_score > away_score else 'L', 'W' if away_score > home_score else 'L'),
+
+            # Stats
+            'min': minutes.round(2),
+            'pts': played['PTS'],
+            'fgm': played['FGM'],
+            'fga': played['FGA'],
+            'fgp': (played['FG_PCT'] * 100).where(played['FGA'] > 0, 0),
+            'tpm': played['FG3M'],
+            'tpa': played['FG3A'],
+            'tpp': (played['FG3_PCT'] * 100).where(played['FG3A'] > 0, 0),
+            'ftm': played['FTM'],
+            'fta': played['FTA'],
+            'ftp': (played['FT_PCT'] * 100).where(played['FTA'] > 0, 0),
+            'oreb': played['OREB'],
+            'dreb': played['DREB'],
+            'reb': played['REB'],
+            'ast': played['AST'],
+            'stl': played['STL'],
+            'blk': played['BLK'],
+            'tov': played['TO'],
+            'pf': played['PF'],
+            'plusMinus': played['PLUS_MINUS']
+        })
+
+        # Every scoring profile is stored; fantasyPoints stays DraftKings for existing readers
+        records['fantasyScores'], records['fantasyPoints'] = fantasy_fields(records)
+        return records.to_dict('records')
+
+    def identify_teams(self, game_id, games_df, team_stats):
+        """Return (home id, home abbr, away id, away abbr), or Nones when the teams cannot be told apart"""
+        # Check if the box score labels the teams directly
+        if 'TEAM_CITY' in team_stats.columns:
+            home = team_stats[team_stats['TEAM_CITY'] == 'Home']
+            away = team_stats[team_stats['TEAM_CITY'] == 'Away']
+            if not home.empty and not away.empty:
+                return home['TEAM_ID'].iloc[-1], home['TEAM_ABBREVIATION'].iloc[-1], away['TEAM_ID'].iloc[-1], away['TEAM_ABBREVIATION'].iloc[-1]
+
+        # Otherwise the game finder matchups: "BOS vs. NYK" is the home row, "NYK @ BOS" the away row
+        game_teams = games_df[games_df['GAME_ID'] == game_id]
+        if len(game_teams) >= 2:
+            home = game_teams[game_teams['MATCHUP'].str.contains(' vs. ')]
+            away = game_teams[game_teams['MATCHUP'].str.contains(' @ ')]
+            home = home.iloc[0] if not home.empty else game_teams.iloc[0]
+            away = away.iloc[0] if not away.empty else game_teams.iloc[0]
+            if home['TEAM_ABBREVIATION'] and away['TEAM_ABBREVIATION']:
+                return home['TEAM_ID'], home['TEAM_ABBREVIATION'], away['TEAM_ID'], away['TEAM_ABBREVIATION']
+
+        # Fall back to the order of the box score's team rows
+        if len(team_stats) >= 2:
+            return (team_stats['TEAM_ID'].iloc[0], team_stats['TEAM_ABBREVIATION'].iloc[0],
+                    team_stats['TEAM_ID'].iloc[1], team_stats['TEAM_ABBREVIATION'].iloc[1])
+        return None, None, None, None
+
+    def find_games(self, date_from, date_to):
+        """LeagueGameFinder rows for NBA teams between two dates, inclusive"""
+        for attempt in range(1, BACKFILL_RETRIES + 1):
+            try:
+                with scraperMetrics.stage('fetch.games'):
+                    game_finder = nba_stats().leaguegamefinder.LeagueGameFinder(
+                        date_from_nullable=self.format_date(date_from),
+                        date_to_nullable=self.format_date(date_to),
+                        league_id_nullable='00'
+                    )
+                games_df = game_finder.get_data_frames()[0]
+                return games_df[games_df['TEAM_ABBREVIATION'].isin(NBA_TEAM_ABBRS)]
+            except Exception as e:
+                if attempt == BACKFILL_RETRIES:
+                    raise
+                logger.warning(f"Game finder failed for {date_from} - {date_to} (attempt {attempt}): {e}")
+                time.sleep(2 ** attempt)
+
+    def checkpoint(self, game_id, game_date, status, **fields):
+        get_collection('box_score_backfill_checkpoints').update_one(
+            {"gameId": game_id},
+            {"$set": {"gameDate": game_date, "status": status, "updatedAt": datetime.utcnow(), **fields},
+             "$inc": {"attempts": 1}},
+            upsert=True
+        )
+
+    def backfill_game(self, game_id, game_rows, game_date):
+        """Fetch, store and checkpoint one game, retrying transient stats.nba.com failures"""
+        formatted_date = self.format_date(datetime.strptime(game_date[:10], "%Y-%m-%d").date())
+        for attempt in range(1, BACKFILL_RETRIES + 1):
+            try:
+                box_scores = self.get_game_box_scores(game_id, game_rows, formatted_date)
+                # Only a complete write is checkpointed 'done'; anything else is retried here or on resume
+                counts = self.write_box_scores(box_scores) if box_scores else {"upserted": 0, "modified": 0, "failed": 0}
+                if counts["failed"]:
+                    raise RuntimeError(f"{counts['failed']} of {len(box_scores)} box score writes failed")
+                self.checkpoint(game_id, game_date, 'done', playerCount=len(box_scores))
+                return counts["upserted"] + counts["modified"]
+            except Exception as e:
+                if attempt == BACKFILL_RETRIES:
+                    self.checkpoint(game_id, game_date, 'failed', error=str(e))
+                    raise
+                logger.warning(f"Box score for game {game_id} failed (attempt {attempt}): {e}")
+                time.sleep(2 ** attempt)
+
+    def backfill(self, start_date, end_date, workers=BACKFILL_WORKERS, resume=True):
+        """Ingest every NBA game between two dates across a worker pool"""
+        import pandas as pd
+        windows = []
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=BACKFILL_WINDOW_DAYS - 1), end_date)
+            windows.append((window_start, window_end))
+            window_start = window_end + timedelta(days=1)
+        logger.info(f"Backfilling {start_date} to {end_date} in {len(windows)} windows with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = [frame for frame in pool.map(lambda window: self.find_games(*window), windows) if not frame.empty]
+            if not frames:
+                logger.info("No games found to backfill")
+                return 0
+            games_df = pd.concat(frames, ignore_index=True)
+            games_by_id = dict(tuple(games_df.groupby('GAME_ID')))
+            done = set()
+            if resume:
+                done = set(get_collection('box_score_backfill_checkpoints').distinct(
+                    "gameId", {"gameId": {"$in": list(games_by_id)}, "status": "done"}
+                ))
+            pending = [game_id for game_id in games_by_id if game_id not in done]
+            logger.info(f"Found {len(games_by_id)} games, {len(done)} already backfilled, {len(pending)} to fetch")
+
+            futures = {
+                pool.submit(self.backfill_game, game_id, games_by_id[game_id], games_by_id[game_id]['GAME_DATE'].iloc[0]): game_id
+                for game_id in pending
+            }
+            stored = 0
+            failed = 0
+            for completed, future in enumerate(as_completed(futures), 1):
+                try:
+                    stored += future.result()
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Giving up on game {futures[future]}: {e}")
+                if completed % 25 == 0:
+                    logger.info(f"Backfill progress: {completed}/{len(futures)} games")
+        logger.info(f"Backfill stored {stored} box scores from {len(pending) - failed} games, {failed} failed")
+        return stored
+
     def calculate_fantasy_points(self, stats):
-        """Calculate fantasy points based on stats (DraftKings format)"""
-        fp = 0
-        fp += stats['pts']
-        fp += stats['tpm'] * 0.5
-        fp += stats['reb'] * 1.25
-        fp += stats['ast'] * 1.5
-        fp += stats['stl'] * 2
-        fp += stats['blk'] * 2
-        fp -= stats['tov'] * 0.5
-        
-        # Check for double-double and triple-double
-        categories = 0
-        if stats['pts'] >= 10: categories += 1
-        if stats['reb'] >= 10: categories += 1
-        if stats['ast'] >= 10: categories += 1
-        if stats['stl'] >= 10: categories += 1
-        if stats['blk'] >= 10: categories += 1
-        
-        if categories >= 3:  # Triple-double
-            fp += 3
-        elif categories >= 2:  # Double-double
-            fp += 1.5
-            
-        return round(fp, 2)
+        """Calculate fantasy points based on stats (DraftKings format); see fantasyScoring for batches"""
+        from fantasyScoring import DEFAULT_PROFILE, score_box_scores
+        return float(score_box_scores([stats], [DEFAULT_PROFILE])[DEFAULT_PROFILE].iloc[0])
     
+    def write_box_scores(self, box_scores):
+        """Upsert box scores and return bulk_upsert's counts; connection errors propagate"""
+        from pymongo import UpdateOne
+        operations = [
+            UpdateOne(
+                {"playerName": score["playerName"], "gameDate": score["gameDate"]},
+                {"$set": score},
+                upsert=True
+            )
+            for score in box_scores if score.get('playerName')
+        ]
+        with scraperMetrics.stage('write.box_scores'):
+            counts = bulk_upsert(get_collection('player_box_scores'), operations)
+        logger.info(
+            f"Successfully stored/updated {counts['upserted'] + counts['modified']} box scores "
+            f"({counts['upserted']} new, {counts['modified']} modified, {counts['unchanged']} unchanged, {counts['failed']} failed)"
+        )
+        return counts
+
     def store_box_scores(self, box_scores):
         """Store the box scores in MongoDB"""
         if not box_scores:
@@ -436,41 +528,17 @@ class NBABoxScoresAPI:
             return 0
             
         try:
-            # Ensure index exists
-            box_scores_collection.create_index([
-                ("playerName", 1), 
-                ("gameDate", 1)
-            ], unique=True, background=True)
-            
-            # Insert or update each box score
-            updated_count = 0
-            for score in box_scores:
-                if not score.get('playerName'):
-                    continue
-                    
-                try:
-                    result = box_scores_collection.update_one(
-                        {
-                            "playerName": score["playerName"],
-                            "gameDate": score["gameDate"]
-                        },
-                        {"$set": score},
-                        upsert=True
-                    )
-                    
-                    if result.modified_count > 0 or result.upserted_id:
-                        updated_count += 1
-                except Exception as e:
-                    logger.error(f"Error updating document for {score.get('playerName')}: {e}")
-            
-            logger.info(f"Successfully stored/updated {updated_count} box scores")
-            return updated_count
+            counts = self.write_box_scores(box_scores)
+            return counts["upserted"] + counts["modified"]
             
         except Exception as e:
             logger.error(f"Error storing box scores in database: {e}")
             return 0
+
     def get_live_game_data(self, date=None):
         """Fetch live game data including play-by-play information"""
+        import pandas as pd
+        from nbaPlays import load_watermarks, closed_games
         if not date:
             date = datetime.now().date()
             
@@ -483,22 +551,33 @@ class NBABoxScoresAPI:
         try:
             # First get today's games from scoreboard
             api_date = (date - timedelta(days=1)).strftime("%Y-%m-%d")
-            sb = scoreboard.Scoreboard(game_date=api_date)
-            games_data = sb.get_data_frames()[0]  # Games
+            with scraperMetrics.stage('fetch.scoreboard'):
+                # nba_stats() first: it swaps in FallbackScoreboard when scoreboardv2 is missing
+                nba_stats()
+                games_data = scoreboard(game_date=api_date).get_data_frames()[0]  # Games
             
             if games_data.empty:
                 logger.warning(f"No games found for {formatted_date}")
                 return []
                 
-            # Filter to include only NBA teams and active games
+            # Filter to include only NBA teams; finished games stay so their status and last plays land
             # 1: Scheduled/Not Started, 2: In Progress, 3: Final
             active_games = games_data[
-                (games_data['GAME_STATUS_ID'] <= 2) & 
                 (games_data['HOME_TEAM_ABBREVIATION'].isin(NBA_TEAM_ABBRS)) &
                 (games_data['VISITOR_TEAM_ABBREVIATION'].isin(NBA_TEAM_ABBRS))
             ]
             
             live_games = []
+            started = active_games.loc[active_games['GAME_STATUS_ID'] >= 2, 'GAME_ID'].tolist()
+            watermarks = {}
+            closed = set()
+            if started:
+                try:
+                    watermarks = load_watermarks(get_db(), PLAY_SOURCE, started)
+                    closed = closed_games(get_db(), PLAY_SOURCE, started)
+                except Exception as e:
+                    # Without watermarks every play is treated as new; the unique index drops the repeats
+                    logger.warning(f"Could not load play watermarks: {e}")
             
             for _, game in active_games.iterrows():
                 game_id = game['GAME_ID']
@@ -531,46 +610,16 @@ class NBABoxScoresAPI:
                         'seriesId': game['SERIES_ID'] if not pd.isna(game['SERIES_ID']) else None,
                         'seriesSummary': game['SERIES_SUMMARY'] if not pd.isna(game['SERIES_SUMMARY']) else None
                     },
-                    'plays': []
+                    # Plays after this game's stored watermark, oldest first, or None when not fetched;
+                    # see store_live_games
+                    'newPlays': None
                 }
                 
-                # Only fetch play-by-play data for games in progress
-                if game['GAME_STATUS_ID'] == 2:
+                # Play-by-play for started games; a finished one is fetched until its last plays are stored
+                if game['GAME_STATUS_ID'] >= 2 and game_id not in closed:
                     try:
-                        # Get recent plays
-                        pbp = playbyplayv2.PlayByPlayV2(game_id=game_id)
-                        plays_df = pbp.get_data_frames()[0]
-                        
-                        if not plays_df.empty:
-                            # Get last 10 plays in reverse chronological order
-                            recent_plays = plays_df.tail(10).iloc[::-1].to_dict('records')
-                            
-                            # Format each play
-                            for play in recent_plays:
-                                formatted_play = {
-                                    'playId': int(play['EVENTNUM']) if not pd.isna(play['EVENTNUM']) else 0,
-                                    'clock': play['PCTIMESTRING'] if not pd.isna(play['PCTIMESTRING']) else "",
-                                    'period': int(play['PERIOD']) if not pd.isna(play['PERIOD']) else 0,
-                                    'description': play['HOMEDESCRIPTION'] if not pd.isna(play['HOMEDESCRIPTION']) else 
-                                                   play['VISITORDESCRIPTION'] if not pd.isna(play['VISITORDESCRIPTION']) else
-                                                   play['NEUTRALDESCRIPTION'] if not pd.isna(play['NEUTRALDESCRIPTION']) else "",
-                                    'homeScore': int(play['SCORE']) if not pd.isna(play['SCORE']) else None,
-                                    'awayScore': int(play['SCORE']) if not pd.isna(play['SCORE']) else None,
-                                    'isScoreChange': bool(play['SCORE'] != play['SCORE_MARGIN']) if not pd.isna(play['SCORE']) and not pd.isna(play['SCORE_MARGIN']) else False,
-                                    'playType': play['EVENTMSGTYPE']
-                                }
-                                
-                                # Extract score if available
-                                if not pd.isna(play['SCORE']):
-                                    try:
-                                        scores = play['SCORE'].split(' - ')
-                                        if len(scores) == 2:
-                                            formatted_play['awayScore'] = int(scores[0])
-                                            formatted_play['homeScore'] = int(scores[1])
-                                    except:
-                                        pass
-                                        
-                                game_info['plays'].append(formatted_play)
+                        with scraperMetrics.stage('fetch.plays', game=game_id):
+                            game_info['newPlays'] = self.get_new_plays(game_id, watermarks.get(game_id, -1))
                     except Exception as e:
                         logger.error(f"Error fetching play-by-play for game {game_id}: {e}")
                 
@@ -582,35 +631,74 @@ class NBABoxScoresAPI:
             logger.error(f"Error fetching live game data: {e}")
             return []
 
+    def get_new_plays(self, game_id, watermark):
+        """Formatted PlayByPlayV2 rows with an EVENTNUM above watermark, oldest first"""
+        import pandas as pd
+        # stats.nba.com has no "since" parameter, but only rows past the watermark are formatted and stored
+        plays_df = nba_stats().playbyplayv2.PlayByPlayV2(game_id=game_id).get_data_frames()[0]
+        if plays_df.empty:
+            return []
+        new_rows = plays_df[pd.to_numeric(plays_df['EVENTNUM'], errors='coerce') > watermark]
+        new_plays = []
+        for play in new_rows.to_dict('records'):
+            formatted_play = {
+                'playId': int(play['EVENTNUM']),
+                'clock': play['PCTIMESTRING'] if not pd.isna(play['PCTIMESTRING']) else "",
+                'period': int(play['PERIOD']) if not pd.isna(play['PERIOD']) else 0,
+                'description': play['HOMEDESCRIPTION'] if not pd.isna(play['HOMEDESCRIPTION']) else 
+                               play['VISITORDESCRIPTION'] if not pd.isna(play['VISITORDESCRIPTION']) else
+                               play['NEUTRALDESCRIPTION'] if not pd.isna(play['NEUTRALDESCRIPTION']) else "",
+                'homeScore': None,
+                'awayScore': None,
+                'isScoreChange': bool(play['SCORE'] != play['SCORE_MARGIN']) if not pd.isna(play['SCORE']) and not pd.isna(play['SCORE_MARGIN']) else False,
+                'playType': int(play['EVENTMSGTYPE']) if not pd.isna(play['EVENTMSGTYPE']) else None
+            }
+            
+            # Extract score if available
+            if not pd.isna(play['SCORE']):
+                try:
+                    scores = play['SCORE'].split(' - ')
+                    if len(scores) == 2:
+                        formatted_play['awayScore'] = int(scores[0])
+                        formatted_play['homeScore'] = int(scores[1])
+                except:
+                    pass
+            new_plays.append(formatted_play)
+        return new_plays
+
     def store_live_games(self, live_games):
         """Store live game data in MongoDB"""
+        from pymongo import UpdateOne
+        from nbaPlays import append_plays, close_games, recent_plays_update
         if not live_games:
             logger.warning("No live games to store")
             return 0
             
         try:
-            # Create/ensure index on live_games collection
-            live_games_collection = db['live_games']
-            live_games_collection.create_index([
-                ("gameId", 1)
-            ], unique=True, background=True)
-            
-            # Insert or update each game
-            updated_count = 0
+            last_updated = datetime.utcnow().isoformat()
+            # Full history goes to the append-only plays collection first, so a failure here leaves
+            # the watermark and the recent-plays list untouched and the plays are picked up next run
+            new_plays = {game["gameId"]: game["newPlays"] for game in live_games if game.get("newPlays")}
+            with scraperMetrics.stage('write.plays'):
+                appended = append_plays(get_db(), PLAY_SOURCE, new_plays)
+                close_games(get_db(), PLAY_SOURCE, [
+                    game["gameId"] for game in live_games
+                    if game.get("gameStatusId") == 3 and game.get("newPlays") is not None
+                ])
+            operations = []
             for game in live_games:
-                try:
-                    result = live_games_collection.update_one(
-                        {"gameId": game["gameId"]},
-                        {"$set": {**game, "lastUpdated": datetime.utcnow().isoformat()}},
-                        upsert=True
-                    )
-                    
-                    if result.modified_count > 0 or result.upserted_id:
-                        updated_count += 1
-                except Exception as e:
-                    logger.error(f"Error updating live game data for game {game.get('gameId')}: {e}")
-            
-            logger.info(f"Successfully stored/updated {updated_count} live games")
+                fields = {key: value for key, value in game.items() if key != 'newPlays'}
+                update = {"$set": {**fields, "lastUpdated": last_updated}}
+                if game.get("newPlays"):
+                    update["$push"] = recent_plays_update(game["newPlays"])
+                operations.append(UpdateOne({"gameId": game["gameId"]}, update, upsert=True))
+            with scraperMetrics.stage('write.live_games'):
+                counts = bulk_upsert(get_collection('live_games'), operations)
+            updated_count = counts["upserted"] + counts["modified"]
+            logger.info(
+                f"Successfully stored/updated {updated_count} live games and {appended} new plays "
+                f"({counts['upserted']} new, {counts['modified']} modified, {counts['unchanged']} unchanged, {counts['failed']} failed)"
+            )
             return updated_count
             
         except Exception as e:
@@ -641,27 +729,62 @@ def run_daily_fetch():
         logger.error(f"Error in daily fetch: {e}")
         return 0
 
-if __name__ == "__main__":
+def season_date_range(season):
+    """Date range covering an NBA season given as e.g. 2024-25, capped at yesterday"""
+    start_year = int(season.split('-')[0])
+    yesterday = datetime.now().date() - timedelta(days=1)
+    return datetime(start_year, 10, 1).date(), min(datetime(start_year + 1, 6, 30).date(), yesterday)
+
+def main():
     import argparse
     
+    configure_logging()
+    
     parser = argparse.ArgumentParser(description='Fetch NBA player box scores')
     parser.add_argument('--date', type=str, help='Fetch specific date (MM/DD/YYYY)')
     parser.add_argument('--live', action='store_true', help='Fetch live game data')
+    parser.add_argument('--backfill', type=int, metavar='DAYS', help='Backfill the last DAYS days, ending yesterday')
+    parser.add_argument('--start', type=str, help='Backfill from this date (MM/DD/YYYY)')
+    parser.add_argument('--end', type=str, help='Backfill through this date (MM/DD/YYYY), defaults to yesterday')
+    parser.add_argument('--season', type=str, help='Backfill a whole season, e.g. 2024-25')
+    parser.add_argument('--workers', type=int, default=BACKFILL_WORKERS, help='Parallel backfill workers')
+    parser.add_argument('--no-resume', action='store_true', help='Refetch games a previous backfill already finished')
     
     args = parser.parse_args()
     
     api = NBABoxScoresAPI()
     
-    try:
-        if args.live:
-            today = datetime.now().date()
-            live_games = api.get_live_game_data(today)
-            api.store_live_games(live_games)
-        elif args.date:
-            date_obj = datetime.strptime(args.date, "%m/%d/%Y").date()
-            box_scores = api.get_box_scores(date_obj)
-            api.store_box_scores(box_scores)
-        else:
-            run_daily_fetch()
-    except Exception as e:
-        logger.error(f"Error in main execution: {e}")
\ No newline at end of file
+    if args.live:
+        mode = 'live'
+    elif args.backfill or args.start or args.season:
+        mode = 'backfill'
+    else:
+        mode = 'date' if args.date else 'daily'
+    with scraperMetrics.cycle('playersBoxScores', mode=mode):
+        try:
+            if args.live:
+                today = datetime.now().date()
+                live_games = api.get_live_game_data(today)
+                api.store_live_games(live_games)
+            elif args.backfill or args.start or args.season:
+                yesterday = datetime.now().date() - timedelta(days=1)
+                if args.season:
+                    start_date, end_date = season_date_range(args.season)
+                elif args.start:
+                    start_date = datetime.strptime(args.start, "%m/%d/%Y").date()
+                    end_date = datetime.strptime(args.end, "%m/%d/%Y").date() if args.end else yesterday
+                else:
+                    start_date, end_date = yesterday - timedelta(days=args.backfill - 1), yesterday
+                api.backfill(start_date, end_date, workers=args.workers, resume=not args.no_resume)
+            elif args.date:
+                date_obj = datetime.strptime(args.date, "%m/%d/%Y").date()
+                box_scores = api.get_box_scores(date_obj)
+                api.store_box_scores(box_scores)
+            else:
+                run_daily_fetch()
+        except Exception as e:
+            logger.error(f"Error in main execution: {e}")
+
+if __name__ == "__main__":
+    import profiling
+    profiling.run('playersBoxScores', main)
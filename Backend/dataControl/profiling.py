@@ -0,0 +1,145 @@
+import os
+import io
+import sys
+import time
+import pstats
+import signal
+import cProfile
+import logging
+import threading
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger('Scraper-Profiling')
+
+# One-run profiling for the scraper entry points, without editing them:
+#   python liveGames.py --profile            CPU profile
+#   python liveGames.py --profile=mem        CPU profile plus tracemalloc allocation snapshot
+#   SCRAPER_PROFILE=cpu|mem python ...       same, for runs started by scheduler.js
+# Writes <entry point>-YYYYmmdd-HHMMSS.prof (open with pstats or snakeviz), a .txt summary and, for mem,
+# an -alloc.txt report and a .snapshot to logs/profiles. Daemons write theirs on Ctrl-C or SIGTERM.
+
+PROFILE_DIR = os.getenv(
+    'SCRAPER_PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'profiles')
+)
+PROFILE_MODES = ('cpu', 'mem')
+# Functions and allocation sites listed in the text reports
+REPORT_LINES = int(os.getenv('SCRAPER_PROFILE_LINES', '40'))
+TRACEMALLOC_FRAMES = int(os.getenv('SCRAPER_PROFILE_FRAMES', '10'))
+
+def requested_mode(argv=None):
+    """'cpu', 'mem' or None, from --profile[=mode] (removed from argv) or SCRAPER_PROFILE"""
+    argv = sys.argv if argv is None else argv
+    mode = None
+    index = 1
+    while index < len(argv):
+        arg = argv[index]
+        if arg == '--profile':
+            del argv[index]
+            mode = 'cpu'
+            # Also accept "--profile mem"
+            if index < len(argv) and argv[index] in PROFILE_MODES:
+                mode = argv.pop(index)
+        elif arg.startswith('--profile='):
+            del argv[index]
+            mode = arg.partition('=')[2]
+        else:
+            index += 1
+    if mode is None:
+        env = os.getenv('SCRAPER_PROFILE', '').strip().lower()
+        if env in ('', '0', 'false', 'no'):
+            return None
+        mode = 'cpu' if env in ('1', 'true', 'yes') else env
+    if mode not in PROFILE_MODES:
+        raise SystemExit(f"Unknown profile mode {mode!r}, expected one of: {', '.join(PROFILE_MODES)}")
+    return mode
+
+class RunProfiler:
+    def __init__(self, name, mode):
+        self.name = name
+        self.mode = mode
+        self.profiler = cProfile.Profile()
+        # Worker threads each get their own profiler; merged into the main one at the end
+        self.thread_profilers = []
+        self.lock = threading.Lock()
+        self.threads_skipped = 0
+
+    def profile_thread(self, *args):
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Python 3.12+ allows one active cProfile at a time, so worker threads go unprofiled there
+            with self.lock:
+                self.threads_skipped += 1
+                first = self.threads_skipped == 1
+            if first:
+                logger.warning(f"Worker threads are not profiled on this interpreter, only the main thread is ({e})")
+            return
+        with self.lock:
+            self.thread_profilers.append(profiler)
+
+    def start(self):
+        if self.mode == 'mem':
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        threading.setprofile(self.profile_thread)
+        self.started = time.perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        threading.setprofile(None)
+        seconds = time.perf_counter() - self.started
+        snapshot = None
+        if self.mode == 'mem':
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+        stats = pstats.Stats(self.profiler)
+        with self.lock:
+            for profiler in self.thread_profilers:
+                try:
+                    stats.add(profiler)
+                except TypeError:
+                    # A thread that never recorded a call has no stats to merge
+                    pass
+        stats.dump_stats(base + '.prof')
+        summary = io.StringIO()
+        summary.write(
+            f"{self.name}: {seconds:.2f}s wall, {len(self.thread_profilers)} worker threads profiled"
+            f", {self.threads_skipped} not profiled\n\n"
+        )
+        stats.stream = summary
+        stats.sort_stats('cumulative').print_stats(REPORT_LINES)
+        stats.sort_stats('tottime').print_stats(REPORT_LINES)
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+
+        if snapshot is not None:
+            snapshot.dump(base + '.snapshot')
+            with open(base + '-alloc.txt', 'w', encoding='utf-8') as f:
+                f.write(f"{self.name}: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+                for stat in snapshot.statistics('lineno')[:REPORT_LINES]:
+                    f.write(f"{stat}\n")
+        logger.info(f"Profile for {self.name} written to {base}.prof")
+        return base
+
+def run(name, main, argv=None):
+    """Run an entry point's main(), profiled when --profile or SCRAPER_PROFILE asks for it"""
+    mode = requested_mode(argv)
+    if mode is None:
+        return main()
+    run_profiler = RunProfiler(name, mode)
+    # The scheduler stops daemons with SIGTERM; turn it into an exit so the profile still gets written
+    previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    run_profiler.start()
+    try:
+        return main()
+    finally:
+        run_profiler.stop()
+        signal.signal(signal.SIGTERM, previous_handler)
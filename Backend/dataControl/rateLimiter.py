@@ -0,0 +1,97 @@
+import os
+import time
+import sqlite3
+import threading
+
+# stats.nba.com starts refusing connections well before it returns 429s, so stay conservative
+NBA_STATS_RATE_PER_SECOND = float(os.getenv('NBA_STATS_RATE_PER_SECOND', '1.5'))
+NBA_STATS_BURST = int(os.getenv('NBA_STATS_BURST', '3'))
+# Bucket state shared by every scraper process on the machine (cron jobs, the worker, backfills)
+RATE_LIMIT_DB = os.getenv(
+    'SCRAPER_RATE_LIMIT_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'rate-limits.db')
+)
+
+class TokenBucket:
+    """Thread-safe token bucket: acquire() blocks until a request may be sent."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                self.refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ProcessSharedTokenBucket:
+    """Token bucket whose state lives in SQLite, so concurrent processes draw from one budget.
+
+    Each acquire is one short BEGIN IMMEDIATE transaction; SQLite's write lock serializes
+    the read-refill-take step across processes and the thread lock across threads.
+    """
+
+    def __init__(self, name, rate, capacity, path=RATE_LIMIT_DB):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+
+    def take(self, tokens):
+        # Returns 0 once the tokens are taken, otherwise how long to wait before trying again
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = self.conn.execute('SELECT tokens, updated FROM buckets WHERE name = ?', (self.name,)).fetchone()
+                available = self.capacity if row is None else min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = 0.0
+                if available >= tokens:
+                    available -= tokens
+                else:
+                    wait = (tokens - available) / self.rate
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                    (self.name, available, now)
+                )
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+        return wait
+
+    def acquire(self, tokens=1):
+        while True:
+            wait = self.take(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def host_bucket(host, rate, capacity):
+    # One bucket per host across all processes; set SCRAPER_RATE_LIMIT_SHARED=0 to keep it per process
+    with _buckets_lock:
+        if host not in _buckets:
+            if os.getenv('SCRAPER_RATE_LIMIT_SHARED', '1') == '0':
+                _buckets[host] = TokenBucket(rate, capacity)
+            else:
+                _buckets[host] = ProcessSharedTokenBucket(host, rate, capacity)
+        return _buckets[host]
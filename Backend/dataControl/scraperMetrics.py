@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+logger = logging.getLogger('Scraper-Metrics')
+
+# Per-stage timing for the ingestion scripts. Each run (or daemon poll) is a cycle; stages inside it
+# (fetch, parse, write, ...) are timed, optionally per game, with byte counts and duration histograms.
+# A finished cycle is appended as one JSON line to logs/metrics/<entry point>-YYYY-MM-DD.jsonl, next
+# to the scheduler logs.
+#
+#   with scraperMetrics.cycle('liveGames', budget_seconds=20):
+#       with scraperMetrics.stage('fetch.boxscore', game=game_id):
+#           ...
+#
+# HTTP responses from httpClient add their size to every stage open on the requesting thread.
+
+METRICS_DIR = os.getenv(
+    'SCRAPER_METRICS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs', 'metrics')
+)
+# Set SCRAPER_METRICS=0 to time nothing and write nothing
+SCRAPER_METRICS = os.getenv('SCRAPER_METRICS', '1') != '0'
+# Histogram upper bounds in milliseconds; the last bucket counts everything slower
+HISTOGRAM_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000)
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def record(self, seconds, nbytes=0):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += nbytes
+        millis = seconds * 1000
+        bucket = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if millis <= bound), len(HISTOGRAM_BUCKETS_MS))
+        self.histogram[bucket] += 1
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "seconds": round(self.seconds, 4),
+            "maxSeconds": round(self.max_seconds, 4),
+            "bytes": self.bytes,
+            "histogram": self.histogram,
+        }
+
+class Span:
+    def __init__(self, name, game):
+        self.name = name
+        self.game = game
+        self.bytes = 0
+
+class Cycle:
+    def __init__(self, entry_point, budget_seconds=None, **labels):
+        self.entry_point = entry_point
+        self.budget_seconds = budget_seconds
+        self.labels = labels
+        self.started_at = datetime.utcnow()
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.games = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds, nbytes=0, game=None):
+        with self.lock:
+            self.stages.setdefault(name, StageStats()).record(seconds, nbytes)
+            if game is not None:
+                self.games.setdefault(str(game), {}).setdefault(name, StageStats()).record(seconds, nbytes)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        seconds = time.perf_counter() - self.start
+        with self.lock:
+            record = {
+                "entryPoint": self.entry_point,
+                "startedAt": self.started_at.isoformat() + 'Z',
+                "seconds": round(seconds, 4),
+                **self.labels,
+                "counters": dict(self.counters),
+                "stages": {name: stats.to_dict() for name, stats in self.stages.items()},
+                "games": {
+                    game: {name: {"seconds": round(stats.seconds, 4), "bytes": stats.bytes} for name, stats in stages.items()}
+                    for game, stages in self.games.items()
+                },
+                "histogramBucketsMs": HISTOGRAM_BUCKETS_MS,
+            }
+        if self.budget_seconds is not None:
+            record["budgetSeconds"] = self.budget_seconds
+            record["overBudget"] = seconds > self.budget_seconds
+        return record
+
+_local = threading.local()
+# Pool threads started inside a cycle do not inherit the thread-local one, so fall back to the latest
+_latest_cycle = None
+_write_lock = threading.Lock()
+
+def current_cycle():
+    return getattr(_local, 'cycle', None) or _latest_cycle
+
+def metrics_path(entry_point, day=None):
+    return os.path.join(METRICS_DIR, f"{entry_point}-{(day or datetime.now()).strftime('%Y-%m-%d')}.jsonl")
+
+def write_record(record):
+    path = metrics_path(record["entryPoint"])
+    line = json.dumps(record, default=str) + '\n'
+    with _write_lock:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+    return path
+
+@contextmanager
+def cycle(entry_point, budget_seconds=None, **labels):
+    """Time one run of an entry point and append its metrics line when it ends"""
+    global _latest_cycle
+    if not SCRAPER_METRICS:
+        yield None
+        return
+    current = Cycle(entry_point, budget_seconds, **labels)
+    previous = getattr(_local, 'cycle', None)
+    _local.cycle = _latest_cycle = current
+    try:
+        yield current
+    finally:
+        _local.cycle = previous
+        if _latest_cycle is current:
+            _latest_cycle = previous
+        record = current.to_dict()
+        try:
+            path = write_record(record)
+        except OSError as e:
+            logger.warning(f"Could not write metrics for {entry_point}: {e}")
+            path = None
+        if record.get("overBudget"):
+            slowest = max(record["stages"].items(), key=lambda item: item[1]["seconds"], default=(None, None))[0]
+            logger.warning(
+                f"{entry_point} took {record['seconds']:.2f}s, over its {budget_seconds}s budget; "
+                f"slowest stage: {slowest} (see {path})"
+            )
+
+@contextmanager
+def stage(name, game=None):
+    """Time a block as a stage of the current cycle; a no-op outside any cycle"""
+    active = current_cycle()
+    if active is None:
+        yield None
+        return
+    span = Span(name, game)
+    spans = _local.__dict__.setdefault('spans', [])
+    spans.append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        spans.remove(span)
+        active.record(name, time.perf_counter() - start, span.bytes, game)
+
+def count(name, value=1):
+    active = current_cycle()
+    if active is not None:
+        active.count(name, value)
+
+def record_http(host, seconds, nbytes):
+    # Called by httpClient for every response
+    active = current_cycle()
+    if active is None:
+        return
+    active.record(f"http.{host}", seconds, nbytes)
+    for span in getattr(_local, 'spans', ()):
+        span.bytes += nbytes
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import scraperMetrics
+
+# Long-lived process that keeps the scrapers, their HTTP sessions and MongoDB clients warm and serves
+# on-demand refreshes to Node over a local socket, instead of Node spawning a fresh interpreter per request.
+#
+# Protocol: one JSON object per line in each direction.
+#   -> {"id": 1, "method": "nba.update_live_games", "params": {}}
+#   <- {"id": 1, "result": {...}}  or  {"id": 1, "error": "..."}
+# Identical requests (same method and params) already in flight share one execution.
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('Scraper-Worker')
+load_dotenv()
+
+WORKER_HOST = os.getenv('SCRAPER_WORKER_HOST', '127.0.0.1')
+WORKER_PORT = int(os.getenv('SCRAPER_WORKER_PORT', '8766'))
+# Scraper calls running at once; further distinct requests queue behind them
+WORKER_THREADS = int(os.getenv('SCRAPER_WORKER_THREADS', '4'))
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+def to_json(value):
+    # Scraper results carry numpy scalars and datetimes straight from pandas
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class Scrapers:
+    """Scraper instances created on first use and kept for the life of the worker.
+
+    The NBA box score client is safe to share between threads (its backfill already does);
+    the live game scrapers keep per-instance state, so each runs one call at a time.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.instances = {}
+        self.call_locks = {'nba-live': threading.Lock(), 'mlb-live': threading.Lock()}
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.instances:
+                self.instances[name] = self.create(name)
+            return self.instances[name]
+
+    def create(self, name):
+        start = time.perf_counter()
+        if name == 'nba-box-scores':
+            import playersBoxScores
+            instance = playersBoxScores.NBABoxScoresAPI()
+        elif name == 'nba-live':
+            import liveGames
+            instance = liveGames.NBALiveGamesAPI()
+        elif name == 'mlb-live':
+            import mlbLiveGames
+            instance = mlbLiveGames.MLBLiveGamesAPI()
+        else:
+            raise KeyError(name)
+        logger.info(f"Loaded {name} scraper in {time.perf_counter() - start:.2f}s")
+        return instance
+
+    def run_exclusive(self, name, method):
+        instance = self.get(name)
+        with self.call_locks[name]:
+            return method(instance)
+
+    def close(self):
+        with self.lock:
+            for instance in self.instances.values():
+                if hasattr(instance, 'cleanup'):
+                    instance.cleanup()
+            self.instances.clear()
+
+def parse_date(params):
+    date = params.get('date')
+    return datetime.strptime(date, "%m/%d/%Y").date() if date else datetime.now().date()
+
+def get_live_game_data(scrapers, params):
+    return scrapers.get('nba-box-scores').get_live_game_data(parse_date(params))
+
+def store_live_games(scrapers, params):
+    return scrapers.get('nba-box-scores').store_live_games(params.get('games', []))
+
+def update_live_games(scrapers, params):
+    # Same as `playersBoxScores.py --live`
+    api = scrapers.get('nba-box-scores')
+    with scraperMetrics.cycle('playersBoxScores', mode='live', source='worker'):
+        live_games = api.get_live_game_data(parse_date(params))
+        return {"games": len(live_games), "stored": api.store_live_games(live_games)}
+
+def get_box_scores(scrapers, params):
+    return scrapers.get('nba-box-scores').get_box_scores(parse_date(params))
+
+def update_box_scores(scrapers, params):
+    # Same as `playersBoxScores.py --date MM/DD/YYYY`
+    api = scrapers.get('nba-box-scores')
+    with scraperMetrics.cycle('playersBoxScores', mode='date', source='worker'):
+        box_scores = api.get_box_scores(parse_date(params))
+        return {"boxScores": len(box_scores), "stored": api.store_box_scores(box_scores)}
+
+def refresh_nba_live_games(scrapers, params):
+    # Same as `liveGames.py`
+    return {"success": bool(scrapers.run_exclusive('nba-live', lambda api: api.process_live_games()))}
+
+def refresh_mlb_live_games(scrapers, params):
+    # One pass over today's games, as `mlbLiveGames.py` without --daemon
+    scrapers.run_exclusive('mlb-live', lambda api: api.process_live_games())
+    return {"success": True}
+
+METHODS = {
+    'ping': lambda scrapers, params: "pong",
+    'nba.get_live_game_data': get_live_game_data,
+    'nba.store_live_games': store_live_games,
+    'nba.update_live_games': update_live_games,
+    'nba.get_box_scores': get_box_scores,
+    'nba.update_box_scores': update_box_scores,
+    'nba.refresh_live_games': refresh_nba_live_games,
+    'mlb.refresh_live_games': refresh_mlb_live_games,
+}
+
+class ScraperWorker:
+    def __init__(self, threads=WORKER_THREADS):
+        self.scrapers = Scrapers()
+        self.threads = threads
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='scraper')
+        self.in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def call(self, method, params):
+        handler = METHODS.get(method)
+        if handler is None:
+            raise ValueError(f"Unknown method {method!r}")
+        key = (method, json.dumps(params, sort_keys=True, default=str))
+        self.calls += 1
+        task = self.in_flight.get(key)
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(self.pool, handler, self.scrapers, params))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight {method} call")
+        # shield: a client hanging up must not cancel the call for everyone else waiting on it
+        return await asyncio.shield(task)
+
+    async def handle_request(self, line, writer, write_lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            start = time.perf_counter()
+            result = await self.call(request['method'], request.get('params') or {})
+            logger.info(f"{request['method']} answered in {time.perf_counter() - start:.2f}s")
+            response = {"id": request_id, "result": result}
+        except Exception as e:
+            logger.error(f"Request failed: {e}")
+            response = {"id": request_id, "error": str(e)}
+        async with write_lock:
+            writer.write(json.dumps(response, default=to_json).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        # Requests on one connection may run concurrently; responses carry the request id
+        write_lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(self.handle_request(line, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=WORKER_HOST, port=WORKER_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_BYTES)
+        logger.info(f"Scraper worker listening on {host}:{port} with {self.threads} threads")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+        self.scrapers.close()
+        logger.info(f"Scraper worker stopped after {self.calls} calls, {self.coalesced} coalesced")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve scraper calls to the Node backend over a local socket')
+    parser.add_argument('--host', default=WORKER_HOST)
+    parser.add_argument('--port', type=int, default=WORKER_PORT)
+    parser.add_argument('--threads', type=int, default=WORKER_THREADS)
+    args = parser.parse_args()
+
+    worker = ScraperWorker(threads=args.threads)
+    try:
+        asyncio.run(worker.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.close()
+
+if __name__ == "__main__":
+    main()
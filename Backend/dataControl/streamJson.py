@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import codecs
+
+# Streaming extraction of selected sub-trees from a large JSON object.
+# Only values at the requested paths are materialized; everything else is
+# skipped one small piece at a time, so peak memory follows the kept
+# sub-trees instead of the whole document.
+
+STRING_RE = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+DECODER = json.JSONDecoder()
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+# How many container levels a skipped value is walked into before the rest is
+# decoded and dropped in one go. Two levels turn e.g. allPlays into one play at a time.
+SKIP_LEVELS = 2
+COMPACT_AFTER = 1 << 20
+# Path component matching every key of an object, e.g. ("gameData", "players", "*", "strikeZoneTop")
+WILDCARD = '*'
+# Set SCRAPER_STREAM_JSON=0 to fall back to parsing whole documents
+STREAM_JSON = os.getenv('SCRAPER_STREAM_JSON', '1') != '0'
+
+class JsonStream:
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                if self.pos > COMPACT_AFTER:
+                    self.buf = self.buf[self.pos:]
+                    self.pos = 0
+                self.buf += text
+                return True
+        self.buf += self.decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def fill_more(self):
+        # Grow the unread part geometrically so retried decodes stay linear overall
+        target = max(2 * (len(self.buf) - self.pos), 64 * 1024)
+        while len(self.buf) - self.pos < target and self.fill():
+            pass
+
+    def peek(self):
+        while True:
+            self.pos = WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {self.buf[self.pos]!r}")
+        self.pos += 1
+
+    def read_string(self):
+        self.peek()
+        while True:
+            match = STRING_RE.match(self.buf, self.pos)
+            if match:
+                self.pos = match.end()
+                raw = match.group()
+                return raw[1:-1] if '\\' not in raw else json.loads(raw)
+            if not self.fill():
+                raise ValueError("Unterminated string in JSON stream")
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self.fill_more()
+                continue
+            if not self.eof and not isinstance(value, (dict, list, str)) and (
+                end == len(self.buf) or self.buf[end] in NUMBER_CHARS
+            ):
+                # A number may continue in the next chunk, e.g. "-25" + "00.5"
+                self.fill_more()
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self, levels=SKIP_LEVELS):
+        char = self.peek()
+        if levels <= 0 or char not in '{[':
+            self.read_value()
+            return
+        self.pos += 1
+        closing = '}' if char == '{' else ']'
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            if char == '{':
+                self.read_string()
+                self.expect(':')
+            self.skip_value(levels - 1)
+            separator = self.peek()
+            self.pos += 1
+            if separator == closing:
+                return
+            if separator != ',':
+                raise ValueError(f"Unexpected {separator!r} in JSON stream")
+
+    def read_object(self, tree):
+        result = {}
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return result
+        while True:
+            key = self.read_string()
+            self.expect(':')
+            subtree = tree.get(key, tree.get(WILDCARD))
+            if subtree is True:
+                result[key] = self.read_value()
+            elif subtree and self.peek() == '{':
+                result[key] = self.read_object(subtree)
+            else:
+                self.skip_value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return result
+            if separator != ',':
+                raise ValueError(f"Unexpected {separator!r} in JSON stream")
+
+def build_path_tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        for key in path[:-1]:
+            child = node.setdefault(key, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[path[-1]] = True
+    return tree
+
+def prune_value(value, tree):
+    # Same selection as read_object, applied to an already parsed value
+    if tree is True:
+        return value
+    if not isinstance(value, dict):
+        return None
+    result = {}
+    for key, item in value.items():
+        subtree = tree.get(key, tree.get(WILDCARD))
+        if subtree is True:
+            result[key] = item
+        elif subtree and isinstance(item, dict):
+            result[key] = prune_value(item, subtree)
+    return result
+
+def extract_json_paths(chunks, paths):
+    """Parse a JSON object from an iterable of byte chunks, keeping only the given key paths.
+
+    paths is a list of key tuples such as ("liveData", "boxscore", "teams"); the
+    result is a nested dict containing just those sub-trees.
+    """
+    return JsonStream(chunks).read_object(build_path_tree(paths))
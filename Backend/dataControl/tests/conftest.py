@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scrapers import each other as flat modules from Backend/dataControl
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing under test should append metrics lines to Backend/logs
+os.environ.setdefault('SCRAPER_METRICS', '0')
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from fantasyScoring import AUCTION_METRICS, DEFAULT_PROFILE, PROFILES, fantasy_fields, score_box_scores
+
+ROWS = [
+    # double-double: pts/reb at 10+
+    {'pts': 20, 'reb': 10, 'ast': 3, 'stl': 1, 'blk': 2, 'tpm': 2, 'tov': 3},
+    # triple-double
+    {'pts': 12, 'reb': 11, 'ast': 10, 'stl': 0, 'blk': 0, 'tpm': 1, 'tov': 4},
+    # no bonus
+    {'pts': 8, 'reb': 2, 'ast': 1, 'stl': 2, 'blk': 0, 'tpm': 0, 'tov': 1},
+    # four categories still only earn the triple-double bonus
+    {'pts': 10, 'reb': 10, 'ast': 10, 'stl': 10, 'blk': 0, 'tpm': 0, 'tov': 0},
+]
+
+# Worked by hand from the published DraftKings/FanDuel NBA rules
+EXPECTED = {
+    'draftkings': [
+        20 + 2 * 0.5 + 10 * 1.25 + 3 * 1.5 + 1 * 2 + 2 * 2 - 3 * 0.5 + 1.5,  # 44.0
+        12 + 1 * 0.5 + 11 * 1.25 + 10 * 1.5 - 4 * 0.5 + 3,                   # 42.25
+        8 + 2 * 1.25 + 1 * 1.5 + 2 * 2 - 1 * 0.5,                            # 15.5
+        10 + 10 * 1.25 + 10 * 1.5 + 10 * 2 + 3,                              # 60.5
+    ],
+    'fanduel': [
+        20 + 10 * 1.2 + 3 * 1.5 + 1 * 3 + 2 * 3 - 3,                         # 42.5
+        12 + 11 * 1.2 + 10 * 1.5 - 4,                                         # 36.2
+        8 + 2 * 1.2 + 1 * 1.5 + 2 * 3 - 1,                                    # 16.9
+        10 + 10 * 1.2 + 10 * 1.5 + 10 * 3,                                    # 67.0
+    ],
+}
+
+def test_sportsbook_profiles_match_hand_computed_points():
+    scores = score_box_scores(ROWS)
+    for name, expected in EXPECTED.items():
+        assert scores[name].tolist() == pytest.approx(expected), name
+    assert scores['draftkings'].tolist() == pytest.approx([44.0, 42.25, 15.5, 60.5])
+
+def test_auction_profiles_sum_the_settled_metric():
+    scores = score_box_scores(ROWS)
+    for metric, fields in AUCTION_METRICS.items():
+        expected = [sum(row[field] for field in fields) for row in ROWS]
+        assert scores[f'auction:{metric}'].tolist() == pytest.approx(expected), metric
+    assert scores['auction:points + rebounds + assists'].tolist() == [33, 33, 11, 30]
+
+def test_every_profile_is_scored():
+    assert list(score_box_scores(ROWS).columns) == list(PROFILES)
+
+def test_missing_and_unparseable_stats_count_as_zero():
+    frame = pd.DataFrame({'pts': ['15', None], 'reb': ['n/a', 10]})
+    scores = score_box_scores(frame, ['draftkings', 'fanduel'])
+    assert scores['draftkings'].tolist() == pytest.approx([15.0, 12.5])
+    assert scores['fanduel'].tolist() == pytest.approx([15.0, 12.0])
+
+def test_empty_frame_scores_to_empty_columns():
+    scores = score_box_scores(pd.DataFrame(columns=['pts', 'reb']))
+    assert scores.empty
+    assert list(scores.columns) == list(PROFILES)
+
+def test_fantasy_fields_pairs_all_scores_with_default_points():
+    scores, points = fantasy_fields(ROWS)
+    assert len(scores) == len(ROWS)
+    assert points == [score[DEFAULT_PROFILE] for score in scores]
+    assert scores[0]['fanduel'] == pytest.approx(42.5)
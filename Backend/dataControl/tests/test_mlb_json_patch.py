@@ -0,0 +1,112 @@
+import pytest
+
+import mlbLiveGames
+from mlbLiveGames import apply_json_patch, changed_play_indices, retained_operations
+from streamJson import WILDCARD, build_path_tree
+
+def test_add_replace_remove_on_objects():
+    doc = {"a": 1, "b": {"c": 2}}
+    doc = apply_json_patch(doc, [
+        {"op": "add", "path": "/d", "value": 4},
+        {"op": "replace", "path": "/b/c", "value": 3},
+        {"op": "remove", "path": "/a"},
+    ])
+    assert doc == {"b": {"c": 3}, "d": 4}
+
+def test_list_insert_append_and_index_shifting():
+    doc = {"plays": ["p0", "p1", "p2"]}
+    doc = apply_json_patch(doc, [
+        {"op": "add", "path": "/plays/1", "value": "new"},
+        {"op": "add", "path": "/plays/-", "value": "last"},
+        {"op": "remove", "path": "/plays/0"},
+        {"op": "replace", "path": "/plays/2", "value": "P2"},
+    ])
+    # new went in at 1, so p2 moved to 3 and then, after removing p0, to 2
+    assert doc == {"plays": ["new", "p1", "P2", "last"]}
+
+def test_move_copy_test_and_escaped_pointers():
+    doc = {"a/b": {"x": [1]}, "m~n": 5, "list": [1, 2]}
+    doc = apply_json_patch(doc, [
+        {"op": "test", "path": "/m~0n", "value": 5},
+        {"op": "copy", "from": "/a~1b/x", "path": "/copied"},
+        {"op": "move", "from": "/list/0", "path": "/list/-"},
+        {"op": "replace", "path": "/m~0n", "value": 6},
+    ])
+    doc["copied"].append(2)
+    assert doc == {"a/b": {"x": [1]}, "m~n": 6, "list": [2, 1], "copied": [1, 2]}
+
+def test_root_replace_and_root_remove():
+    assert apply_json_patch({"a": 1}, [{"op": "replace", "path": "", "value": {"b": 2}}]) == {"b": 2}
+    with pytest.raises(ValueError):
+        apply_json_patch({"a": 1}, [{"op": "remove", "path": ""}])
+
+def test_unsupported_op_raises():
+    with pytest.raises(ValueError):
+        apply_json_patch({"a": 1}, [{"op": "merge", "path": "/a", "value": 2}])
+
+def play_path(*tokens):
+    return "/liveData/plays/allPlays/" + "/".join(str(token) for token in tokens)
+
+@pytest.mark.parametrize("operations, expected", [
+    # Edits inside stored plays list those plays
+    ([{"op": "replace", "path": play_path(2, "result", "rbi"), "value": 1}], {2}),
+    ([{"op": "add", "path": play_path(0, "playEvents", "-"), "value": {}},
+      {"op": "remove", "path": play_path(3, "count", "outs")}], {0, 3}),
+    # Whole plays replaced in place
+    ([{"op": "replace", "path": play_path(1), "value": {}}], {1}),
+    # New plays past the stored count or appended with "-" are left to the caller
+    ([{"op": "add", "path": play_path(5), "value": {}}, {"op": "add", "path": play_path("-"), "value": {}}], set()),
+    # Paths outside allPlays touch no play
+    ([{"op": "replace", "path": "/liveData/linescore/currentInning", "value": 7}], set()),
+    # A move reports both ends
+    ([{"op": "move", "from": play_path(1, "about"), "path": play_path(4, "about")}], {1, 4}),
+])
+def test_changed_play_indices(operations, expected):
+    assert changed_play_indices(operations, stored_count=5) == expected
+
+@pytest.mark.parametrize("operation", [
+    # Inserting or removing a stored play shifts every index after it
+    {"op": "add", "path": play_path(2), "value": {}},
+    {"op": "remove", "path": play_path(4)},
+    # Replacing the whole list, or the whole document
+    {"op": "replace", "path": "/liveData/plays/allPlays", "value": []},
+    {"op": "replace", "path": "", "value": {}},
+    # Strike zone changes alter every pitch of that batter
+    {"op": "replace", "path": "/gameData/players/ID1/strikeZoneTop", "value": 3.4},
+])
+def test_changed_play_indices_requires_rebuild(operation):
+    assert changed_play_indices([operation], stored_count=5) is None
+
+def test_retained_operations_drops_and_prunes():
+    tree = build_path_tree([("gameData", "status"), ("liveData", "plays", "allPlays", WILDCARD, "result")])
+    operations = [
+        {"op": "replace", "path": "/gameData/status", "value": {"abstractGameState": "Final"}},
+        {"op": "replace", "path": "/gameData/venue", "value": {"name": "Park"}},
+        {"op": "test", "path": "/gameData/status", "value": {}},
+        {"op": "add", "path": play_path(3), "value": {"result": {"rbi": 1}, "matchup": {"batter": 1}}},
+    ]
+    assert retained_operations(operations, tree) == [
+        {"op": "replace", "path": "/gameData/status", "value": {"abstractGameState": "Final"}},
+        {"op": "add", "path": play_path(3), "value": {"result": {"rbi": 1}}},
+    ]
+
+def test_retained_operations_rejects_moves_from_skipped_paths():
+    tree = build_path_tree([("liveData", "plays", "allPlays")])
+    with pytest.raises(ValueError):
+        retained_operations([{"op": "move", "from": "/gameData/venue", "path": play_path(0)}], tree)
+
+def test_bad_patch_falls_back_to_full_fetch(monkeypatch):
+    monkeypatch.setattr(mlbLiveGames, "STREAM_JSON", False)
+    api = mlbLiveGames.MLBLiveGamesAPI.__new__(mlbLiveGames.MLBLiveGamesAPI)
+    api.incremental = True
+    api.feed_state = {1: {"feed": {"gameData": {"status": {}}}, "timeStamp": "t1", "playCount": 0}}
+    api.game_status = {}
+    status, writes = api.prepare_game_writes(1, [{"diff": [{"op": "merge", "path": "/gameData", "value": {}}]}])
+    assert (status, writes) == (None, [])
+    assert 1 not in api.feed_state
+
+    fetched = []
+    api.fetch_game_diff = lambda game_pk, timecode: pytest.fail("diffPatch used without feed state")
+    api.fetch_game_data = lambda game_pk, conditional=False: fetched.append(game_pk) or {"full": True}
+    assert api.fetch_game_update(1) == {"full": True}
+    assert fetched == [1]
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from playersBoxScores import parse_minutes
+
+@pytest.mark.parametrize("raw, minutes", [
+    ("12:34", 12 + 34 / 60),
+    ("20.000000:12", 20 + 12 / 60),
+    ("0:45", 0.75),
+    ("25", 25.0),
+    ("31.5", 31.5),
+    ("PT25M01.00S", 25 + 1 / 60),
+    ("PT00M30.00S", 0.5),
+    ("PT12M", 12.0),
+    ("PT", 0.0),
+    ("", 0.0),
+    (None, 0.0),
+    (float('nan'), 0.0),
+    # Old per-row fallback: keep the digits and dots of anything else
+    ("DNP 3", 3.0),
+])
+def test_parse_minutes_formats(raw, minutes):
+    assert parse_minutes(pd.Series([raw], dtype=object)).iloc[0] == pytest.approx(minutes)
+
+def test_parse_minutes_keeps_index_and_order():
+    values = pd.Series(["PT05M30.00S", "10:00", "", "7"], index=[4, 2, 9, 1])
+    result = parse_minutes(values)
+    assert list(result.index) == [4, 2, 9, 1]
+    assert result.tolist() == pytest.approx([5.5, 10.0, 0.0, 7.0])
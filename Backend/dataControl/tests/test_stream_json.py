@@ -0,0 +1,74 @@
+import os
+import json
+import random
+
+import pytest
+
+from streamJson import WILDCARD, build_path_tree, extract_json_paths, prune_value
+
+SAMPLE_FEED = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'mlb_feed_live.json')
+
+def chunked(data, size):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+def random_chunks(data, seed):
+    rng = random.Random(seed)
+    chunks, start = [], 0
+    while start < len(data):
+        end = start + rng.randint(1, 64)
+        chunks.append(data[start:end])
+        start = end
+    return chunks
+
+def extract(text, paths, size=None):
+    data = text.encode('utf-8')
+    return extract_json_paths(chunked(data, size) if size else [data], paths)
+
+def expected(text, paths):
+    return prune_value(json.loads(text), build_path_tree(paths))
+
+def test_nested_objects():
+    text = '{"a": {"b": {"c": 1, "d": 2}, "e": 3}, "f": {"b": {"c": 4}}}'
+    assert extract(text, [("a", "b", "c"), ("f",)]) == {"a": {"b": {"c": 1}}, "f": {"b": {"c": 4}}}
+
+def test_arrays_are_kept_whole_and_skipped_whole():
+    text = '{"keep": [1, [2, {"x": [3]}], {"y": null}], "skip": [[1, 2], {"z": [true, false]}], "n": -2.5e3}'
+    assert extract(text, [("keep",), ("n",)]) == {"keep": [1, [2, {"x": [3]}], {"y": None}], "n": -2500.0}
+
+def test_escaped_strings_in_keys_and_values():
+    text = r'{"a\"b": "q\"uote\\d \/ é😀", "skip\\me": "x\"}", "c": {"d\n": "line\nbreak"}}'
+    assert extract(text, [('a"b',), ("c", "d\n")]) == {'a"b': 'q"uote\\d / é😀', "c": {"d\n": "line\nbreak"}}
+
+def test_missing_paths_are_absent():
+    text = '{"a": {"b": 1}, "c": [1, 2]}'
+    assert extract(text, [("a", "x"), ("missing", "deeper"), ("c", "0")]) == {"a": {}}
+
+def test_wildcard_matches_every_key():
+    text = '{"players": {"ID1": {"zone": 3.1, "name": "A"}, "ID2": {"zone": 3.4, "name": "B"}}}'
+    assert extract(text, [("players", WILDCARD, "zone")]) == {"players": {"ID1": {"zone": 3.1}, "ID2": {"zone": 3.4}}}
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_values_split_across_chunks(size):
+    # Numbers, escapes and multi-byte characters all straddle chunk boundaries at these sizes
+    text = '{"n": -1234.5e-2, "s": "José \\"R\\u00e1m\\u00edrez\\"", "skip": {"deep": [1, {"x": "ü"}]}, "t": true}'
+    paths = [("n",), ("s",), ("t",)]
+    assert extract(text, paths, size) == expected(text, paths)
+
+def test_invalid_json_raises():
+    with pytest.raises(ValueError):
+        extract('{"a": {"b": 1}', [("a",)])
+    with pytest.raises(ValueError):
+        extract('{"a" 1}', [("a",)])
+
+def test_sample_feed_matches_json_loads():
+    from mlbLiveGames import LIVE_FEED_PATHS
+    from mlbResults.mlbBoxScores import BOXSCORE_PATHS
+    with open(SAMPLE_FEED, 'rb') as f:
+        data = f.read()
+    text = data.decode('utf-8')
+    for paths in (LIVE_FEED_PATHS, BOXSCORE_PATHS, [("gameData",), ("liveData", "plays", "allPlays")]):
+        wanted = expected(text, paths)
+        assert extract_json_paths([data], paths) == wanted
+        assert extract_json_paths(random_chunks(data, seed=len(paths)), paths) == wanted
+    # Every top-level key requested is the whole document again
+    assert extract_json_paths(chunked(data, 5), [(key,) for key in json.loads(text)]) == json.loads(text)
@@ -0,0 +1,12 @@
+import os
+
+# Upstream API roots. Point them at bench/replay.py to run the scrapers against recorded responses,
+# e.g. MLB_STATSAPI_BASE=http://127.0.0.1:8765/statsapi.mlb.com
+STATSAPI_BASE = os.getenv('MLB_STATSAPI_BASE', 'https://statsapi.mlb.com').rstrip('/')
+NBA_CDN_BASE = os.getenv('NBA_CDN_BASE', 'https://cdn.nba.com').rstrip('/')
+NBA_STATS_BASE = os.getenv('NBA_STATS_BASE', 'https://stats.nba.com').rstrip('/')
+
+def configure_nba_api():
+    # nba_api builds its request URLs from a class attribute rather than taking a base URL
+    from nba_api.stats.library.http import NBAStatsHTTP
+    NBAStatsHTTP.base_url = f"{NBA_STATS_BASE}/stats/{{endpoint}}"
@@ -6,16 +6,24 @@ const { spawn } = require('child_process');
 const path = require('path');
 const moment = require('moment');
 
+const { callScraper, isWorkerUnavailable } = require('../scraperWorkerClient');
+
 // Helper function to run the Python script
-const runPythonScript = async (args = []) => {
+const runPythonScript = async (args = [], script = 'playersBoxScores.py', timeoutMs = 0) => {
   return new Promise((resolve, reject) => {
-    const scriptPath = path.join(__dirname, '../dataControl/playersBoxScores.py');
+    const scriptPath = path.join(__dirname, '../dataControl', script);
     
     const pythonProcess = spawn('python', [scriptPath, ...args]);
     
     let stdoutData = '';
     let stderrData = '';
     
+    // Set a timeout to ensure we don't wait too long
+    const timeout = timeoutMs ? setTimeout(() => {
+      console.log(`[GAMES-API] ${script} taking too long, killing process...`);
+      pythonProcess.kill();
+    }, timeoutMs) : null;
+    
     pythonProcess.stdout.on('data', (data) => {
       stdoutData += data.toString();
     });
@@ -25,6 +33,7 @@ const runPythonScript = async (args = []) => {
     });
     
     pythonProcess.on('close', (code) => {
+      if (timeout) clearTimeout(timeout);
       if (code !== 0) {
         console.error(`Python process exited with code ${code}`);
         console.error(`Error output: ${stderrData}`);
@@ -36,6 +45,21 @@ const runPythonScript = async (args = []) => {
   });
 };
 
+// Runs a scraper call on the resident worker (dataControl/scraperWorker.py), which keeps its
+// connections warm and coalesces identical concurrent calls. Falls back to spawning the script
+// with the equivalent arguments when the worker is not running.
+const runScraper = async (method, params = {}, { script = 'playersBoxScores.py', args = [], timeoutMs = 60000 } = {}) => {
+  try {
+    return await callScraper(method, params, timeoutMs);
+  } catch (err) {
+    if (!isWorkerUnavailable(err)) throw err;
+    console.log(`[GAMES-API] Scraper worker unavailable, spawning ${script} ${args.join(' ')}`);
+    return runPythonScript(args, script, timeoutMs);
+  }
+};
+
+const describeResult = (result) => (typeof result === 'string' ? result : JSON.stringify(result));
+
 // Update the live games route to use the new Python script
 
 // @route   GET api/games/live
@@ -49,26 +73,14 @@ router.get('/live', async (req, res) => {
     
     // Check if the request explicitly asks for a refresh
     if (req.query.refresh === 'true') {
-      console.log('[GAMES-API] Explicitly requested refresh, triggering Python script...');
+      console.log('[GAMES-API] Explicitly requested refresh, triggering live games update...');
       
-      // Run the script synchronously with a short timeout
-      const scriptPath = path.join(__dirname, '../dataControl/liveGames.py');
-      const pythonProcess = spawn('python', [scriptPath]);
-      
-      // Set a timeout to ensure we don't wait too long
-      const timeout = setTimeout(() => {
-        console.log('[GAMES-API] Python script taking too long, killing process...');
-        pythonProcess.kill();
-      }, 10000); // 10 second timeout
-      
-      // Handle completion
-      await new Promise((resolve) => {
-        pythonProcess.on('close', (code) => {
-          clearTimeout(timeout);
-          console.log(`[GAMES-API] Python script completed with code ${code}`);
-          resolve();
-        });
-      });
+      // Don't wait more than 10 seconds; the stored data is returned either way
+      try {
+        await runScraper('nba.refresh_live_games', {}, { script: 'liveGames.py', timeoutMs: 10000 });
+      } catch (error) {
+        console.log(`[GAMES-API] Live games refresh did not complete: ${error.message}`);
+      }
       
       console.log('[GAMES-API] Refresh completed, fetching updated data...');
     }
@@ -112,7 +124,7 @@ router.get('/date/:date', async (req, res) => {
       // If no data in DB, try to fetch it with Python script
       console.log(`[GAMES-API] No box scores found for ${date}, fetching from NBA API...`);
       try {
-        await runPythonScript(['--date', date]);
+        await runScraper('nba.update_box_scores', { date }, { args: ['--date', date] });
         
         // Try querying again
         const refreshedBoxScores = await boxScoresCollection.find({ gameDate: date }).toArray();
@@ -322,47 +334,33 @@ router.get('/update-player-stats', async (req, res) => {
   try {
     console.log('[GAMES-API] Forcing player stats update for live games...');
     
-    // Run the Python script to update player box scores
-    const scriptPath = path.join(__dirname, '../dataControl/playersBoxScores.py');
-    const pythonProcess = spawn('python', [scriptPath, '--live']);
+    let boxScoresResult;
+    try {
+      boxScoresResult = await runScraper('nba.update_live_games', {}, { args: ['--live'] });
+    } catch (error) {
+      console.error(`[GAMES-API] Player stats update failed: ${error.message}`);
+      return res.status(500).json({ error: 'Failed to update player stats' });
+    }
     
-    let stdoutData = '';
-    let stderrData = '';
+    // Also update the live games data to make sure it incorporates the new player data
+    try {
+      await runScraper('nba.refresh_live_games', {}, { script: 'liveGames.py' });
+    } catch (error) {
+      console.error(`[GAMES-API] Live games update failed: ${error.message}`);
+    }
     
-    pythonProcess.stdout.on('data', (data) => {
-      stdoutData += data.toString();
-    });
+    // Get the MongoDB connection
+    const db = mongoose.connection.db;
+    const liveGamesCollection = db.collection('live_games');
     
-    pythonProcess.stderr.on('data', (data) => {
-      stderrData += data.toString();
-    });
+    // Get all live games after the update
+    const liveGames = await liveGamesCollection.find({}).toArray();
     
-    pythonProcess.on('close', async (code) => {
-      if (code !== 0) {
-        console.error(`[GAMES-API] Player stats update failed with code ${code}`);
-        console.error(`[GAMES-API] Error: ${stderrData}`);
-        return res.status(500).json({ error: 'Failed to update player stats' });
-      }
-      
-      // Also update the live games data to make sure it incorporates the new player data
-      const liveGamesScript = path.join(__dirname, '../dataControl/liveGames.py');
-      const liveGamesProcess = spawn('python', [liveGamesScript]);
-      
-      liveGamesProcess.on('close', async (liveCode) => {
-        // Get the MongoDB connection
-        const db = mongoose.connection.db;
-        const liveGamesCollection = db.collection('live_games');
-        
-        // Get all live games after the update
-        const liveGames = await liveGamesCollection.find({}).toArray();
-        
-        res.json({
-          message: 'Player stats updated successfully',
-          gamesUpdated: liveGames.length,
-          stdout: stdoutData,
-          liveGames: liveGames
-        });
-      });
+    res.json({
+      message: 'Player stats updated successfully',
+      gamesUpdated: liveGames.length,
+      stdout: describeResult(boxScoresResult),
+      liveGames: liveGames
     });
   } catch (err) {
     console.error('Error updating player stats:', err);
@@ -377,87 +375,59 @@ router.get('/update-box-scores', async (req, res) => {
   try {
     console.log('[GAMES-API] Forcing box score & player stats update for live games...');
     
-    // Step 1: Run the playersBoxScores.py script with --live flag to fetch fresh box scores
-    const boxScoreScript = path.join(__dirname, '../dataControl/playersBoxScores.py');
-    const boxScoreProcess = spawn('python', [boxScoreScript, '--live']);
+    // Step 1: Fetch fresh box scores for live games (playersBoxScores.py --live)
+    let boxScoresResult;
+    try {
+      boxScoresResult = await runScraper('nba.update_live_games', {}, { args: ['--live'] });
+    } catch (error) {
+      console.error(`[GAMES-API] Box score update failed: ${error.message}`);
+      return res.status(500).json({ error: 'Failed to update box scores' });
+    }
     
-    let stdoutData = '';
-    let stderrData = '';
+    console.log('[GAMES-API] Box scores updated, now updating live games...');
     
-    boxScoreProcess.stdout.on('data', (data) => {
-      stdoutData += data.toString();
-    });
+    // Step 2: Incorporate the box score data into live games (liveGames.py)
+    let liveGamesResult;
+    try {
+      liveGamesResult = await runScraper('nba.refresh_live_games', {}, { script: 'liveGames.py' });
+    } catch (error) {
+      console.error(`[GAMES-API] Live games update failed: ${error.message}`);
+      return res.status(500).json({ error: 'Failed to update live games with box score data' });
+    }
     
-    boxScoreProcess.stderr.on('data', (data) => {
-      stderrData += data.toString();
-    });
+    // Get the MongoDB connection
+    const db = mongoose.connection.db;
+    const liveGamesCollection = db.collection('live_games');
+    const boxScoresCollection = db.collection('player_box_scores');
     
-    boxScoreProcess.on('close', async (code) => {
-      if (code !== 0) {
-        console.error(`[GAMES-API] Box score update failed with code ${code}`);
-        console.error(`[GAMES-API] Error: ${stderrData}`);
-        return res.status(500).json({ error: 'Failed to update box scores' });
-      }
-      
-      console.log('[GAMES-API] Box scores updated, now updating live games...');
-      
-      // Step 2: Run the liveGames.py script to incorporate the box score data
-      const liveGamesScript = path.join(__dirname, '../dataControl/liveGames.py');
-      const liveGamesProcess = spawn('python', [liveGamesScript]);
-      
-      let liveStdoutData = '';
-      let liveStderrData = '';
-      
-      liveGamesProcess.stdout.on('data', (data) => {
-        liveStdoutData += data.toString();
-      });
-      
-      liveGamesProcess.stderr.on('data', (data) => {
-        liveStderrData += data.toString();
-      });
+    // Get counts for reporting
+    const liveGamesCount = await liveGamesCollection.countDocuments();
+    const boxScoresCount = await boxScoresCollection.countDocuments();
+    
+    // Get all live games after the update to check player stats
+    const liveGames = await liveGamesCollection.find({}).toArray();
+    
+    // Check if any games have player data
+    let gamesWithPlayerData = 0;
+    if (liveGames.length > 0) {
+      gamesWithPlayerData = liveGames.filter(g => 
+        (g.homePlayers && g.homePlayers.length > 0) || 
+        (g.awayPlayers && g.awayPlayers.length > 0)
+      ).length;
       
-      liveGamesProcess.on('close', async (liveCode) => {
-        if (liveCode !== 0) {
-          console.error(`[GAMES-API] Live games update failed with code ${liveCode}`);
-          console.error(`[GAMES-API] Error: ${liveStderrData}`);
-          return res.status(500).json({ error: 'Failed to update live games with box score data' });
-        }
-        
-        // Get the MongoDB connection
-        const db = mongoose.connection.db;
-        const liveGamesCollection = db.collection('live_games');
-        const boxScoresCollection = db.collection('player_box_scores');
-        
-        // Get counts for reporting
-        const liveGamesCount = await liveGamesCollection.countDocuments();
-        const boxScoresCount = await boxScoresCollection.countDocuments();
-        
-        // Get all live games after the update to check player stats
-        const liveGames = await liveGamesCollection.find({}).toArray();
-        
-        // Check if any games have player data
-        let gamesWithPlayerData = 0;
-        if (liveGames.length > 0) {
-          gamesWithPlayerData = liveGames.filter(g => 
-            (g.homePlayers && g.homePlayers.length > 0) || 
-            (g.awayPlayers && g.awayPlayers.length > 0)
-          ).length;
-          
-          // Log details of the first game
-          const firstGame = liveGames[0];
-          console.log(`[GAMES-API] First game ${firstGame.gameId} has ${firstGame.homePlayers?.length || 0} home players and ${firstGame.awayPlayers?.length || 0} away players`);
-        }
-        
-        res.json({
-          success: true,
-          message: 'Box scores and live games updated successfully',
-          liveGamesCount,
-          boxScoresCount,
-          gamesWithPlayerData,
-          liveGamesOutput: liveStdoutData,
-          boxScoresOutput: stdoutData
-        });
-      });
+      // Log details of the first game
+      const firstGame = liveGames[0];
+      console.log(`[GAMES-API] First game ${firstGame.gameId} has ${firstGame.homePlayers?.length || 0} home players and ${firstGame.awayPlayers?.length || 0} away players`);
+    }
+    
+    res.json({
+      success: true,
+      message: 'Box scores and live games updated successfully',
+      liveGamesCount,
+      boxScoresCount,
+      gamesWithPlayerData,
+      liveGamesOutput: describeResult(liveGamesResult),
+      boxScoresOutput: describeResult(boxScoresResult)
     });
   } catch (err) {
     console.error('Error updating box scores:', err);
@@ -113,31 +113,68 @@ schedule.scheduleJob('*/2 * * * *', () => {
 let mlbBoxScoresRunning = false;
 let mlbGamesRunning = false;
 
-schedule.scheduleJob('*/20 * * * * *', () => {
-  const scriptPath = path.join(__dirname, 'dataControl/mlbLiveGames.py');
+let mlbLiveDaemon = null;
+
+const appendMlbLiveLog = (suffix, message) => {
   const dateStr = moment().format('YYYY-MM-DD');
-  const stdoutLog = fs.createWriteStream(path.join(logsDir, `mlb-live-${dateStr}.log`), { flags: 'a' });
-  const stderrLog = fs.createWriteStream(path.join(logsDir, `mlb-live-${dateStr}-error.log`), { flags: 'a' });
-  const pythonProcess = spawn('python', [scriptPath], {
+  fs.appendFile(path.join(logsDir, `mlb-live-${dateStr}${suffix}.log`), message, () => {});
+};
+
+const startMlbLiveDaemon = () => {
+  const scriptPath = path.join(__dirname, 'dataControl/mlbLiveGames.py');
+  console.log(`[${moment().format('YYYY-MM-DD HH:mm:ss')}] Starting MLB live games daemon...`);
+  mlbLiveDaemon = spawn('python', ['-u', scriptPath, '--daemon', '--incremental'], {
     env: {
       ...process.env,
       MONGODB_URI: process.env.MONGO_URI || 'mongodb://localhost:27017/sports_trading'
     }
   });
-  pythonProcess.stdout.on('data', (data) => {
-    const message = `[${moment().format('YYYY-MM-DD HH:mm:ss')}] ${data}`;
-    stdoutLog.write(message);
+  mlbLiveDaemon.stdout.on('data', (data) => {
+    appendMlbLiveLog('', `[${moment().format('YYYY-MM-DD HH:mm:ss')}] ${data}`);
   });
-  pythonProcess.stderr.on('data', (data) => {
-    const message = `[${moment().format('YYYY-MM-DD HH:mm:ss')}] ERROR: ${data}`;
-    stderrLog.write(message);
+  mlbLiveDaemon.stderr.on('data', (data) => {
+    appendMlbLiveLog('-error', `[${moment().format('YYYY-MM-DD HH:mm:ss')}] ERROR: ${data}`);
   });
-  pythonProcess.on('close', (code) => {
-    const message = `[${moment().format('YYYY-MM-DD HH:mm:ss')}] MLB live games script exited with code ${code}\n`;
-    stdoutLog.write(message);
-    stdoutLog.end();
-    stderrLog.end();
+  mlbLiveDaemon.on('close', (code) => {
+    appendMlbLiveLog('', `[${moment().format('YYYY-MM-DD HH:mm:ss')}] MLB live games daemon exited with code ${code}\n`);
+    mlbLiveDaemon = null;
   });
+};
+
+// The daemon keeps its own per-game cadence; this job only restarts it if it has exited.
+schedule.scheduleJob('*/20 * * * * *', () => {
+  if (mlbLiveDaemon) return;
+  startMlbLiveDaemon();
+});
+
+// Resident worker serving on-demand scraper calls from routes/games.js (see scraperWorkerClient.js)
+let scraperWorker = null;
+
+const startScraperWorker = () => {
+  const scriptPath = path.join(__dirname, 'dataControl/scraperWorker.py');
+  console.log(`[${moment().format('YYYY-MM-DD HH:mm:ss')}] Starting scraper worker...`);
+  scraperWorker = spawn('python', ['-u', scriptPath], {
+    cwd: path.join(__dirname, 'dataControl'),
+    env: process.env
+  });
+  const dateStr = () => moment().format('YYYY-MM-DD');
+  scraperWorker.stdout.on('data', (data) => {
+    fs.appendFile(path.join(logsDir, `scraper-worker-${dateStr()}.log`), `[${moment().format('YYYY-MM-DD HH:mm:ss')}] ${data}`, () => {});
+  });
+  scraperWorker.stderr.on('data', (data) => {
+    // Python logging writes to stderr, so this is the worker's regular log too
+    fs.appendFile(path.join(logsDir, `scraper-worker-${dateStr()}.log`), `[${moment().format('YYYY-MM-DD HH:mm:ss')}] ${data}`, () => {});
+  });
+  scraperWorker.on('close', (code) => {
+    fs.appendFile(path.join(logsDir, `scraper-worker-${dateStr()}.log`), `[${moment().format('YYYY-MM-DD HH:mm:ss')}] Scraper worker exited with code ${code}\n`, () => {});
+    scraperWorker = null;
+  });
+};
+
+startScraperWorker();
+schedule.scheduleJob('*/20 * * * * *', () => {
+  if (scraperWorker) return;
+  startScraperWorker();
 });
 
 schedule.scheduleJob('*/10 * * * *', () => {
@@ -0,0 +1,62 @@
+const net = require('net');
+
+// Client for dataControl/scraperWorker.py, the resident Python process that scheduler.js keeps running.
+// One JSON line per request and per response over a local TCP socket.
+
+const WORKER_HOST = process.env.SCRAPER_WORKER_HOST || '127.0.0.1';
+const WORKER_PORT = parseInt(process.env.SCRAPER_WORKER_PORT || '8766', 10);
+
+// Errors meaning the worker is not running, so callers can fall back to spawning the script
+const UNAVAILABLE_CODES = new Set(['ECONNREFUSED', 'ENOENT']);
+
+let nextId = 1;
+
+const callScraper = (method, params = {}, timeoutMs = 60000) => {
+  return new Promise((resolve, reject) => {
+    const id = nextId++;
+    const socket = net.createConnection({ host: WORKER_HOST, port: WORKER_PORT });
+    let buffer = '';
+    let settled = false;
+
+    const finish = (err, result) => {
+      if (settled) return;
+      settled = true;
+      socket.destroy();
+      if (err) reject(err);
+      else resolve(result);
+    };
+
+    socket.setEncoding('utf8');
+    socket.setTimeout(timeoutMs, () => {
+      const err = new Error(`Scraper worker call ${method} timed out after ${timeoutMs}ms`);
+      err.code = 'ETIMEDOUT';
+      finish(err);
+    });
+    socket.on('connect', () => {
+      socket.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+    socket.on('data', (chunk) => {
+      buffer += chunk;
+      let newline;
+      while ((newline = buffer.indexOf('\n')) !== -1) {
+        const line = buffer.slice(0, newline);
+        buffer = buffer.slice(newline + 1);
+        let response;
+        try {
+          response = JSON.parse(line);
+        } catch (err) {
+          return finish(new Error(`Invalid response from scraper worker: ${err.message}`));
+        }
+        if (response.id !== id) continue;
+        if (response.error) return finish(new Error(response.error));
+        return finish(null, response.result);
+      }
+    });
+    socket.on('error', (err) => finish(err));
+    socket.on('close', () => finish(new Error(`Scraper worker closed the connection during ${method}`)));
+  });
+};
+
+const isWorkerUnavailable = (err) => UNAVAILABLE_CODES.has(err.code);
+
+module.exports = { callScraper, isWorkerUnavailable, WORKER_HOST, WORKER_PORT };